@@ -0,0 +1,249 @@
+import math
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from k8s_topology import workload_name
+
+SIGNAL_SOURCES = ("metrics", "logs", "k8s")
+
+# Signals closer than this are joined into one correlated cluster
+DEFAULT_WINDOW_SECONDS = 120
+
+# A sample this many times its series baseline is a spike
+SPIKE_RATIO = 2.0
+
+# Error records are counted into buckets of this width
+BURST_BUCKET_SECONDS = 60
+
+# Severities are log2 scaled and capped so one signal cannot dominate
+MAX_SEVERITY = 5.0
+
+_LEVEL_WEIGHTS = {"ERROR": 1.0, "CRITICAL": 2.0}
+_EVENT_WEIGHTS = {"Warning": 1.0, "Error": 2.0}
+_RESTART_REASONS = {"BackOff", "BackOffStart", "CrashLoopBackOff", "OOMKilled"}
+
+# Name parts that say what an object is rather than which app it belongs to
+_GENERIC_NAME_TOKENS = {"service", "svc", "deployment", "pod", "app"}
+
+Signal = Dict[str, Any]
+
+
+def _to_iso(epoch: float) -> str:
+    return (
+        datetime.fromtimestamp(epoch, tz=timezone.utc)
+        .isoformat()
+        .replace("+00:00", "Z")
+    )
+
+
+def _name_tokens(name: str) -> Set[str]:
+    tokens = set(name.lower().replace("_", "-").split("-"))
+    return tokens - _GENERIC_NAME_TOKENS - {""}
+
+
+def service_matches(service: str, name: Optional[str]) -> bool:
+    """Loose match between a service name and a metric, log or k8s object name.
+
+    The three backends name the same workload differently ("web-service",
+    "web-app-deployment-5c8d7f9b6d-k2n8p"), so names match when they share
+    a token other than generic ones like "service" or "deployment".
+    """
+    if not name:
+        return False
+    if service == name:
+        return True
+    return bool(_name_tokens(service) & _name_tokens(workload_name(name)))
+
+
+def _severity(magnitude: float) -> float:
+    return round(min(math.log2(1 + magnitude), MAX_SEVERITY), 3)
+
+
+def _signal(
+    epoch: float,
+    source: str,
+    kind: str,
+    service: str,
+    severity: float,
+    summary: str,
+    **detail: Any,
+) -> Signal:
+    return {
+        "epoch": epoch,
+        "source": source,
+        "kind": kind,
+        "service": service,
+        "severity": severity,
+        "summary": summary,
+        **detail,
+    }
+
+
+def metric_spikes(
+    series: Iterable[Tuple[str, str, Iterable[Tuple[float, float]]]],
+    spike_ratio: float = SPIKE_RATIO,
+) -> List[Signal]:
+    """Samples that exceed the median of everything before them in the series.
+
+    Args:
+        series: (metric, service, [(epoch, value), ...]) tuples
+        spike_ratio: Minimum value / baseline ratio reported as a spike
+    """
+    signals = []
+    for metric, service, samples in series:
+        history: List[float] = []
+        for epoch, value in sorted(samples):
+            if history:
+                baseline = history[len(history) // 2]
+                ratio = value / baseline if baseline > 0 else math.inf
+                if value > 0 and ratio >= spike_ratio:
+                    signals.append(
+                        _signal(
+                            epoch,
+                            "metrics",
+                            "metric_spike",
+                            service,
+                            _severity(min(ratio, 2**MAX_SEVERITY) - 1),
+                            f"{metric} at {value:g} is {min(ratio, 999):.1f}x "
+                            f"its baseline of {baseline:g}",
+                            metric=metric,
+                            value=value,
+                            baseline=baseline,
+                        )
+                    )
+            insort(history, value)
+    return signals
+
+
+def error_bursts(
+    records: Iterable[Tuple[float, Dict[str, Any]]],
+    bucket_seconds: int = BURST_BUCKET_SECONDS,
+) -> List[Signal]:
+    """One signal per (service, bucket) that contains ERROR or CRITICAL logs"""
+    buckets: Dict[Tuple[str, float], List[Dict[str, Any]]] = defaultdict(list)
+    for epoch, record in records:
+        if record.get("level") in _LEVEL_WEIGHTS:
+            bucket = epoch - epoch % bucket_seconds
+            buckets[(record.get("service", "unknown"), bucket)].append(record)
+
+    signals = []
+    for (service, bucket), bucket_records in buckets.items():
+        weight = sum(_LEVEL_WEIGHTS[r["level"]] for r in bucket_records)
+        signals.append(
+            _signal(
+                bucket,
+                "logs",
+                "error_burst",
+                service,
+                _severity(weight),
+                f"{len(bucket_records)} error logs: {bucket_records[0].get('message', '')}",
+                count=len(bucket_records),
+            )
+        )
+    return signals
+
+
+def k8s_signals(events: Iterable[Tuple[float, Dict[str, Any]]]) -> List[Signal]:
+    """Warning and Error events, with container restarts called out"""
+    signals = []
+    for epoch, event in events:
+        weight = _EVENT_WEIGHTS.get(event.get("type"))
+        if weight is None:
+            continue
+        reason = event.get("reason", "")
+        count = event.get("count", 1)
+        signals.append(
+            _signal(
+                epoch,
+                "k8s",
+                "pod_restart" if reason in _RESTART_REASONS else "k8s_event",
+                event.get("object", "").split("/")[-1],
+                _severity(weight * count),
+                f"{reason}: {event.get('message', '')}",
+                object=event.get("object"),
+                count=count,
+            )
+        )
+    return signals
+
+
+def correlate(
+    signals: Iterable[Signal],
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    service: Optional[str] = None,
+    window_seconds: float = DEFAULT_WINDOW_SECONDS,
+    limit: int = 5,
+) -> Dict[str, Any]:
+    """Join signals from different sources on a shared time index.
+
+    Signals are sorted by time and every signal is window-joined against the
+    ones within ``window_seconds`` of it, found by binary search on the
+    sorted times. A signal's score is its severity amplified by the
+    distance-weighted severity of the other sources around it, so a latency
+    spike next to an error burst and a pod restart outranks any of them
+    alone. Signals chained within the window form clusters, ranked by total
+    score, and each cluster's earliest signal is reported as the leading
+    candidate cause.
+    """
+    selected = [
+        s
+        for s in signals
+        if (start is None or s["epoch"] >= start)
+        and (end is None or s["epoch"] <= end)
+        and (not service or service_matches(service, s["service"]))
+    ]
+    selected.sort(key=lambda s: (s["epoch"], s["source"]))
+
+    times = [s["epoch"] for s in selected]
+    sources = [s["source"] for s in selected]
+    severities = [s["severity"] for s in selected]
+
+    scored = []
+    for i, epoch in enumerate(times):
+        lo = bisect_left(times, epoch - window_seconds)
+        hi = bisect_right(times, epoch + window_seconds)
+        support = 0.0
+        correlated = set()
+        for j in range(lo, hi):
+            if sources[j] != sources[i]:
+                proximity = 1 - abs(times[j] - epoch) / (window_seconds or 1)
+                support += severities[j] * proximity
+                correlated.add(sources[j])
+        event = {k: v for k, v in selected[i].items() if k != "epoch"}
+        event["timestamp"] = _to_iso(epoch)
+        event["score"] = round(severities[i] * (1 + support), 3)
+        event["correlated_sources"] = sorted(correlated)
+        scored.append(event)
+
+    # A gap wider than the window closes the current cluster
+    groups: List[List[Dict[str, Any]]] = []
+    for i, event in enumerate(scored):
+        if not groups or times[i] - times[i - 1] > window_seconds:
+            groups.append([])
+        groups[-1].append(event)
+
+    clusters = [
+        {
+            "start": events[0]["timestamp"],
+            "end": events[-1]["timestamp"],
+            "sources": sorted({e["source"] for e in events}),
+            "score": round(sum(e["score"] for e in events), 3),
+            "leading_event": events[0]["summary"],
+            "events": events,
+        }
+        for events in groups
+    ]
+    # Clusters spanning more signal sources rank first
+    clusters.sort(key=lambda c: (len(c["sources"]), c["score"]), reverse=True)
+    clusters = [{"rank": rank, **c} for rank, c in enumerate(clusters, 1)]
+
+    return {
+        "service": service,
+        "window_seconds": window_seconds,
+        "signals": {source: sources.count(source) for source in SIGNAL_SOURCES},
+        "clusters_total": len(clusters),
+        "clusters": clusters[:limit],
+    }
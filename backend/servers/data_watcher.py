@@ -0,0 +1,185 @@
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import FastAPI
+
+try:
+    import watchfiles
+except ImportError:  # pragma: no cover - depends on the environment
+    watchfiles = None
+
+logger = logging.getLogger(__name__)
+
+# Polling fallback interval when watchfiles (inotify) is not installed
+WATCH_POLL_SECONDS = float(os.getenv("DATA_WATCH_POLL_SECONDS", "1.0"))
+
+Signature = Optional[Tuple[int, int]]
+
+
+def file_signature(path: Path) -> Signature:
+    """(mtime, size) of a file, or None if it does not exist"""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class DataWatcher:
+    """Reports which data file changed so only that dataset is refreshed.
+
+    Watches the top level of each directory (the WAL and ingest directories
+    below them are owned by the stores) with watchfiles when it is installed
+    and by polling file signatures otherwise. Callbacks run on the watcher
+    thread, so a refresh never runs on the event loop.
+    """
+
+    def __init__(
+        self, directories: Iterable[Path], poll_interval: float = WATCH_POLL_SECONDS
+    ):
+        self.directories = [Path(d) for d in directories]
+        self.poll_interval = poll_interval
+        self.backend = "watchfiles" if watchfiles is not None else "polling"
+        self._subscribers: List[Tuple[Optional[frozenset], Callable[[Path], None]]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def subscribe(
+        self, callback: Callable[[Path], None], names: Optional[Iterable[str]] = None
+    ) -> None:
+        """Call ``callback(path)`` when a file changes, optionally only for ``names``"""
+        self._subscribers.append((frozenset(names) if names else None, callback))
+
+    def dispatch(self, path: Path) -> None:
+        for names, callback in self._subscribers:
+            if names is None or path.name in names:
+                try:
+                    callback(path)
+                except Exception as e:
+                    logger.error(f"Error refreshing {path.name}: {e}")
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        if self.backend == "watchfiles":
+            target, args = self._watch, ()
+        else:
+            # Baseline taken before returning so no change after start() is missed
+            target, args = self._poll, (self._scan(),)
+        self._thread = threading.Thread(
+            target=target, args=args, name="data-watcher", daemon=True
+        )
+        self._thread.start()
+        logger.info(
+            f"Watching {', '.join(d.name for d in self.directories)} with {self.backend}"
+        )
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _scan(self) -> Dict[Path, Signature]:
+        signatures = {}
+        for directory in self.directories:
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    signatures[Path(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+        return signatures
+
+    def _poll(self, previous: Dict[Path, Signature]) -> None:
+        while not self._stop.wait(self.poll_interval):
+            current = self._scan()
+            for path in sorted(previous.keys() | current.keys()):
+                if previous.get(path) != current.get(path):
+                    self.dispatch(path)
+            previous = current
+
+    def _watch(self) -> None:
+        existing = [str(d) for d in self.directories if d.exists()]
+        for changes in watchfiles.watch(
+            *existing, stop_event=self._stop, recursive=False
+        ):
+            for path in sorted({Path(p) for _, p in changes}):
+                self.dispatch(path)
+
+
+class JsonFileCache:
+    """Parsed JSON files, refreshed when the watcher reports a change.
+
+    A changed file is parsed on the watcher thread and swapped in with a
+    single assignment, so readers see either the old or the new document,
+    never a partial one. A file that fails to parse (e.g. caught mid-write)
+    keeps its last good version until the next change. Without a running
+    watcher every read validates the file signature instead.
+    """
+
+    def __init__(
+        self,
+        watcher: Optional[DataWatcher] = None,
+        on_load: Optional[Callable[[Path], None]] = None,
+        on_lookup: Optional[Callable[[bool], None]] = None,
+    ):
+        self.watcher = watcher
+        self.on_load = on_load
+        self.on_lookup = on_lookup
+        self._entries: Dict[Path, Tuple[Signature, Any]] = {}
+        if watcher is not None:
+            watcher.subscribe(self.refresh)
+
+    def _load(self, path: Path) -> Tuple[Signature, Any]:
+        signature = file_signature(path)
+        with open(path, "r") as f:
+            data = json.load(f)
+        if self.on_load is not None:
+            self.on_load(path)
+        return signature, data
+
+    def get(self, path: Path) -> Any:
+        """Parsed contents of a JSON file; raises FileNotFoundError like open()"""
+        entry = self._entries.get(path)
+        hit = entry is not None and (
+            (self.watcher is not None and self.watcher.running)
+            or entry[0] == file_signature(path)
+        )
+        if self.on_lookup is not None:
+            self.on_lookup(hit)
+        if not hit:
+            entry = self._load(path)
+            self._entries[path] = entry
+        return entry[1]
+
+    def refresh(self, path: Path) -> None:
+        """Reparse a cached file after a change, or drop it if it was removed"""
+        if path not in self._entries:
+            return
+        if not path.exists():
+            self._entries.pop(path, None)
+            return
+        try:
+            self._entries[path] = self._load(path)
+        except ValueError as e:
+            logger.warning(f"Keeping previous {path.name}, reparse failed: {e}")
+
+
+def install_data_watcher(app: FastAPI, directories: Iterable[Path]) -> DataWatcher:
+    """Watch data directories for the lifetime of an app"""
+    watcher = DataWatcher(directories)
+    app.on_event("startup")(watcher.start)
+    app.on_event("shutdown")(watcher.stop)
+    return watcher
@@ -1,19 +1,30 @@
-import json
 import logging
-from datetime import datetime, timezone
+import threading
 from enum import Enum
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from fastapi import (
     Depends,
     FastAPI,
-    Header,
     HTTPException,
     Query,
 )
+from fastapi.responses import JSONResponse
+from k8s_topology import TopologyGraph
+from loop_monitor import run_blocking
 from pydantic import BaseModel, Field
-from retrieve_api_key import retrieve_api_key
+from response_shaping import InvalidCursorError, fit_to_budget
+from snapshot_history import SnapshotHistory
+from store import (
+    Dataset,
+    InvalidTimeRangeError,
+    api_key_validator,
+    install_backend,
+    load_api_key,
+    parse_fields,
+    project,
+)
 
 # Configure logging with basicConfig
 logging.basicConfig(
@@ -27,70 +38,143 @@ app = FastAPI(title="Kubernetes Analysis API", version="1.0.0")
 # Base path for fake data
 DATA_PATH = Path(__file__).parent.parent / "data" / "k8s_data"
 
-# API Key for authentication
-CREDENTIAL_PROVIDER_NAME = "sre-agent-api-key-credential-provider"
+# Datasets the topology graph is built from
+TOPOLOGY_FILES = ("nodes", "pods", "deployments", "services")
+
+# Repeats of one event are merged on these fields under a response budget
+EVENT_COLLAPSE_FIELDS = ("type", "reason", "object", "message")
+
+_EVENT_SEVERITY = {"Error": 3, "Warning": 2, "Normal": 1}
 
 # Retrieve API key from credential provider at startup
-try:
-    EXPECTED_API_KEY = retrieve_api_key(CREDENTIAL_PROVIDER_NAME)
-    if not EXPECTED_API_KEY:
-        logging.error("Failed to retrieve API key from credential provider")
-        raise RuntimeError(
-            "Cannot start server without valid API key from credential provider"
-        )
-except Exception as e:
-    logging.error(f"Error retrieving API key: {e}")
-    raise RuntimeError(f"Cannot start server: {e}") from e
+EXPECTED_API_KEY = load_api_key()
+_validate_api_key = api_key_validator(EXPECTED_API_KEY)
 
+SERVER_METRICS, DATA_WATCHER, JSON_FILES = install_backend(
+    app, [DATA_PATH], dependencies=[Depends(_validate_api_key)]
+)
 
-def _validate_api_key(x_api_key: str = Header(None, alias="X-API-Key")):
-    """Validate API key from header"""
-    if not x_api_key or x_api_key != EXPECTED_API_KEY:
-        raise HTTPException(status_code=401, detail="Invalid or missing API key")
-    return x_api_key
+EVENTS = Dataset(JSON_FILES, DATA_PATH / "events.json", "events")
+RESOURCE_USAGE = Dataset(JSON_FILES, DATA_PATH / "resource_usage.json")
+
+# Snapshot datasets, versioned for since_version deltas
+SNAPSHOT_SOURCES = {
+    name: Dataset(JSON_FILES, DATA_PATH / f"{name}.json", name, required=False)
+    for name in TOPOLOGY_FILES
+}
+
+_datasets: Dict[str, Tuple[int, SnapshotHistory]] = {}
+_topology: Optional[TopologyGraph] = None
+_topology_versions: Optional[Tuple[int, ...]] = None
+# Datasets are loaded on the cold path pool, so reloads are serialized
+_datasets_lock = threading.RLock()
+
+
+def _load_dataset(name: str, refresh: bool = False) -> SnapshotHistory:
+    """Return the versioned snapshot of a dataset, reloading it when the file changes"""
+    cached = _datasets.get(name)
+    # While the watcher runs it refreshes changed files, so skip the lookup
+    if cached is not None and not refresh and DATA_WATCHER.running:
+        SERVER_METRICS.cache_lookup("k8s_datasets", True)
+        return cached[1]
+
+    source = SNAPSHOT_SOURCES[name]
+    with _datasets_lock:
+        objects = source.load()
+        cached = _datasets.get(name)
+        hit = cached is not None and cached[0] == source.version
+        SERVER_METRICS.cache_lookup("k8s_datasets", hit)
+        if hit:
+            return cached[1]
+
+        history = cached[1] if cached is not None else SnapshotHistory()
+        history.update(objects)
+        _datasets[name] = (source.version, history)
+        return history
+
+
+def _get_topology() -> TopologyGraph:
+    """Return the topology graph, rebuilding it when a source dataset changes"""
+    topology = _topology
+    if topology is not None and DATA_WATCHER.running:
+        SERVER_METRICS.cache_lookup("topology", True)
+        return topology
+    return _rebuild_topology()
+
+
+def _rebuild_topology() -> TopologyGraph:
+    """Rebuild the topology graph unless its source dataset versions are unchanged"""
+    global _topology, _topology_versions
+
+    with _datasets_lock:
+        snapshots = {name: _load_dataset(name) for name in TOPOLOGY_FILES}
+        versions = tuple(snapshot.version for snapshot in snapshots.values())
+        hit = _topology is not None and versions == _topology_versions
+        SERVER_METRICS.cache_lookup("topology", hit)
+        if not hit:
+            _topology = TopologyGraph.build(
+                **{
+                    name: list(snapshot.objects.values())
+                    for name, snapshot in snapshots.items()
+                }
+            )
+            _topology_versions = versions
+        return _topology
 
 
-def _parse_timestamp(timestamp_str: str) -> datetime:
-    """Parse ISO timestamp string to datetime object"""
-    try:
-        # Handle both with and without timezone
-        if timestamp_str.endswith("Z"):
-            return datetime.fromisoformat(timestamp_str.replace("Z", "+00:00"))
-        elif "+" in timestamp_str or timestamp_str.endswith("0"):
-            return datetime.fromisoformat(timestamp_str)
-        else:
-            return datetime.fromisoformat(timestamp_str + "+00:00")
-    except:
-        # Fallback: assume current time if parsing fails
-        return datetime.now(timezone.utc)
+def _refresh_dataset(path: Path) -> None:
+    """Reload a changed snapshot file and rebuild the topology if it depends on it"""
+    name = path.stem
+    if name not in _datasets:
+        return
+    with _datasets_lock:
+        history = _load_dataset(name, refresh=True)
+        if _topology is not None and name in TOPOLOGY_FILES:
+            _rebuild_topology()
+    logging.info(f"Refreshed {name} to snapshot version {history.version}")
+
+
+DATA_WATCHER.subscribe(_refresh_dataset, [f"{name}.json" for name in TOPOLOGY_FILES])
 
 
-def _filter_events_by_time(events: list, since: Optional[str] = None) -> list:
-    """Filter events by since timestamp"""
-    if not since:
-        return events
+def _index_sizes() -> Dict[str, int]:
+    sizes = {f"{name}_objects": len(h.objects) for name, (_, h) in _datasets.items()}
+    if _topology is not None:
+        sizes.update(
+            {f"topology_{key}": count for key, count in _topology.stats().items()}
+        )
+    return sizes
 
-    filtered_events = []
-    since_dt = _parse_timestamp(since)
 
-    for event in events:
-        event_timestamp = event.get("timestamp")
-        if not event_timestamp:
-            continue
+SERVER_METRICS.gauge(
+    "backend_index_size", "Cached snapshot and topology sizes", _index_sizes, "index"
+)
 
-        try:
-            event_dt = _parse_timestamp(event_timestamp)
 
-            if event_dt >= since_dt:
-                filtered_events.append(event)
-        except:
-            # Include events with unparseable timestamps
-            filtered_events.append(event)
+def _snapshot_response(
+    name: str,
+    since_version: Optional[int],
+    matches: Callable[[Dict[str, Any]], bool],
+    fields: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Full snapshot of a dataset, or only what changed since a version"""
+    version, objects, delta = _load_dataset(name).read(since_version)
+    if delta is None:
+        objects = [obj for obj in objects if matches(obj)]
+        return {
+            name: project(objects, parse_fields(fields)),
+            "version": version,
+        }
 
-    return filtered_events
+    upserted, removed = delta
+    return {
+        name: project([obj for obj in upserted if matches(obj)], parse_fields(fields)),
+        "version": version,
+        "since_version": since_version,
+        "removed": [key for key in removed if matches(key)],
+    }
 
 
-# Pydantic Models
 class PodStatus(str, Enum):
     """Pod status enumeration"""
 
@@ -141,10 +225,24 @@ class Pod(BaseModel):
     resource_usage: ResourceUsage = Field(..., description="Resource usage metrics")
 
 
+class RemovedObject(BaseModel):
+    """Reference to an object removed since a snapshot version"""
+
+    name: str = Field(..., description="Object name")
+    namespace: Optional[str] = Field(None, description="Kubernetes namespace")
+
+
 class PodStatusResponse(BaseModel):
     """Response model for pod status endpoint"""
 
     pods: List[Pod] = Field(..., description="List of pods")
+    version: Optional[int] = Field(None, description="Snapshot version")
+    since_version: Optional[int] = Field(
+        None, description="Version the pods list is a delta against"
+    )
+    removed: Optional[List[RemovedObject]] = Field(
+        None, description="Pods removed since since_version"
+    )
 
 
 class DeploymentStatus(str, Enum):
@@ -176,6 +274,13 @@ class DeploymentStatusResponse(BaseModel):
     """Response model for deployment status endpoint"""
 
     deployments: List[Deployment] = Field(..., description="List of deployments")
+    version: Optional[int] = Field(None, description="Snapshot version")
+    since_version: Optional[int] = Field(
+        None, description="Version the deployments list is a delta against"
+    )
+    removed: Optional[List[RemovedObject]] = Field(
+        None, description="Deployments removed since since_version"
+    )
 
 
 class EventType(str, Enum):
@@ -221,12 +326,23 @@ class ErrorResponse(BaseModel):
     detail: Optional[str] = Field(None, description="Detailed error information")
 
 
-@app.get("/pods/status", response_model=PodStatusResponse)
+@app.get(
+    "/pods/status", response_model=PodStatusResponse, response_model_exclude_none=True
+)
 async def get_pod_status(
     namespace: Optional[str] = Query(
         None, description="Kubernetes namespace to filter pods"
     ),
     pod_name: Optional[str] = Query(None, description="Specific pod name to retrieve"),
+    since_version: Optional[int] = Query(
+        None,
+        ge=0,
+        description="Return only objects added, changed or removed since this snapshot version",
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma separated fields to return, e.g. name,status,node (dotted names select nested fields)",
+    ),
     api_key: str = Depends(_validate_api_key),
 ):
     """
@@ -234,11 +350,14 @@ async def get_pod_status(
 
     This endpoint provides detailed information about pods including their status,
     resource usage, and location within the cluster. Results can be filtered by
-    namespace and specific pod name.
+    namespace and specific pod name. When since_version is given only the pods
+    added or changed since that version are returned, plus the removed ones.
 
     Args:
         namespace: Optional Kubernetes namespace to filter pods
         pod_name: Optional specific pod name to retrieve
+        since_version: Optional snapshot version from a previous response
+        fields: Optional comma separated fields to return for each object
         api_key: Required API key for authentication
 
     Returns:
@@ -249,31 +368,45 @@ async def get_pod_status(
         HTTPException: 500 if data retrieval fails
     """
     try:
-        with open(DATA_PATH / "pods.json", "r") as f:
-            data = json.load(f)
-
-        pods = data.get("pods", [])
 
-        # Filter by namespace if provided
-        if namespace:
-            pods = [p for p in pods if p.get("namespace") == namespace]
+        def matches(pod):
+            # Filter by namespace and pod name if provided
+            if namespace and pod.get("namespace") != namespace:
+                return False
+            return not pod_name or pod.get("name") == pod_name
 
-        # Filter by pod name if provided
-        if pod_name:
-            pods = [p for p in pods if p.get("name") == pod_name]
+        result = await run_blocking(
+            _snapshot_response, "pods", since_version, matches, fields
+        )
 
-        return PodStatusResponse(pods=pods)
+        # Projected pods no longer match the Pod model
+        if fields:
+            return JSONResponse(content=result)
+        return PodStatusResponse(**result)
     except Exception as e:
         logging.error(f"Error retrieving pod status: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/deployments/status", response_model=DeploymentStatusResponse)
+@app.get(
+    "/deployments/status",
+    response_model=DeploymentStatusResponse,
+    response_model_exclude_none=True,
+)
 async def get_deployment_status(
     namespace: Optional[str] = Query(None, description="Kubernetes namespace"),
     deployment_name: Optional[str] = Query(
         None, description="Specific deployment name"
     ),
+    since_version: Optional[int] = Query(
+        None,
+        ge=0,
+        description="Return only objects added, changed or removed since this snapshot version",
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma separated fields to return, e.g. name,status,node (dotted names select nested fields)",
+    ),
     api_key: str = Depends(_validate_api_key),
 ):
     """
@@ -281,11 +414,14 @@ async def get_deployment_status(
 
     This endpoint provides comprehensive information about deployments including
     their current status, replica counts, and health metrics. Results can be
-    filtered by namespace and specific deployment name.
+    filtered by namespace and specific deployment name. When since_version is
+    given only the deployments that changed since that version are returned.
 
     Args:
         namespace: Optional Kubernetes namespace to filter deployments
         deployment_name: Optional specific deployment name to retrieve
+        since_version: Optional snapshot version from a previous response
+        fields: Optional comma separated fields to return for each object
         api_key: Required API key for authentication
 
     Returns:
@@ -296,18 +432,19 @@ async def get_deployment_status(
         HTTPException: 500 if data retrieval fails
     """
     try:
-        with open(DATA_PATH / "deployments.json", "r") as f:
-            data = json.load(f)
 
-        deployments = data.get("deployments", [])
+        def matches(deployment):
+            if namespace and deployment.get("namespace") != namespace:
+                return False
+            return not deployment_name or deployment.get("name") == deployment_name
 
-        if namespace:
-            deployments = [d for d in deployments if d.get("namespace") == namespace]
-
-        if deployment_name:
-            deployments = [d for d in deployments if d.get("name") == deployment_name]
+        result = await run_blocking(
+            _snapshot_response, "deployments", since_version, matches, fields
+        )
 
-        return DeploymentStatusResponse(deployments=deployments)
+        if fields:
+            return JSONResponse(content=result)
+        return DeploymentStatusResponse(**result)
     except Exception as e:
         logging.error(f"Error retrieving deployment status: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -323,6 +460,23 @@ async def get_cluster_events(
         enum=["Warning", "Error", "Normal"],
         description="Filter by event severity",
     ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma separated fields to return, e.g. name,status,node (dotted names select nested fields)",
+    ),
+    max_tokens: Optional[int] = Query(
+        None,
+        ge=1,
+        description="Token budget; repeated events are merged and the most severe kept",
+    ),
+    max_bytes: Optional[int] = Query(
+        None,
+        ge=1,
+        description="Byte budget; repeated events are merged and the most severe kept",
+    ),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor of a truncated response, to continue it"
+    ),
     api_key: str = Depends(_validate_api_key),
 ):
     """
@@ -335,28 +489,45 @@ async def get_cluster_events(
     Args:
         since: Optional ISO 8601 timestamp to filter events from
         severity: Optional severity filter (Warning, Error, Normal)
+        fields: Optional comma separated fields to return for each event
+        max_tokens: Optional token budget for the returned events
+        max_bytes: Optional byte budget for the returned events
+        cursor: Optional next_cursor of a truncated response
         api_key: Required API key for authentication
 
     Returns:
         EventsResponse: List of cluster events with timestamps and details
 
     Raises:
+        HTTPException: 400 if the cursor or since timestamp is invalid
         HTTPException: 401 if API key is invalid
         HTTPException: 500 if data retrieval fails
     """
     try:
-        with open(DATA_PATH / "events.json", "r") as f:
-            data = json.load(f)
-
-        events = data.get("events", [])
-
-        if severity:
-            events = [e for e in events if e.get("type") == severity]
-
-        # Filter by since timestamp
-        events = _filter_events_by_time(events, since)
-
+        # Filter by severity and since timestamp
+        events = await run_blocking(EVENTS.query, {"type": severity}, start_time=since)
+
+        if max_tokens is not None or max_bytes is not None or cursor is not None:
+            # Repeats of an event are merged and the most severe kept first
+            shaped, shaping = fit_to_budget(
+                project(events, parse_fields(fields)),
+                max_bytes=max_bytes,
+                max_tokens=max_tokens,
+                cursor=cursor,
+                collapse_fields=EVENT_COLLAPSE_FIELDS,
+                severity=lambda e: (
+                    _EVENT_SEVERITY.get(e.get("type"), 0),
+                    e.get("count", 1),
+                ),
+            )
+            return JSONResponse(content={"events": shaped, **shaping})
+        if fields:
+            return JSONResponse(
+                content={"events": project(events, parse_fields(fields))}
+            )
         return EventsResponse(events=events)
+    except (InvalidCursorError, InvalidTimeRangeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logging.error(f"Error retrieving cluster events: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -390,8 +561,7 @@ async def get_resource_usage(
         HTTPException: 500 if data retrieval fails
     """
     try:
-        with open(DATA_PATH / "resource_usage.json", "r") as f:
-            data = json.load(f)
+        data = await run_blocking(RESOURCE_USAGE.document)
 
         resource_usage = data.get("resource_usage", {})
 
@@ -413,6 +583,15 @@ async def get_resource_usage(
 @app.get("/nodes/status")
 async def get_node_status(
     node_name: Optional[str] = Query(None, description="Specific node name"),
+    since_version: Optional[int] = Query(
+        None,
+        ge=0,
+        description="Return only objects added, changed or removed since this snapshot version",
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma separated fields to return, e.g. name,status,node (dotted names select nested fields)",
+    ),
     api_key: str = Depends(_validate_api_key),
 ):
     """
@@ -420,10 +599,13 @@ async def get_node_status(
 
     This endpoint provides comprehensive information about cluster nodes including
     their health status, capacity, allocatable resources, and current usage.
-    Results can be filtered by specific node name.
+    Results can be filtered by specific node name. When since_version is given
+    only the nodes that changed since that version are returned.
 
     Args:
         node_name: Optional specific node name to retrieve
+        since_version: Optional snapshot version from a previous response
+        fields: Optional comma separated fields to return for each object
         api_key: Required API key for authentication
 
     Returns:
@@ -434,17 +616,63 @@ async def get_node_status(
         HTTPException: 500 if data retrieval fails
     """
     try:
-        with open(DATA_PATH / "nodes.json", "r") as f:
-            data = json.load(f)
+        return await run_blocking(
+            _snapshot_response,
+            "nodes",
+            since_version,
+            lambda node: not node_name or node.get("name") == node_name,
+            fields,
+        )
+    except Exception as e:
+        logging.error(f"Error retrieving node status: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 
-        nodes = data.get("nodes", [])
+@app.get("/topology/blast_radius")
+async def get_blast_radius(
+    kind: str = Query(
+        ...,
+        enum=["node", "pod", "deployment", "service"],
+        description="Kind of the failing entity",
+    ),
+    name: str = Query(..., description="Name of the failing entity"),
+    namespace: Optional[str] = Query(
+        None, description="Kubernetes namespace (ignored for nodes)"
+    ),
+    api_key: str = Depends(_validate_api_key),
+):
+    """
+    Determine what is affected if a node, pod, deployment or service fails.
+
+    This endpoint walks a precomputed topology graph (node -> pods -> deployment
+    -> service) and returns every downstream entity that would be degraded,
+    including how many of each deployment's and service's pods would be lost.
+
+    Args:
+        kind: Kind of the failing entity (node, pod, deployment, service)
+        name: Name of the failing entity
+        namespace: Optional namespace, searched across all when omitted
+        api_key: Required API key for authentication
 
-        if node_name:
-            nodes = [n for n in nodes if n.get("name") == node_name]
+    Returns:
+        Dict: The target entity, impacted pods/deployments/services and counts
 
-        return {"nodes": nodes}
+    Raises:
+        HTTPException: 401 if API key is invalid
+        HTTPException: 404 if the entity does not exist
+        HTTPException: 500 if data retrieval fails
+    """
+    try:
+        topology = await run_blocking(_get_topology)
+        target = topology.find(kind, name, namespace)
+        if target is None:
+            raise HTTPException(status_code=404, detail=f"{kind} '{name}' not found")
+
+        return topology.blast_radius(target)
+    except HTTPException:
+        raise
     except Exception as e:
-        logging.error(f"Error retrieving node status: {str(e)}")
+        logging.error(f"Error computing blast radius: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
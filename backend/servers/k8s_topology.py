@@ -0,0 +1,200 @@
+import logging
+import re
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+ENTITY_KINDS = ("node", "pod", "deployment", "service")
+
+# Kinds that can be degraded by a failure upstream of them
+IMPACTED_KINDS = ("pod", "deployment", "service")
+
+# Generated pod names end in "-<replicaset hash>-<pod suffix>"
+_POD_NAME_PATTERN = re.compile(r"^(?P<workload>.+)-[a-z0-9]{5,10}-[a-z0-9]{5}$")
+
+# Workload name suffixes that are not part of the app label
+_WORKLOAD_SUFFIXES = ("-deployment", "-pod")
+
+EntityKey = Tuple[str, str, str]
+
+
+def workload_name(pod_name: str) -> str:
+    """Strip the ReplicaSet hash and pod suffix from a generated pod name"""
+    match = _POD_NAME_PATTERN.match(pod_name)
+    return match.group("workload") if match else pod_name
+
+
+def _app_label(workload: str) -> str:
+    """Derive the app label a workload's pods are selected by"""
+    for suffix in _WORKLOAD_SUFFIXES:
+        if workload.endswith(suffix):
+            return workload[: -len(suffix)]
+    return workload
+
+
+def _entity_key(kind: str, name: str, namespace: Optional[str] = None) -> EntityKey:
+    # Nodes are cluster scoped
+    return (kind, "" if kind == "node" else namespace or "", name)
+
+
+class TopologyGraph:
+    """Directed impact graph of node -> pods -> deployment -> service.
+
+    The snapshot files carry no owner references or pod labels, so ownership
+    is recovered from naming: a pod belongs to the deployment whose name or
+    app label matches its workload prefix, and a service routes to the pods
+    whose app label matches its ``app`` selector. Edges point from an entity
+    to everything that degrades when it fails.
+    """
+
+    def __init__(self):
+        self.entities: Dict[EntityKey, Dict[str, Any]] = {}
+        self.edges: Dict[EntityKey, Set[EntityKey]] = {}
+        self.reverse_edges: Dict[EntityKey, Set[EntityKey]] = {}
+
+    @classmethod
+    def build(
+        cls,
+        nodes: Iterable[Dict[str, Any]],
+        pods: Iterable[Dict[str, Any]],
+        deployments: Iterable[Dict[str, Any]],
+        services: Iterable[Dict[str, Any]],
+    ) -> "TopologyGraph":
+        graph = cls()
+
+        for node in nodes:
+            graph._add_entity("node", node)
+
+        # (namespace, workload name or app label) -> deployment key
+        deployments_by_name: Dict[Tuple[str, str], EntityKey] = {}
+        for deployment in deployments:
+            key = graph._add_entity("deployment", deployment)
+            name = deployment.get("name", "")
+            deployments_by_name[(key[1], name)] = key
+            deployments_by_name.setdefault((key[1], _app_label(name)), key)
+
+        pods_by_app: Dict[Tuple[str, str], List[EntityKey]] = {}
+        for pod in pods:
+            key = graph._add_entity("pod", pod)
+            namespace = key[1]
+            workload = workload_name(key[2])
+            app = _app_label(workload)
+            pods_by_app.setdefault((namespace, app), []).append(key)
+
+            node_name = pod.get("node")
+            if node_name:
+                node_key = _entity_key("node", node_name)
+                if node_key not in graph.entities:
+                    # Pod scheduled on a node missing from the snapshot
+                    graph.entities[node_key] = {"name": node_name, "status": None}
+                graph._add_edge(node_key, key)
+
+            owner = deployments_by_name.get(
+                (namespace, workload)
+            ) or deployments_by_name.get((namespace, app))
+            if owner:
+                graph._add_edge(key, owner)
+
+        for service in services:
+            key = graph._add_entity("service", service)
+            app = (service.get("selector") or {}).get("app")
+            for pod_key in pods_by_app.get((key[1], app), []):
+                graph._add_edge(pod_key, key)
+                for owner in graph.edges.get(pod_key, ()):
+                    if owner[0] == "deployment":
+                        graph._add_edge(owner, key)
+
+        logger.info(
+            f"Built k8s topology with {len(graph.entities)} entities and "
+            f"{sum(len(targets) for targets in graph.edges.values())} edges"
+        )
+        return graph
+
+    def _add_entity(self, kind: str, raw: Dict[str, Any]) -> EntityKey:
+        key = _entity_key(kind, raw.get("name", ""), raw.get("namespace"))
+        self.entities[key] = raw
+        return key
+
+    def _add_edge(self, source: EntityKey, target: EntityKey) -> None:
+        self.edges.setdefault(source, set()).add(target)
+        self.reverse_edges.setdefault(target, set()).add(source)
+
+    def find(
+        self, kind: str, name: str, namespace: Optional[str] = None
+    ) -> Optional[EntityKey]:
+        """Resolve an entity, searching all namespaces when none is given"""
+        if kind == "node" or namespace:
+            key = _entity_key(kind, name, namespace)
+            return key if key in self.entities else None
+        for key in self.entities:
+            if key[0] == kind and key[2] == name:
+                return key
+        return None
+
+    def _pods_of(self, key: EntityKey) -> List[EntityKey]:
+        return [k for k in self.reverse_edges.get(key, ()) if k[0] == "pod"]
+
+    def _describe(self, key: EntityKey) -> Dict[str, Any]:
+        raw = self.entities[key]
+        entity = {"kind": key[0], "name": key[2], "status": raw.get("status")}
+        if key[1]:
+            entity["namespace"] = key[1]
+        if "replicas" in raw:
+            entity["replicas"] = raw["replicas"]
+        return entity
+
+    def blast_radius(self, target: EntityKey) -> Dict[str, Any]:
+        """Everything that degrades when ``target`` fails.
+
+        Walks the impact edges breadth first; a failed deployment also takes
+        down every pod it owns. Deployments and services are
+        reported with the share of their pods that is lost, and are
+        ``fully_impacted`` when none of their pods survive.
+        """
+        depth = {target: 0}
+        via: Dict[EntityKey, EntityKey] = {}
+        queue = deque([target])
+        if target[0] == "deployment":
+            for pod in sorted(self._pods_of(target)):
+                depth[pod] = 1
+                via[pod] = target
+                queue.append(pod)
+        while queue:
+            current = queue.popleft()
+            for neighbour in sorted(self.edges.get(current, ())):
+                if neighbour not in depth:
+                    depth[neighbour] = depth[current] + 1
+                    via[neighbour] = current
+                    queue.append(neighbour)
+
+        failed_pods = {key for key in depth if key[0] == "pod"}
+        impacted: Dict[str, List[Dict[str, Any]]] = {
+            f"{kind}s": [] for kind in IMPACTED_KINDS
+        }
+        for key in sorted(depth, key=lambda k: (depth[k], k)):
+            if key == target:
+                continue
+            entity = self._describe(key)
+            entity["depth"] = depth[key]
+            entity["via"] = self._describe(via[key])["name"]
+            if key[0] in ("deployment", "service"):
+                pods = self._pods_of(key)
+                lost = sum(1 for pod in pods if pod in failed_pods)
+                entity["pods_total"] = len(pods)
+                entity["pods_lost"] = lost
+                entity["fully_impacted"] = lost == len(pods)
+            impacted[f"{key[0]}s"].append(entity)
+
+        return {
+            "target": self._describe(target),
+            "impacted": impacted,
+            "summary": {kind: len(entities) for kind, entities in impacted.items()},
+        }
+
+    def stats(self) -> Dict[str, int]:
+        counts = {kind: 0 for kind in ENTITY_KINDS}
+        for kind, _, _ in self.entities:
+            counts[kind] += 1
+        counts["edges"] = sum(len(targets) for targets in self.edges.values())
+        return counts
@@ -0,0 +1,1101 @@
+import heapq
+import json
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from store import parse_time_bound, to_epoch
+
+logger = logging.getLogger(__name__)
+
+# Records are partitioned into segments by timestamp; one hour per partition
+DEFAULT_PARTITION_SECONDS = 3600
+
+# Segment files roll over once they reach this size
+DEFAULT_MAX_SEGMENT_BYTES = 64 * 1024 * 1024
+
+# A partition with no writes for this long is sealed and becomes eligible
+# for compaction; maintenance (sealing, retention, compaction) runs this often
+DEFAULT_SEAL_IDLE_SECONDS = 60.0
+DEFAULT_MAINTENANCE_INTERVAL = 30.0
+
+# Sealed segments are only searched on the process pool when a query spans at
+# least this many of them; smaller fan-outs are cheaper in-process
+MIN_PARALLEL_SEGMENTS = 4
+
+# Relative cost of checking one candidate record against a predicate, in units
+# of adding one posting list entry to a candidate set
+_RESIDUAL_COSTS = {"time": 1.0, "level": 1.0, "service": 1.0, "pattern": 4.0}
+
+# Per-segment plans included in an explain response
+MAX_EXPLAIN_SEGMENTS = 20
+
+# Parsed segments cached per search worker process. Segments are pinned to a
+# worker, so each worker only caches its share of the sealed segments
+WORKER_SEGMENT_CACHE_SIZE = 256
+
+# Group-commit settings: fsync once this many bytes are pending or this many
+# seconds have elapsed since the last fsync, whichever comes first
+DEFAULT_FSYNC_BYTES = 1024 * 1024
+DEFAULT_FSYNC_INTERVAL = 0.05
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".ndjson"
+
+_TOKEN_RE = re.compile(r"[a-z0-9_]+")
+_LEVEL_ALIASES = {"WARNING": "WARN", "FATAL": "CRITICAL", "ERR": "ERROR"}
+
+
+def _tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric tokens"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _normalize_record(raw: Any, received_at: float) -> Tuple[Dict[str, Any], float]:
+    """Validate a raw ingest record and return it with its epoch timestamp.
+
+    Records without a parseable timestamp are stamped with the ingest time so
+    that every stored record can be placed on the time index.
+    """
+    if not isinstance(raw, dict):
+        raise ValueError("log record must be a JSON object")
+
+    message = raw.get("message", raw.get("msg"))
+    if not isinstance(message, str) or not message:
+        raise ValueError("log record requires a non-empty 'message' string")
+
+    record = dict(raw)
+    record.pop("msg", None)
+    record["message"] = message
+
+    level = str(raw.get("level", "INFO")).upper()
+    record["level"] = _LEVEL_ALIASES.get(level, level)
+    record["service"] = str(raw.get("service", "unknown"))
+
+    epoch = to_epoch(raw.get("timestamp"))
+    if epoch is None:
+        epoch = received_at
+        record["timestamp"] = (
+            datetime.fromtimestamp(epoch, tz=timezone.utc)
+            .isoformat(timespec="milliseconds")
+            .replace("+00:00", "Z")
+        )
+
+    return record, epoch
+
+
+class _Predicate:
+    """One filter of a segment query as seen by the planner.
+
+    estimate is the number of records the predicate's index would return,
+    ids() materializes them from the index and check() tests a single record.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        estimate: int,
+        ids: Callable[[], Set[int]],
+        check: Callable[[int], bool],
+    ):
+        self.name = name
+        self.estimate = estimate
+        self.ids = ids
+        self.check = check
+
+
+class LogSegment:
+    """One WAL segment together with the indexes built over its records.
+
+    A segment holds records of a single time partition. It is appended to
+    while active and never modified once sealed; compaction replaces sealed
+    segments with a new one instead of rewriting them. Indexes are maintained
+    incrementally as records are appended:
+
+    - offset index: byte offset of every record inside the segment file
+    - time index: record ids ordered by timestamp
+    - token index: posting list of record ids per message/service token
+    - level and service indexes: posting list of record ids per value, whose
+      lengths double as the counter index
+    """
+
+    def __init__(self, partition: int, sequence: int = 0, path: Optional[Path] = None):
+        self.partition = partition
+        self.sequence = sequence
+        self.path = path
+        self.size_bytes = 0
+        self.sealed = False
+
+        self.records: List[Dict[str, Any]] = []
+        self.epochs: List[float] = []
+        self.offsets: List[int] = []
+        self.time_keys: List[float] = []
+        self.time_ids: List[int] = []
+        self.tokens: Dict[str, List[int]] = defaultdict(list)
+        self.level_ids: Dict[str, List[int]] = defaultdict(list)
+        self.service_ids: Dict[str, List[int]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def name(self) -> str:
+        return self.path.name if self.path else "static"
+
+    @property
+    def min_time(self) -> Optional[float]:
+        return self.time_keys[0] if self.time_keys else None
+
+    @property
+    def max_time(self) -> Optional[float]:
+        return self.time_keys[-1] if self.time_keys else None
+
+    @property
+    def level_counts(self) -> Counter:
+        return Counter({level: len(ids) for level, ids in self.level_ids.items()})
+
+    @property
+    def service_counts(self) -> Counter:
+        return Counter({service: len(ids) for service, ids in self.service_ids.items()})
+
+    def add(self, record: Dict[str, Any], epoch: float, offset: int) -> None:
+        """Append a record and update every index"""
+        record_id = len(self.records)
+        self.records.append(record)
+        self.epochs.append(epoch)
+        self.offsets.append(offset)
+
+        # Shippers mostly send in-order batches, so appending is the fast path
+        if not self.time_keys or epoch >= self.time_keys[-1]:
+            self.time_keys.append(epoch)
+            self.time_ids.append(record_id)
+        else:
+            position = bisect_right(self.time_keys, epoch)
+            self.time_keys.insert(position, epoch)
+            self.time_ids.insert(position, record_id)
+
+        for token in set(_tokenize(record["message"]) + _tokenize(record["service"])):
+            self.tokens[token].append(record_id)
+
+        self.level_ids[record["level"]].append(record_id)
+        self.service_ids[record["service"]].append(record_id)
+
+    def _pattern_postings(self, pattern: str) -> Optional[List[List[List[int]]]]:
+        """Posting lists that may contain pattern, one group per pattern token.
+
+        A record can only match if it appears in at least one posting list of
+        every group. The first and last pattern tokens may be partial words in
+        the matching message, so they are expanded against the vocabulary by
+        suffix and prefix respectively; inner tokens must match exactly.
+        Returns None when the pattern has no tokens and cannot use the index.
+        """
+        pattern_tokens = _tokenize(pattern)
+        if not pattern_tokens:
+            return None
+
+        if len(pattern_tokens) == 1:
+            needle = pattern_tokens[0]
+            return [[ids for token, ids in self.tokens.items() if needle in token]]
+
+        first, *inner, last = pattern_tokens
+        groups = [[ids for token, ids in self.tokens.items() if token.endswith(first)]]
+        groups.extend([self.tokens.get(token, [])] for token in inner)
+        groups.append(
+            [ids for token, ids in self.tokens.items() if token.startswith(last)]
+        )
+        return groups
+
+    def _predicates(
+        self,
+        pattern: Optional[str],
+        levels: Optional[Set[str]],
+        service: Optional[str],
+        start: Optional[float],
+        end: Optional[float],
+    ) -> Tuple[List[_Predicate], Optional[_Predicate]]:
+        """Build index-backed predicates and the pattern verification step"""
+        predicates = []
+        epochs = self.epochs
+        records = self.records
+
+        if start is not None or end is not None:
+            lo = bisect_left(self.time_keys, start) if start is not None else 0
+            hi = (
+                bisect_right(self.time_keys, end)
+                if end is not None
+                else len(self.time_keys)
+            )
+            predicates.append(
+                _Predicate(
+                    "time",
+                    max(hi - lo, 0),
+                    lambda: set(self.time_ids[lo:hi]),
+                    lambda i: (
+                        (start is None or epochs[i] >= start)
+                        and (end is None or epochs[i] <= end)
+                    ),
+                )
+            )
+
+        if levels:
+            level_postings = [self.level_ids.get(level, []) for level in levels]
+            predicates.append(
+                _Predicate(
+                    "level",
+                    sum(len(ids) for ids in level_postings),
+                    lambda: set().union(*level_postings),
+                    lambda i: records[i]["level"] in levels,
+                )
+            )
+
+        if service:
+            service_postings = self.service_ids.get(service, [])
+            predicates.append(
+                _Predicate(
+                    "service",
+                    len(service_postings),
+                    lambda: set(service_postings),
+                    lambda i: records[i]["service"] == service,
+                )
+            )
+
+        verify = None
+        if pattern:
+            needle = pattern.lower()
+
+            def _contains(i: int) -> bool:
+                record = records[i]
+                return (
+                    needle in record["message"].lower()
+                    or needle in record["service"].lower()
+                )
+
+            verify = _Predicate("pattern", len(records), lambda: set(), _contains)
+            groups = self._pattern_postings(pattern)
+            if groups is not None:
+
+                def _pattern_ids() -> Set[int]:
+                    ids: Optional[Set[int]] = None
+                    for group in sorted(groups, key=lambda g: sum(map(len, g))):
+                        union = set().union(*group)
+                        ids = union if ids is None else ids & union
+                        if not ids:
+                            break
+                    return ids or set()
+
+                # The intersection is at most as large as the smallest group
+                predicates.append(
+                    _Predicate(
+                        "pattern",
+                        min(sum(len(ids) for ids in group) for group in groups),
+                        _pattern_ids,
+                        _contains,
+                    )
+                )
+
+        return predicates, verify
+
+    def search(
+        self,
+        pattern: Optional[str] = None,
+        levels: Optional[Set[str]] = None,
+        service: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> Tuple[List[Tuple[float, Dict[str, Any]]], Dict[str, Any]]:
+        """Return (epoch, record) pairs matching all filters and the plan used.
+
+        The planner estimates each predicate's cardinality from the indexes
+        (time range width, level/service posting list lengths, the smallest
+        pattern token group) and drives the query from the most selective
+        one. Each remaining predicate is then either intersected from its
+        index or checked per candidate record, whichever the cost model says
+        touches fewer entries. Pattern matches from the token index are a
+        superset, so the substring check always runs last.
+        """
+        total = len(self.records)
+        predicates, verify = self._predicates(pattern, levels, service, start, end)
+        predicates.sort(key=lambda p: p.estimate)
+        plan: Dict[str, Any] = {"segment": self.name, "records": total, "steps": []}
+        steps = plan["steps"]
+
+        if not predicates:
+            candidates = None
+            remaining = float(total)
+            steps.append({"predicate": "all", "method": "scan", "estimate": total})
+        else:
+            driver = predicates[0]
+            steps.append(
+                {
+                    "predicate": driver.name,
+                    "method": "index",
+                    "estimate": driver.estimate,
+                }
+            )
+            candidates = driver.ids() if driver.estimate else set()
+            remaining = float(len(candidates))
+
+        residual = []
+        for predicate in predicates[1:]:
+            if candidates is not None and not candidates:
+                break
+            intersect_cost = predicate.estimate
+            filter_cost = remaining * _RESIDUAL_COSTS[predicate.name]
+            if intersect_cost < filter_cost:
+                candidates &= predicate.ids()
+                remaining = float(len(candidates))
+                method = "intersect"
+            else:
+                residual.append(predicate)
+                remaining *= predicate.estimate / total if total else 0
+                method = "filter"
+            steps.append(
+                {
+                    "predicate": predicate.name,
+                    "method": method,
+                    "estimate": predicate.estimate,
+                }
+            )
+
+        if verify is not None and not any(p.name == "pattern" for p in residual):
+            residual.append(verify)
+            steps.append({"predicate": "pattern", "method": "verify"})
+
+        if candidates is None:
+            ordered: Iterable[int] = self.time_ids
+        else:
+            ordered = sorted(candidates, key=lambda i: (self.epochs[i], i))
+
+        results = []
+        examined = 0
+        for record_id in ordered:
+            examined += 1
+            if all(predicate.check(record_id) for predicate in residual):
+                results.append((self.epochs[record_id], self.records[record_id]))
+
+        plan["examined"] = examined
+        plan["matched"] = len(results)
+        return results, plan
+
+
+def _segment_name(
+    partition: int, sequence: int, covers: Optional[Tuple[int, int]] = None
+) -> str:
+    """File name of a segment; a compacted one also names the sequences it replaces"""
+    stem = f"{partition:010d}-{sequence:06d}"
+    if covers is not None:
+        stem += f"-{covers[0]:06d}-{covers[1]:06d}"
+    return f"{SEGMENT_PREFIX}{stem}{SEGMENT_SUFFIX}"
+
+
+def _parse_segment_name(
+    name: str,
+) -> Optional[Tuple[int, int, Optional[Tuple[int, int]]]]:
+    """Return (partition, sequence, covers) for a segment file name.
+
+    covers is the (first, last) range of sequences a compacted segment
+    replaced, None for segments written by ingest.
+    """
+    stem = name[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)]
+    fields = stem.split("-")
+    if len(fields) not in (2, 4) or not all(field.isdigit() for field in fields):
+        return None
+    partition, sequence, *covers = (int(field) for field in fields)
+    return partition, sequence, tuple(covers) if covers else None
+
+
+def _segment_files(wal_dir: Path) -> Tuple[List[Path], List[Path]]:
+    """Live and superseded segment files of a WAL directory, in name order.
+
+    Compaction publishes the merged segment before it deletes the segments
+    it replaces, so a crash in between leaves both on disk. A segment is
+    superseded when a newer compacted segment of its partition covers its
+    sequence; reading it as well would return its records twice.
+    """
+    parsed = []
+    for path in sorted(wal_dir.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}")):
+        fields = _parse_segment_name(path.name)
+        if fields is None:
+            logger.warning(f"Ignoring unrecognized WAL file {path.name}")
+            continue
+        parsed.append((path, fields))
+
+    covered = [
+        (partition, sequence, covers)
+        for _, (partition, sequence, covers) in parsed
+        if covers is not None
+    ]
+    live: List[Path] = []
+    superseded: List[Path] = []
+    for path, (partition, sequence, _) in parsed:
+        if any(
+            partition == p and s > sequence and first <= sequence <= last
+            for p, s, (first, last) in covered
+        ):
+            superseded.append(path)
+        else:
+            live.append(path)
+    return live, superseded
+
+
+def _load_segment_file(path: Path) -> Tuple[LogSegment, int]:
+    """Parse a segment file and index its records.
+
+    Returns the segment and the byte length of its valid prefix; a torn
+    final record left by a crash is not part of that prefix.
+    """
+    partition, sequence, _ = _parse_segment_name(path.name) or (0, 0, None)
+    segment = LogSegment(partition, sequence, path)
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                logger.warning(f"Truncating partial record at {path.name}:{offset}")
+                break
+            try:
+                record, epoch = _normalize_record(json.loads(line), time.time())
+            except ValueError as e:
+                logger.warning(f"Skipping bad WAL record {path.name}:{offset}: {e}")
+            else:
+                segment.add(record, epoch, offset)
+            offset += len(line)
+    segment.size_bytes = offset
+    segment.sealed = True
+    return segment, offset
+
+
+def scan_wal(
+    wal_dir: Path,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    partition_seconds: int = DEFAULT_PARTITION_SECONDS,
+) -> Iterator[Tuple[float, Dict[str, Any]]]:
+    """Read (epoch, record) pairs from a WAL directory owned by another LogStore.
+
+    For processes that need a read-only view of ingested logs, such as the
+    metrics server correlating signals. Only segments whose partition
+    overlaps [start, end] are read, and a record still being written at the
+    end of an active segment is skipped.
+    """
+    wal_dir = Path(wal_dir)
+    if not wal_dir.is_dir():
+        return
+    for path in _segment_files(wal_dir)[0]:
+        partition_start = _parse_segment_name(path.name)[0]
+        if start is not None and partition_start + partition_seconds <= start:
+            continue
+        if end is not None and partition_start > end:
+            continue
+        try:
+            with open(path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        record, epoch = _normalize_record(json.loads(line), 0)
+                    except ValueError:
+                        continue
+                    if (start is None or epoch >= start) and (
+                        end is None or epoch <= end
+                    ):
+                        yield epoch, record
+        except FileNotFoundError:
+            # Compacted or dropped since the directory was listed
+            continue
+
+
+_WORKER_SEGMENTS: "OrderedDict[str, LogSegment]" = OrderedDict()
+
+# Matches of one segment in time order, plus the plan that produced them
+SegmentResult = Tuple[List[Tuple[float, Dict[str, Any]]], Dict[str, Any]]
+
+
+def _search_segment_files(
+    paths: List[str], query: Tuple[Any, ...]
+) -> List[Optional[SegmentResult]]:
+    """Search sealed segment files inside a search worker process.
+
+    Sealed segment files are immutable and compaction always writes a new
+    file name, so the path is a safe cache key for the parsed segment. A
+    None entry means the file was compacted away after the query was planned.
+    """
+    results: List[Optional[SegmentResult]] = []
+    for path in paths:
+        segment = _WORKER_SEGMENTS.get(path)
+        if segment is None:
+            try:
+                segment, _ = _load_segment_file(Path(path))
+            except FileNotFoundError:
+                results.append(None)
+                continue
+            _WORKER_SEGMENTS[path] = segment
+            if len(_WORKER_SEGMENTS) > WORKER_SEGMENT_CACHE_SIZE:
+                _WORKER_SEGMENTS.popitem(last=False)
+        else:
+            _WORKER_SEGMENTS.move_to_end(path)
+        results.append(segment.search(*query))
+    return results
+
+
+class LogStore:
+    """Append-only log store backed by a time-partitioned NDJSON write-ahead log.
+
+    Records are routed to per-partition segments (DEFAULT_PARTITION_SECONDS
+    wide) and each segment carries its own indexes. Batches are written with a
+    single write call per partition and fsynced in groups (see
+    DEFAULT_FSYNC_BYTES / DEFAULT_FSYNC_INTERVAL). A background thread bounds
+    how long acknowledged data can stay unsynced and periodically runs
+    maintenance: idle partitions are sealed, partitions older than the
+    retention period are dropped and the sealed segments of a partition are
+    compacted into one. Searches spanning many sealed segments fan out over a
+    process pool. On startup the WAL is replayed to rebuild the indexes.
+    """
+
+    def __init__(
+        self,
+        wal_dir: Path,
+        partition_seconds: int = DEFAULT_PARTITION_SECONDS,
+        max_segment_bytes: int = DEFAULT_MAX_SEGMENT_BYTES,
+        fsync_bytes: int = DEFAULT_FSYNC_BYTES,
+        fsync_interval: float = DEFAULT_FSYNC_INTERVAL,
+        retention_seconds: Optional[float] = None,
+        seal_idle_seconds: float = DEFAULT_SEAL_IDLE_SECONDS,
+        maintenance_interval: float = DEFAULT_MAINTENANCE_INTERVAL,
+        search_workers: Optional[int] = None,
+    ):
+        """
+        Args:
+            wal_dir: Directory holding the segment files
+            partition_seconds: Width of a time partition (3600 hourly, 86400 daily)
+            max_segment_bytes: Size at which an active segment is sealed
+            fsync_bytes: Pending bytes that trigger a group fsync
+            fsync_interval: Maximum seconds between group fsyncs
+            retention_seconds: Drop partitions older than this; None keeps all
+            seal_idle_seconds: Seal partitions with no writes for this long
+            maintenance_interval: Seconds between background maintenance runs
+            search_workers: Search process pool size; defaults to the CPU
+                count and 0 disables the pool
+        """
+        self.wal_dir = Path(wal_dir)
+        self.partition_seconds = partition_seconds
+        self.max_segment_bytes = max_segment_bytes
+        self.fsync_bytes = fsync_bytes
+        self.fsync_interval = fsync_interval
+        self.retention_seconds = retention_seconds
+        self.seal_idle_seconds = seal_idle_seconds
+        self.maintenance_interval = maintenance_interval
+        self.search_workers = (
+            os.cpu_count() or 1 if search_workers is None else search_workers
+        )
+
+        self._lock = threading.RLock()
+        # Held for a whole maintenance run, so close() waits for compaction
+        self._maintenance_lock = threading.Lock()
+        self._static: Optional[LogSegment] = None
+        self._segments: List[LogSegment] = []
+        self._active: Dict[int, LogSegment] = {}
+        self._writers: Dict[int, BinaryIO] = {}
+        self._last_write: Dict[int, float] = {}
+        self._next_sequence: Dict[int, int] = defaultdict(int)
+        self._pending_bytes = 0
+        self._last_fsync = time.monotonic()
+        self._workers: List[ProcessPoolExecutor] = []
+        self._closed = threading.Event()
+
+        self.wal_dir.mkdir(parents=True, exist_ok=True)
+        self._replay()
+
+        self._background = threading.Thread(
+            target=self._background_loop, name="log-store-background", daemon=True
+        )
+        self._background.start()
+
+    # ------------------------------------------------------------------ WAL
+
+    def _replay(self) -> None:
+        """Rebuild segments and indexes from the WAL files on disk"""
+        started = time.perf_counter()
+        live, superseded = _segment_files(self.wal_dir)
+        # Leftovers of a compaction interrupted by a crash
+        for path in superseded:
+            logger.warning(f"Removing WAL segment replaced by compaction: {path.name}")
+            path.unlink(missing_ok=True)
+        for path in self.wal_dir.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}.tmp"):
+            path.unlink(missing_ok=True)
+
+        for path in live:
+            segment, valid_bytes = _load_segment_file(path)
+            if valid_bytes != path.stat().st_size:
+                os.truncate(path, valid_bytes)
+            self._segments.append(segment)
+            self._next_sequence[segment.partition] = max(
+                self._next_sequence[segment.partition], segment.sequence + 1
+            )
+
+        if self._segments:
+            logger.info(
+                f"Replayed {sum(len(s) for s in self._segments)} log records from "
+                f"{len(self._segments)} WAL segments in "
+                f"{(time.perf_counter() - started) * 1000:.1f}ms"
+            )
+
+    def _new_segment(
+        self, partition: int, covers: Optional[Tuple[int, int]] = None
+    ) -> LogSegment:
+        sequence = self._next_sequence[partition]
+        self._next_sequence[partition] = sequence + 1
+        return LogSegment(
+            partition,
+            sequence,
+            self.wal_dir / _segment_name(partition, sequence, covers),
+        )
+
+    def _active_segment(self, partition: int) -> LogSegment:
+        segment = self._active.get(partition)
+        if segment is None:
+            segment = self._active[partition] = self._new_segment(partition)
+            self._segments.append(segment)
+            self._writers[partition] = open(segment.path, "ab")
+        return segment
+
+    def _seal(self, partition: int) -> None:
+        segment = self._active.pop(partition, None)
+        writer = self._writers.pop(partition, None)
+        self._last_write.pop(partition, None)
+        if writer is not None:
+            writer.flush()
+            os.fsync(writer.fileno())
+            writer.close()
+        if segment is not None:
+            segment.sealed = True
+
+    def _sync(self) -> None:
+        if self._pending_bytes:
+            for writer in self._writers.values():
+                writer.flush()
+                os.fsync(writer.fileno())
+            self._pending_bytes = 0
+        self._last_fsync = time.monotonic()
+
+    def _background_loop(self) -> None:
+        next_maintenance = time.monotonic() + self.maintenance_interval
+        while not self._closed.wait(self.fsync_interval):
+            with self._lock:
+                if self._pending_bytes and not self._closed.is_set():
+                    self._sync()
+            if time.monotonic() >= next_maintenance:
+                try:
+                    self.run_maintenance()
+                except Exception as e:
+                    logger.error(f"Log store maintenance failed: {e}")
+                next_maintenance = time.monotonic() + self.maintenance_interval
+
+    # ---------------------------------------------------------- maintenance
+
+    def run_maintenance(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Seal idle partitions, enforce retention and compact sealed segments.
+
+        Args:
+            now: Wall-clock time used for retention, defaults to time.time()
+
+        Returns:
+            Counts of sealed, dropped and compacted segments
+        """
+        summary = {"sealed": 0, "dropped": 0, "compacted": 0}
+        with self._maintenance_lock:
+            if not self._closed.is_set():
+                self._maintain(summary, now)
+
+        if any(summary.values()):
+            logger.info(f"Log store maintenance: {summary}")
+        return summary
+
+    def _maintain(self, summary: Dict[str, int], now: Optional[float]) -> None:
+        idle_before = time.monotonic() - self.seal_idle_seconds
+
+        with self._lock:
+            for partition, last_write in list(self._last_write.items()):
+                if last_write <= idle_before:
+                    self._seal(partition)
+                    summary["sealed"] += 1
+
+            if self.retention_seconds is not None:
+                cutoff = (now or time.time()) - self.retention_seconds
+                expired = [
+                    s
+                    for s in self._segments
+                    if s.partition + self.partition_seconds <= cutoff
+                ]
+                for partition in {s.partition for s in expired}:
+                    self._seal(partition)
+                for segment in expired:
+                    self._segments.remove(segment)
+                    segment.path.unlink(missing_ok=True)
+                summary["dropped"] = len(expired)
+
+            by_partition: Dict[int, List[LogSegment]] = defaultdict(list)
+            for segment in self._segments:
+                if segment.sealed:
+                    by_partition[segment.partition].append(segment)
+            compactable = {}
+            targets = {}
+            for partition, sources in by_partition.items():
+                first = min(s.sequence for s in sources)
+                last = max(s.sequence for s in sources)
+                active = self._active.get(partition)
+                # The target's name marks every sequence in the range as
+                # replaced, so the range must not include the active segment
+                if len(sources) < 2 or (
+                    active is not None and first <= active.sequence <= last
+                ):
+                    continue
+                compactable[partition] = sources
+                targets[partition] = self._new_segment(partition, (first, last))
+
+        # Sealed segments are immutable, so merging runs without the lock
+        for partition, sources in compactable.items():
+            compacted = self._compact(sources, targets[partition])
+            with self._lock:
+                position = min(self._segments.index(s) for s in sources)
+                for source in sources:
+                    self._segments.remove(source)
+                self._segments.insert(position, compacted)
+            for source in sources:
+                source.path.unlink(missing_ok=True)
+            summary["compacted"] += len(sources)
+
+    def _compact(self, sources: List[LogSegment], target: LogSegment) -> LogSegment:
+        """Merge sealed segments into one time-ordered segment file"""
+        ordered = heapq.merge(
+            *(zip(s.time_keys, (s.records[i] for i in s.time_ids)) for s in sources),
+            key=lambda item: item[0],
+        )
+        temp_path = target.path.with_name(target.path.name + ".tmp")
+        with open(temp_path, "wb") as f:
+            for epoch, record in ordered:
+                line = json.dumps(record, separators=(",", ":")).encode() + b"\n"
+                target.add(record, epoch, target.size_bytes)
+                target.size_bytes += len(line)
+                f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, target.path)
+        target.sealed = True
+        return target
+
+    # --------------------------------------------------------------- ingest
+
+    def append_batch(
+        self, records: Iterable[Any], durable: bool = False
+    ) -> Dict[str, Any]:
+        """Append a batch of raw record dicts to the WAL and indexes.
+
+        Args:
+            records: Raw record dicts
+            durable: fsync before returning instead of relying on group commit
+
+        Returns:
+            Dict with accepted/rejected counts and the first few record errors
+        """
+        received_at = time.time()
+        normalized = []
+        errors = []
+        for line_no, raw in enumerate(records, start=1):
+            try:
+                normalized.append(_normalize_record(raw, received_at))
+            except ValueError as e:
+                errors.append({"line": line_no, "error": str(e)})
+        return self._append(normalized, errors, durable)
+
+    def ingest_ndjson(self, payload: bytes, durable: bool = False) -> Dict[str, Any]:
+        """Parse an NDJSON payload and append it as one batch"""
+        received_at = time.time()
+        normalized = []
+        errors = []
+        for line_no, line in enumerate(payload.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                normalized.append(_normalize_record(json.loads(line), received_at))
+            except ValueError as e:
+                errors.append({"line": line_no, "error": str(e)})
+        return self._append(normalized, errors, durable)
+
+    def _append(
+        self,
+        normalized: List[Tuple[Dict[str, Any], float]],
+        errors: List[Dict[str, Any]],
+        durable: bool,
+    ) -> Dict[str, Any]:
+        by_partition: Dict[int, List[Tuple[Dict[str, Any], float]]] = defaultdict(list)
+        for record, epoch in normalized:
+            by_partition[int(epoch - epoch % self.partition_seconds)].append(
+                (record, epoch)
+            )
+
+        with self._lock:
+            now = time.monotonic()
+            for partition, entries in by_partition.items():
+                segment = self._active_segment(partition)
+                chunk = []
+                for record, epoch in entries:
+                    line = json.dumps(record, separators=(",", ":")).encode() + b"\n"
+                    if (
+                        segment.size_bytes
+                        and segment.size_bytes + len(line) > self.max_segment_bytes
+                    ):
+                        self._writers[partition].write(b"".join(chunk))
+                        chunk = []
+                        self._seal(partition)
+                        segment = self._active_segment(partition)
+                    segment.add(record, epoch, segment.size_bytes)
+                    segment.size_bytes += len(line)
+                    self._pending_bytes += len(line)
+                    chunk.append(line)
+                if chunk:
+                    self._writers[partition].write(b"".join(chunk))
+                self._last_write[partition] = now
+
+            if (
+                durable
+                or self._pending_bytes >= self.fsync_bytes
+                or now - self._last_fsync >= self.fsync_interval
+            ):
+                self._sync()
+
+        return {
+            "accepted": len(normalized),
+            "rejected": len(errors),
+            "errors": errors[:10],
+        }
+
+    def load_static(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Index records from read-only files that are not part of the WAL"""
+        received_at = time.time()
+        with self._lock:
+            if self._static is None:
+                self._static = LogSegment(-1)
+            count = 0
+            for raw in records:
+                try:
+                    record, epoch = _normalize_record(raw, received_at)
+                except ValueError:
+                    continue
+                self._static.add(record, epoch, -1)
+                count += 1
+        return count
+
+    def flush(self) -> None:
+        """Force pending WAL writes to disk"""
+        with self._lock:
+            self._sync()
+
+    def close(self) -> None:
+        """Flush pending writes, seal active segments and stop background work"""
+        self._closed.set()
+        with self._maintenance_lock, self._lock:
+            for partition in list(self._active):
+                self._seal(partition)
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.shutdown(wait=False, cancel_futures=True)
+
+    # ---------------------------------------------------------------- query
+
+    def _all_segments(self) -> List[LogSegment]:
+        segments = list(self._segments)
+        if self._static is not None:
+            segments.insert(0, self._static)
+        return segments
+
+    def _search_worker_pool(self) -> List[ProcessPoolExecutor]:
+        """One single-process executor per search worker.
+
+        Each sealed segment is always routed to the same worker so the
+        worker-side parsed segment cache stays warm across queries.
+        """
+        if not self._workers:
+            # spawn avoids forking while the ingest and background threads
+            # hold locks
+            context = multiprocessing.get_context("spawn")
+            self._workers = [
+                ProcessPoolExecutor(max_workers=1, mp_context=context)
+                for _ in range(self.search_workers)
+            ]
+        return self._workers
+
+    def _worker_index(self, segment: LogSegment) -> int:
+        return (
+            segment.partition // self.partition_seconds + segment.sequence
+        ) % self.search_workers
+
+    def search(
+        self,
+        pattern: Optional[str] = None,
+        levels: Optional[Iterable[str]] = None,
+        service: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        limit: Optional[int] = 100,
+    ) -> List[Dict[str, Any]]:
+        """Search records across all segments, oldest first"""
+        records, _ = self.search_with_plan(
+            pattern, levels, service, start_time, end_time, limit
+        )
+        return records
+
+    def search_with_plan(
+        self,
+        pattern: Optional[str] = None,
+        levels: Optional[Iterable[str]] = None,
+        service: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        limit: Optional[int] = 100,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Search records and describe how the query was executed.
+
+        Segments are pruned by their time bounds first. When enough sealed
+        segments remain they are searched in parallel on the process pool
+        while active segments are searched in-process; each segment plans
+        its own filter order (see LogSegment.search). The time-ordered
+        per-segment results are merged oldest first.
+
+        Returns:
+            Matching records and a plan summary with the per-segment plans
+
+        Raises:
+            InvalidTimeRangeError: start_time or end_time is not a timestamp
+        """
+        start = parse_time_bound(start_time)
+        end = parse_time_bound(end_time)
+        level_set = (
+            {_LEVEL_ALIASES.get(lvl.upper(), lvl.upper()) for lvl in levels}
+            if levels
+            else None
+        )
+        query = (pattern, level_set, service, start, end)
+
+        with self._lock:
+            all_segments = [s for s in self._all_segments() if len(s)]
+            segments = [
+                s
+                for s in all_segments
+                if (start is None or s.max_time >= start)
+                and (end is None or s.min_time <= end)
+            ]
+            sealed = [s for s in segments if s.sealed and s.path is not None]
+            parallel = self.search_workers > 0 and len(sealed) >= MIN_PARALLEL_SEGMENTS
+            workers = self._search_worker_pool() if parallel else []
+            local = [s for s in segments if not (parallel and s.sealed and s.path)]
+            # Active segments change under ingest, so search them while locked
+            results = [s.search(*query) for s in local if not s.sealed]
+
+        futures: List[Tuple[List[LogSegment], Future]] = []
+        if parallel:
+            assigned: Dict[int, List[LogSegment]] = defaultdict(list)
+            for segment in sealed:
+                assigned[self._worker_index(segment)].append(segment)
+            futures = [
+                (
+                    group,
+                    workers[index].submit(
+                        _search_segment_files, [str(s.path) for s in group], query
+                    ),
+                )
+                for index, group in assigned.items()
+            ]
+        results.extend(s.search(*query) for s in local if s.sealed)
+        for group, future in futures:
+            for segment, result in zip(group, future.result()):
+                # None: compacted away after planning, the in-memory copy is intact
+                results.append(result if result is not None else segment.search(*query))
+
+        merged = heapq.merge(*(matches for matches, _ in results), key=lambda m: m[0])
+        records = [record for _, record in islice(merged, limit)]
+
+        segment_plans = [segment_plan for _, segment_plan in results]
+        plan = {
+            "segments_total": len(all_segments),
+            "segments_pruned": len(all_segments) - len(segments),
+            "segments_searched": len(segments),
+            "parallel": parallel,
+            "records_total": sum(len(s) for s in all_segments),
+            "records_examined": sum(p["examined"] for p in segment_plans),
+            "records_matched": sum(p["matched"] for p in segment_plans),
+            "segment_plans": segment_plans[:MAX_EXPLAIN_SEGMENTS],
+        }
+        return records, plan
+
+    def recent(
+        self, limit: int = 100, service: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Return the latest records, most recent first"""
+        matches: List[Tuple[float, Dict[str, Any]]] = []
+        with self._lock:
+            segments = sorted(
+                (s for s in self._all_segments() if len(s)),
+                key=lambda s: s.max_time,
+                reverse=True,
+            )
+            for segment in segments:
+                if len(matches) >= limit and segment.max_time < matches[-1][0]:
+                    break
+                taken = 0
+                for position in range(len(segment.time_keys) - 1, -1, -1):
+                    record = segment.records[segment.time_ids[position]]
+                    if service and service not in record["service"]:
+                        continue
+                    matches.append((segment.time_keys[position], record))
+                    taken += 1
+                    if taken >= limit:
+                        break
+                matches.sort(key=lambda match: match[0], reverse=True)
+                del matches[limit:]
+
+        return [record for _, record in matches]
+
+    def counts(self) -> Dict[str, Counter]:
+        """Aggregate counter indexes across segments"""
+        levels: Counter = Counter()
+        services: Counter = Counter()
+        with self._lock:
+            for segment in self._all_segments():
+                levels.update(segment.level_counts)
+                services.update(segment.service_counts)
+        return {"level": levels, "service": services}
+
+    def stats(self) -> Dict[str, Any]:
+        """Summary of segment and index sizes"""
+        with self._lock:
+            segments = self._all_segments()
+            return {
+                "partitions": len({s.partition for s in self._segments}),
+                "segments": len(self._segments),
+                "sealed_segments": sum(1 for s in self._segments if s.sealed),
+                "records": sum(len(s) for s in segments),
+                "wal_bytes": sum(s.size_bytes for s in self._segments),
+                "tokens": sum(len(s.tokens) for s in segments),
+                "unsynced_bytes": self._pending_bytes,
+            }
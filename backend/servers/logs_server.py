@@ -1,18 +1,27 @@
-import json
 import logging
-from datetime import datetime, timezone
+import os
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
 from fastapi import (
     Depends,
     FastAPI,
-    Header,
-    HTTPException,
     Query,
+    Request,
 )
 from fastapi.responses import JSONResponse
-from retrieve_api_key import retrieve_api_key
+from log_store import LogStore
+from loop_monitor import run_blocking
+from response_shaping import InvalidCursorError, fit_to_budget
+from store import (
+    Dataset,
+    InvalidTimeRangeError,
+    api_key_validator,
+    install_backend,
+    load_api_key,
+    parse_fields,
+    project,
+)
 
 # Configure logging with basicConfig
 logging.basicConfig(
@@ -24,124 +33,185 @@ logging.basicConfig(
 app = FastAPI(title="Application Logs API", version="1.0.0")
 
 DATA_PATH = Path(__file__).parent.parent / "data" / "logs_data"
+WAL_PATH = DATA_PATH / "wal"
+
+# Log store partitioning and retention (LOG_RETENTION_DAYS=0 keeps everything)
+LOG_PARTITION_SECONDS = 3600
+LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", "0"))
+
+# Append-only text logs indexed at startup and tailed as they grow
+STATIC_LOG_FILES = ("application.log", "error.log")
 
-# API Key for authentication
-CREDENTIAL_PROVIDER_NAME = "sre-agent-api-key-credential-provider"
+# Reject ingest payloads larger than this (bytes)
+MAX_INGEST_BYTES = 16 * 1024 * 1024
+
+# Most error records read for /logs/errors before fitting them to a budget;
+# without a budget or cursor every matching record is returned
+MAX_ERROR_LOGS = 1000
 
 # Retrieve API key from credential provider at startup
-try:
-    EXPECTED_API_KEY = retrieve_api_key(CREDENTIAL_PROVIDER_NAME)
-    if not EXPECTED_API_KEY:
-        logging.error("Failed to retrieve API key from credential provider")
-        raise RuntimeError(
-            "Cannot start server without valid API key from credential provider"
-        )
-except Exception as e:
-    logging.error(f"Error retrieving API key: {e}")
-    raise RuntimeError(f"Cannot start server: {e}") from e
+EXPECTED_API_KEY = load_api_key()
+_validate_api_key = api_key_validator(EXPECTED_API_KEY)
+
+SERVER_METRICS, DATA_WATCHER, JSON_FILES = install_backend(
+    app, [DATA_PATH], dependencies=[Depends(_validate_api_key)]
+)
+
+LOG_PATTERNS = Dataset(
+    JSON_FILES, DATA_PATH / "log_patterns.json", "patterns", required=False
+)
+LOG_COUNTS = Dataset(JSON_FILES, DATA_PATH / "log_counts.json", required=False)
+
+
+def _parse_log_line(line: str) -> dict:
+    """Parse a "<timestamp> [LEVEL] <service> <message>" text log line"""
+    # Parse log line to extract timestamp, level, and message
+    parts = line.strip().split(" ", 3)
+    if len(parts) >= 4:
+        timestamp = parts[0]
+        level_part = parts[1]
+        service = parts[2]
+        message = parts[3] if len(parts) > 3 else ""
+
+        # Extract log level from [LEVEL] format
+        level = "INFO"
+        if "[" in level_part and "]" in level_part:
+            level = level_part.strip("[]")
+
+        return {
+            "timestamp": timestamp,
+            "level": level,
+            "service": service,
+            "message": message,
+        }
+    return {"message": line.strip()}
+
+
+# Bytes of each static log file already indexed
+_static_offsets: Dict[str, int] = {}
+
+
+def _index_log_tail(store: LogStore, file_path: Path) -> int:
+    """Index the complete lines appended to a static log file since the last call.
 
+    A file that shrank was rotated or truncated and is indexed from the start;
+    a trailing line without a newline is left for the next call.
+    """
+    offset = _static_offsets.get(file_path.name, 0)
+    if file_path.stat().st_size < offset:
+        logging.info(f"{file_path.name} was truncated, indexing it from the start")
+        offset = 0
 
-def _validate_api_key(x_api_key: str = Header(None, alias="X-API-Key")):
-    """Validate API key from header"""
-    if not x_api_key or x_api_key != EXPECTED_API_KEY:
-        raise HTTPException(status_code=401, detail="Invalid or missing API key")
-    return x_api_key
+    with open(file_path, "rb") as f:
+        f.seek(offset)
+        tail = f.read()
+    complete = tail[: tail.rfind(b"\n") + 1]
+    _static_offsets[file_path.name] = offset + len(complete)
+
+    lines = complete.decode("utf-8", errors="replace").splitlines()
+    return store.load_static(_parse_log_line(line) for line in lines if line.strip())
+
+
+def _create_log_store() -> LogStore:
+    """Open the WAL-backed log store and index any static log files"""
+    store = LogStore(
+        WAL_PATH,
+        partition_seconds=LOG_PARTITION_SECONDS,
+        retention_seconds=LOG_RETENTION_DAYS * 86400 or None,
+    )
+    for file_name in STATIC_LOG_FILES:
+        file_path = DATA_PATH / file_name
+        if file_path.exists():
+            count = _index_log_tail(store, file_path)
+            logging.info(f"Indexed {count} records from {file_name}")
+    return store
 
 
-def _parse_timestamp(timestamp_str: str) -> datetime:
-    """Parse ISO timestamp string to datetime object"""
+LOG_STORE = _create_log_store()
+
+
+def _refresh_static_log(path: Path) -> None:
+    """Index only the lines appended to a static log file"""
+    if path.exists():
+        count = _index_log_tail(LOG_STORE, path)
+        if count:
+            SERVER_METRICS.dataset_reloaded(path.stem)
+            logging.info(f"Indexed {count} new records from {path.name}")
+
+
+DATA_WATCHER.subscribe(_refresh_static_log, STATIC_LOG_FILES)
+SERVER_METRICS.gauge(
+    "backend_index_size", "Ingest store index sizes", LOG_STORE.stats, "index"
+)
+
+
+# Identical log lines are collapsed on these fields under a response budget
+COLLAPSE_FIELDS = ("level", "service", "message")
+
+_LEVEL_SEVERITY = {
+    "CRITICAL": 5,
+    "ERROR": 4,
+    "WARN": 3,
+    "WARNING": 3,
+    "INFO": 2,
+    "DEBUG": 1,
+}
+
+
+def _shape_logs(
+    key: str,
+    logs: list,
+    fields: Optional[str],
+    max_tokens: Optional[int],
+    max_bytes: Optional[int],
+    cursor: Optional[str],
+) -> dict:
+    """Project log records and, when a budget is given, fit them to it"""
+    logs = project(logs, parse_fields(fields))
+    if max_tokens is None and max_bytes is None and cursor is None:
+        return {key: logs}
+    shaped, shaping = fit_to_budget(
+        logs,
+        max_bytes=max_bytes,
+        max_tokens=max_tokens,
+        cursor=cursor,
+        collapse_fields=COLLAPSE_FIELDS,
+        severity=lambda log: _LEVEL_SEVERITY.get(log.get("level"), 0),
+    )
+    return {key: shaped, **shaping}
+
+
+@app.on_event("shutdown")
+def _close_log_store():
+    """Flush pending WAL writes on shutdown"""
+    LOG_STORE.close()
+
+
+@app.post("/logs/ingest")
+async def ingest_logs(
+    request: Request,
+    durable: bool = Query(False, description="fsync the batch before acknowledging it"),
+    api_key: str = Depends(_validate_api_key),
+):
+    """Append a batch of NDJSON log records to the log store"""
     try:
-        # Handle both with and without timezone
-        if timestamp_str.endswith("Z"):
-            return datetime.fromisoformat(timestamp_str.replace("Z", "+00:00"))
-        elif "+" in timestamp_str or timestamp_str.endswith("0"):
-            return datetime.fromisoformat(timestamp_str)
-        else:
-            return datetime.fromisoformat(timestamp_str + "+00:00")
-    except:
-        # Fallback: assume current time if parsing fails
-        return datetime.now(timezone.utc)
-
-
-def _filter_by_time(
-    logs: list, start_time: Optional[str] = None, end_time: Optional[str] = None
-) -> list:
-    """Filter logs by time range"""
-    if not start_time and not end_time:
-        return logs
-
-    filtered_logs = []
-    start_dt = _parse_timestamp(start_time) if start_time else None
-    end_dt = _parse_timestamp(end_time) if end_time else None
-
-    for log in logs:
-        log_timestamp = log.get("timestamp")
-        if not log_timestamp:
-            continue
-
-        try:
-            log_dt = _parse_timestamp(log_timestamp)
-
-            if start_dt and log_dt < start_dt:
-                continue
-            if end_dt and log_dt > end_dt:
-                continue
-
-            filtered_logs.append(log)
-        except:
-            # Include logs with unparseable timestamps
-            filtered_logs.append(log)
-
-    return filtered_logs
-
-
-def _parse_log_file(file_path: Path, pattern: Optional[str] = None):
-    """Parse log file and filter by pattern"""
-    logs = []
-
-    if file_path.suffix == ".json":
-        with open(file_path, "r") as f:
-            data = json.load(f)
-            # Handle both array and object with array
-            if isinstance(data, list):
-                logs = data
-            elif isinstance(data, dict):
-                # Get the first array value in the dict
-                for key, value in data.items():
-                    if isinstance(value, list):
-                        logs = value
-                        break
-    else:
-        # Parse text log files
-        with open(file_path, "r") as f:
-            for line in f:
-                if pattern and pattern.lower() not in line.lower():
-                    continue
-                # Parse log line to extract timestamp, level, and message
-                parts = line.strip().split(" ", 3)
-                if len(parts) >= 4:
-                    timestamp = parts[0]
-                    level_part = parts[1]
-                    service = parts[2]
-                    message = parts[3] if len(parts) > 3 else ""
-
-                    # Extract log level from [LEVEL] format
-                    level = "INFO"
-                    if "[" in level_part and "]" in level_part:
-                        level = level_part.strip("[]")
-
-                    logs.append(
-                        {
-                            "timestamp": timestamp,
-                            "level": level,
-                            "service": service,
-                            "message": message,
-                        }
-                    )
-                else:
-                    logs.append({"message": line.strip()})
-
-    return logs
+        payload = await request.body()
+        if len(payload) > MAX_INGEST_BYTES:
+            return JSONResponse(
+                status_code=413,
+                content={"error": f"Batch exceeds {MAX_INGEST_BYTES} bytes"},
+            )
+
+        result = await run_blocking(LOG_STORE.ingest_ndjson, payload, durable=durable)
+        if result["rejected"]:
+            logging.warning(
+                f"Ingest rejected {result['rejected']} of "
+                f"{result['accepted'] + result['rejected']} records"
+            )
+        return result
+    except Exception as e:
+        logging.error(f"Error ingesting logs: {str(e)}")
+        return JSONResponse(status_code=500, content={"error": str(e)})
 
 
 @app.get("/logs/search")
@@ -152,22 +222,46 @@ async def search_logs(
     log_level: Optional[str] = Query(
         None, enum=["ERROR", "WARN", "INFO", "DEBUG"], description="Filter by log level"
     ),
+    service: Optional[str] = Query(None, description="Filter by service name"),
+    explain: bool = Query(False, description="Include the query plan in the response"),
+    fields: Optional[str] = Query(
+        None, description="Comma separated fields to return, e.g. timestamp,message"
+    ),
+    max_tokens: Optional[int] = Query(
+        None,
+        ge=1,
+        description="Token budget; repeated lines are collapsed and the most severe kept",
+    ),
+    max_bytes: Optional[int] = Query(
+        None,
+        ge=1,
+        description="Byte budget; repeated lines are collapsed and the most severe kept",
+    ),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor of a truncated response, to continue it"
+    ),
     api_key: str = Depends(_validate_api_key),
 ):
     """Search logs by pattern/timeframe"""
     try:
-        application_logs = _parse_log_file(DATA_PATH / "application.log", pattern)
-
-        # Filter by log level if provided
-        if log_level:
-            application_logs = [
-                log for log in application_logs if log.get("level") == log_level
-            ]
-
-        # Filter by time range
-        application_logs = _filter_by_time(application_logs, start_time, end_time)
+        application_logs, plan = await run_blocking(
+            LOG_STORE.search_with_plan,
+            pattern=pattern,
+            levels=[log_level] if log_level else None,
+            service=service,
+            start_time=start_time,
+            end_time=end_time,
+            limit=100,  # Limit results
+        )
+        result = _shape_logs(
+            "logs", application_logs, fields, max_tokens, max_bytes, cursor
+        )
 
-        return {"logs": application_logs[:100]}  # Limit results
+        if explain:
+            result["plan"] = plan
+        return result
+    except (InvalidCursorError, InvalidTimeRangeError) as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
     except Exception as e:
         logging.error(f"Error searching logs: {str(e)}")
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -177,21 +271,38 @@ async def search_logs(
 async def get_error_logs(
     since: Optional[str] = Query(None, description="Get errors since this timestamp"),
     service: Optional[str] = Query(None, description="Filter by service name"),
+    fields: Optional[str] = Query(
+        None, description="Comma separated fields to return, e.g. timestamp,message"
+    ),
+    max_tokens: Optional[int] = Query(
+        None,
+        ge=1,
+        description="Token budget; repeated lines are collapsed and the most severe kept",
+    ),
+    max_bytes: Optional[int] = Query(
+        None,
+        ge=1,
+        description="Byte budget; repeated lines are collapsed and the most severe kept",
+    ),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor of a truncated response, to continue it"
+    ),
     api_key: str = Depends(_validate_api_key),
 ):
     """Retrieve error-specific entries"""
     try:
-        with open(DATA_PATH / "error.log", "r") as f:
-            error_logs = json.load(f)
-
-        if service:
-            error_logs = [log for log in error_logs if log.get("service") == service]
-
-        # Filter by since timestamp
-        if since:
-            error_logs = _filter_by_time(error_logs, start_time=since)
+        budgeted = max_tokens is not None or max_bytes is not None or cursor is not None
+        error_logs = await run_blocking(
+            LOG_STORE.search,
+            levels=["ERROR", "CRITICAL"],
+            service=service,
+            start_time=since,
+            limit=MAX_ERROR_LOGS if budgeted else None,
+        )
 
-        return {"errors": error_logs}
+        return _shape_logs("errors", error_logs, fields, max_tokens, max_bytes, cursor)
+    except (InvalidCursorError, InvalidTimeRangeError) as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
     except Exception as e:
         logging.error(f"Error retrieving error logs: {str(e)}")
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -207,22 +318,19 @@ async def analyze_log_patterns(
     min_occurrences: int = Query(
         5, ge=1, description="Minimum occurrences to be considered a pattern"
     ),
+    fields: Optional[str] = Query(
+        None, description="Comma separated fields to return, e.g. pattern,count"
+    ),
     api_key: str = Depends(_validate_api_key),
 ):
     """Identify recurring issues"""
     try:
-        # Read patterns from actual data file
-        patterns_file = DATA_PATH / "log_patterns.json"
-        if not patterns_file.exists():
-            return {"patterns": []}
-
-        with open(patterns_file, "r") as f:
-            data = json.load(f)
-
-        patterns = data.get("patterns", [])
-
-        # Filter by min_occurrences
-        patterns = [p for p in patterns if p["count"] >= min_occurrences]
+        # Read patterns from actual data file, filtered by min_occurrences
+        patterns = await run_blocking(
+            LOG_PATTERNS.query,
+            where=lambda p: p["count"] >= min_occurrences,
+            fields=parse_fields(fields),
+        )
 
         return {"patterns": patterns}
     except Exception as e:
@@ -236,20 +344,32 @@ async def get_recent_logs(
         100, ge=1, le=1000, description="Number of recent logs to return"
     ),
     service: Optional[str] = Query(None, description="Filter by service name"),
+    fields: Optional[str] = Query(
+        None, description="Comma separated fields to return, e.g. timestamp,message"
+    ),
+    max_tokens: Optional[int] = Query(
+        None,
+        ge=1,
+        description="Token budget; repeated lines are collapsed and the most severe kept",
+    ),
+    max_bytes: Optional[int] = Query(
+        None,
+        ge=1,
+        description="Byte budget; repeated lines are collapsed and the most severe kept",
+    ),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor of a truncated response, to continue it"
+    ),
     api_key: str = Depends(_validate_api_key),
 ):
     """Fetch latest log entries"""
     try:
-        all_logs = _parse_log_file(DATA_PATH / "application.log")
-
-        if service:
-            all_logs = [log for log in all_logs if service in log.get("service", "")]
+        # Most recent first
+        recent_logs = await run_blocking(LOG_STORE.recent, limit=limit, service=service)
 
-        # Return the most recent logs (last N entries)
-        recent_logs = all_logs[-limit:] if len(all_logs) > limit else all_logs
-        recent_logs.reverse()  # Most recent first
-
-        return {"logs": recent_logs}
+        return _shape_logs("logs", recent_logs, fields, max_tokens, max_bytes, cursor)
+    except InvalidCursorError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
     except Exception as e:
         logging.error(f"Error retrieving recent logs: {str(e)}")
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -271,13 +391,10 @@ async def count_log_events(
     """Count occurrences of specific events"""
     try:
         # Read counts from actual data file
-        counts_file = DATA_PATH / "log_counts.json"
-        if not counts_file.exists():
+        data = await run_blocking(LOG_COUNTS.document)
+        if data is None:
             return {"total_count": 0, "counts": []}
 
-        with open(counts_file, "r") as f:
-            data = json.load(f)
-
         if event_type.lower() == "error":
             error_data = data.get("error_counts", {})
             total_count = error_data.get("total_count", 0)
@@ -0,0 +1,181 @@
+import asyncio
+import functools
+import itertools
+import logging
+import os
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from fastapi import FastAPI
+
+logger = logging.getLogger(__name__)
+
+# How often the event loop is probed for lag
+LAG_SAMPLE_INTERVAL_SECONDS = 0.05
+
+# Lag above this means a handler blocked the event loop
+BLOCKING_THRESHOLD_SECONDS = (
+    float(os.getenv("LOOP_BLOCKING_THRESHOLD_MS", "100")) / 1000
+)
+
+# Lag samples kept for percentiles, about two minutes at the default interval
+LAG_HISTORY_SIZE = 2400
+
+# Threads for cold path file loads, kept small so a burst of cold requests
+# cannot starve the process
+COLD_PATH_WORKERS = int(os.getenv("COLD_PATH_WORKERS", "4"))
+
+LAG_PERCENTILES = (50, 90, 99)
+
+T = TypeVar("T")
+
+_executor = ThreadPoolExecutor(
+    max_workers=COLD_PATH_WORKERS, thread_name_prefix="cold-path"
+)
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run blocking work (file reads, JSON parsing) on the cold path pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _executor, functools.partial(func, *args, **kwargs)
+    )
+
+
+def route_label(scope: Dict[str, Any]) -> str:
+    """Route template a request matched, e.g. /runbooks/playbook/{playbook_id}"""
+    return getattr(scope.get("route"), "path", None) or "unmatched"
+
+
+class LoopLagMonitor:
+    """Measures event loop lag and attributes blocking to the routes serving.
+
+    A background task sleeps for a fixed interval and records how late it
+    wakes up. Late wake ups mean something held the loop, and every request
+    that was in flight during that time is counted as a suspect for the
+    route it is serving. A route that keeps showing up does blocking work
+    on the loop.
+    """
+
+    def __init__(
+        self,
+        interval: float = LAG_SAMPLE_INTERVAL_SECONDS,
+        threshold: float = BLOCKING_THRESHOLD_SECONDS,
+        history_size: int = LAG_HISTORY_SIZE,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.samples: Deque[float] = deque(maxlen=history_size)
+        self.blocking_routes: Counter = Counter()
+        self.max_lag = 0.0
+        self._ids = itertools.count()
+        self._in_flight: Dict[int, Dict[str, Any]] = {}
+        # (finish time, route) of recent requests, for ones that ran to
+        # completion inside the blocked window
+        self._finished: Deque[Tuple[float, str]] = deque(maxlen=256)
+        self._task: Optional[asyncio.Task] = None
+
+    def request_started(self, scope: Dict[str, Any]) -> int:
+        request_id = next(self._ids)
+        self._in_flight[request_id] = scope
+        return request_id
+
+    def request_finished(self, request_id: int) -> None:
+        scope = self._in_flight.pop(request_id, None)
+        if scope is not None:
+            self._finished.append(
+                (asyncio.get_running_loop().time(), route_label(scope))
+            )
+
+    def record(self, lag: float, since: float) -> None:
+        """Record one lag sample taken over a window that started at ``since``"""
+        self.samples.append(lag)
+        self.max_lag = max(self.max_lag, lag)
+        if lag < self.threshold:
+            return
+        suspects = {route_label(scope) for scope in self._in_flight.values()}
+        suspects.update(
+            route for finished, route in self._finished if finished >= since
+        )
+        self.blocking_routes.update(suspects)
+        logger.warning(
+            f"Event loop blocked for {lag * 1000:.0f}ms while serving "
+            f"{', '.join(sorted(suspects)) or 'no requests'}"
+        )
+
+    async def _sample(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            since = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, loop.time() - since - self.interval), since)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._sample())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def percentiles(self) -> Dict[str, float]:
+        """Lag percentiles over the sample history, in milliseconds"""
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {f"p{p}": 0.0 for p in LAG_PERCENTILES}
+        return {
+            f"p{p}": round(
+                ordered[min(len(ordered) * p // 100, len(ordered) - 1)] * 1000, 3
+            )
+            for p in LAG_PERCENTILES
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "samples": len(self.samples),
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "lag_ms": {**self.percentiles(), "max": round(self.max_lag * 1000, 3)},
+            "in_flight": len(self._in_flight),
+            "blocking_routes": dict(self.blocking_routes.most_common()),
+            "cold_path_workers": COLD_PATH_WORKERS,
+        }
+
+
+class LoopLagMiddleware:
+    """Tracks in-flight requests for the lag monitor (plain ASGI, no buffering)"""
+
+    def __init__(self, app, monitor: LoopLagMonitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = self.monitor.request_started(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.request_finished(request_id)
+
+
+def install_loop_monitor(app: FastAPI, dependencies=None) -> LoopLagMonitor:
+    """Instrument an app and serve its lag percentiles on /internal/loop_lag"""
+    monitor = LoopLagMonitor()
+    app.add_middleware(LoopLagMiddleware, monitor=monitor)
+    app.on_event("startup")(monitor.start)
+    app.on_event("shutdown")(monitor.stop)
+
+    @app.get("/internal/loop_lag", dependencies=dependencies, include_in_schema=False)
+    async def get_loop_lag():
+        """Event loop lag percentiles and the routes that blocked the loop"""
+        return monitor.snapshot()
+
+    return monitor
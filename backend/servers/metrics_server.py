@@ -1,18 +1,39 @@
 import json
 import logging
-from datetime import datetime, timezone
+import os
 from pathlib import Path
 from typing import Optional
 
+from correlation import (
+    BURST_BUCKET_SECONDS,
+    DEFAULT_WINDOW_SECONDS,
+    correlate,
+    error_bursts,
+    k8s_signals,
+    metric_spikes,
+)
 from fastapi import (
     Depends,
     FastAPI,
-    Header,
-    HTTPException,
     Query,
+    Request,
 )
 from fastapi.responses import JSONResponse
-from retrieve_api_key import retrieve_api_key
+from log_store import scan_wal
+from loop_monitor import run_blocking
+from metrics_store import ROLLUP_RESOLUTIONS, MetricsStore
+from response_shaping import MIN_DOWNSAMPLE_POINTS, downsample
+from store import (
+    Dataset,
+    InvalidTimeRangeError,
+    api_key_validator,
+    install_backend,
+    load_api_key,
+    parse_fields,
+    parse_time_bound,
+    project,
+    to_epoch,
+)
 
 # Configure logging with basicConfig
 logging.basicConfig(
@@ -24,75 +45,125 @@ logging.basicConfig(
 app = FastAPI(title="Application Metrics API", version="1.0.0")
 
 DATA_PATH = Path(__file__).parent.parent / "data" / "metrics_data"
-
-# API Key for authentication
-CREDENTIAL_PROVIDER_NAME = "sre-agent-api-key-credential-provider"
+INGEST_PATH = DATA_PATH / "ingest"
+
+# Retention of ingested samples (METRICS_RETENTION_DAYS=0 keeps everything)
+METRICS_RETENTION_DAYS = int(os.getenv("METRICS_RETENTION_DAYS", "0"))
+
+# Sibling datasets joined by the correlation endpoint
+LOGS_DATA_PATH = DATA_PATH.parent / "logs_data"
+K8S_DATA_PATH = DATA_PATH.parent / "k8s_data"
+
+# Metric history before the correlation window used as the spike baseline
+CORRELATION_BASELINE_SECONDS = 3600
+
+# Value field LTTB downsampling follows for each kind of metric record
+PERFORMANCE_VALUE_FIELDS = {
+    "response_time": "response_time_ms",
+    "throughput": "requests_per_second",
+    "cpu_usage": "value",
+    "memory_usage": "value",
+    None: "cpu_usage_percent",
+}
+RESOURCE_VALUE_FIELDS = {
+    "cpu": "cpu_usage_percent",
+    "memory": "memory_usage_percent",
+    "disk": "disk_io_read_mb",
+    "network": "network_in_mb",
+    None: "cpu_usage_percent",
+}
+
+# Reject ingest payloads larger than this (bytes)
+MAX_INGEST_BYTES = 16 * 1024 * 1024
 
 # Retrieve API key from credential provider at startup
-try:
-    EXPECTED_API_KEY = retrieve_api_key(CREDENTIAL_PROVIDER_NAME)
-    if not EXPECTED_API_KEY:
-        logging.error("Failed to retrieve API key from credential provider")
-        raise RuntimeError(
-            "Cannot start server without valid API key from credential provider"
-        )
-except Exception as e:
-    logging.error(f"Error retrieving API key: {e}")
-    raise RuntimeError(f"Cannot start server: {e}") from e
+EXPECTED_API_KEY = load_api_key()
+_validate_api_key = api_key_validator(EXPECTED_API_KEY)
 
+SERVER_METRICS, DATA_WATCHER, JSON_FILES = install_backend(
+    app,
+    [DATA_PATH, LOGS_DATA_PATH, K8S_DATA_PATH],
+    dependencies=[Depends(_validate_api_key)],
+)
 
-def _validate_api_key(x_api_key: str = Header(None, alias="X-API-Key")):
-    """Validate API key from header"""
-    if not x_api_key or x_api_key != EXPECTED_API_KEY:
-        raise HTTPException(status_code=401, detail="Invalid or missing API key")
-    return x_api_key
 
+def _dataset(path: Path, key: Optional[str] = None) -> Dataset:
+    """Dataset of a data file, read as empty while the file is missing"""
+    return Dataset(JSON_FILES, path, key, required=False)
 
-def _parse_timestamp(timestamp_str: str) -> datetime:
-    """Parse ISO timestamp string to datetime object"""
-    try:
-        # Handle both with and without timezone
-        if timestamp_str.endswith("Z"):
-            return datetime.fromisoformat(timestamp_str.replace("Z", "+00:00"))
-        elif "+" in timestamp_str or timestamp_str.endswith("0"):
-            return datetime.fromisoformat(timestamp_str)
-        else:
-            return datetime.fromisoformat(timestamp_str + "+00:00")
-    except:
-        # Fallback: assume current time if parsing fails
-        return datetime.now(timezone.utc)
 
+RESPONSE_TIMES = _dataset(DATA_PATH / "response_times.json", "metrics")
+THROUGHPUT = _dataset(DATA_PATH / "throughput.json", "metrics")
+RESOURCE_USAGE = _dataset(DATA_PATH / "resource_usage.json", "metrics")
+ERROR_RATES = _dataset(DATA_PATH / "error_rates.json", "error_rates")
+AVAILABILITY = _dataset(DATA_PATH / "availability.json", "availability_metrics")
+TRENDS = _dataset(DATA_PATH / "trends.json")
+LOG_PATTERNS = _dataset(LOGS_DATA_PATH / "log_patterns.json", "patterns")
+K8S_EVENTS = _dataset(K8S_DATA_PATH / "events.json", "events")
+K8S_PODS = _dataset(K8S_DATA_PATH / "pods.json", "pods")
 
-def _filter_metrics_by_time(
-    metrics: list, start_time: Optional[str] = None, end_time: Optional[str] = None
-) -> list:
-    """Filter metrics by time range"""
-    if not start_time and not end_time:
-        return metrics
+# Datasets of the performance metric types; others read the resource usage
+PERFORMANCE_DATASETS = {"response_time": RESPONSE_TIMES, "throughput": THROUGHPUT}
 
-    filtered_metrics = []
-    start_dt = _parse_timestamp(start_time) if start_time else None
-    end_dt = _parse_timestamp(end_time) if end_time else None
+# (dataset, value field, metric name) of the static series to correlate
+CORRELATED_METRICS = (
+    (RESPONSE_TIMES, "response_time_ms", "response_time"),
+    (ERROR_RATES, "error_rate", "error_rate"),
+    (RESOURCE_USAGE, "cpu_usage_percent", "cpu_usage"),
+    (RESOURCE_USAGE, "memory_usage_percent", "memory_usage"),
+)
 
-    for metric in metrics:
-        metric_timestamp = metric.get("timestamp")
-        if not metric_timestamp:
-            continue
+METRICS_STORE = MetricsStore(
+    INGEST_PATH, retention_seconds=METRICS_RETENTION_DAYS * 86400 or None
+)
+SERVER_METRICS.gauge(
+    "backend_index_size", "Ingest store index sizes", METRICS_STORE.stats, "index"
+)
 
-        try:
-            metric_dt = _parse_timestamp(metric_timestamp)
 
-            if start_dt and metric_dt < start_dt:
-                continue
-            if end_dt and metric_dt > end_dt:
-                continue
+@app.on_event("shutdown")
+def _close_metrics_store():
+    """Flush the ingest journal on shutdown"""
+    METRICS_STORE.close()
 
-            filtered_metrics.append(metric)
-        except:
-            # Include metrics with unparseable timestamps
-            filtered_metrics.append(metric)
 
-    return filtered_metrics
+@app.post("/metrics/ingest")
+async def ingest_metrics(
+    request: Request,
+    durable: bool = Query(False, description="fsync the batch before acknowledging it"),
+    api_key: str = Depends(_validate_api_key),
+):
+    """Append a remote-write style batch of time series samples"""
+    try:
+        payload = await request.body()
+        if len(payload) > MAX_INGEST_BYTES:
+            return JSONResponse(
+                status_code=413,
+                content={"error": f"Batch exceeds {MAX_INGEST_BYTES} bytes"},
+            )
+
+        try:
+            body = await run_blocking(json.loads, payload)
+        except ValueError as e:
+            return JSONResponse(
+                status_code=400, content={"error": f"Invalid JSON: {e}"}
+            )
+        timeseries = body.get("timeseries") if isinstance(body, dict) else None
+        if not isinstance(timeseries, list):
+            return JSONResponse(
+                status_code=400,
+                content={"error": "Body must contain a 'timeseries' array"},
+            )
+
+        result = await run_blocking(METRICS_STORE.ingest, timeseries, durable=durable)
+        if result["rejected_series"]:
+            logging.warning(
+                f"Ingest rejected {result['rejected_series']} of {len(timeseries)} series"
+            )
+        return result
+    except Exception as e:
+        logging.error(f"Error ingesting metrics: {str(e)}")
+        return JSONResponse(status_code=500, content={"error": str(e)})
 
 
 @app.get("/metrics/performance")
@@ -105,84 +176,133 @@ async def get_performance_metrics(
     start_time: Optional[str] = Query(None, description="Start time for metrics"),
     end_time: Optional[str] = Query(None, description="End time for metrics"),
     service: Optional[str] = Query(None, description="Filter by service name"),
+    max_points: Optional[int] = Query(
+        None,
+        ge=MIN_DOWNSAMPLE_POINTS,
+        description="Downsample each series to at most this many points, keeping peaks",
+    ),
+    fields: Optional[str] = Query(
+        None, description="Comma separated fields to return, e.g. timestamp,value"
+    ),
     api_key: str = Depends(_validate_api_key),
 ):
     """Retrieve performance data"""
     try:
-        metrics = []
-
-        if metric_type == "response_time":
-            with open(DATA_PATH / "response_times.json", "r") as f:
-                data = json.load(f)
-                metrics = data.get("metrics", [])
-        elif metric_type == "throughput":
-            with open(DATA_PATH / "throughput.json", "r") as f:
-                data = json.load(f)
-                metrics = data.get("metrics", [])
-        elif metric_type in ["cpu_usage", "memory_usage"]:
-            with open(DATA_PATH / "resource_usage.json", "r") as f:
-                data = json.load(f)
-                raw_metrics = data.get("metrics", [])
-                # Transform resource metrics to match expected format
-                metrics = []
-                for m in raw_metrics:
-                    if metric_type == "cpu_usage":
-                        metrics.append(
-                            {
-                                "timestamp": m["timestamp"],
-                                "service": m["service"],
-                                "value": m["cpu_usage_percent"],
-                                "unit": "percent",
-                            }
-                        )
-                    else:  # memory_usage
-                        metrics.append(
-                            {
-                                "timestamp": m["timestamp"],
-                                "service": m["service"],
-                                "value": m["memory_usage_mb"],
-                                "unit": "MB",
-                            }
-                        )
-        else:
-            # Return combined metrics for demo
-            with open(DATA_PATH / "resource_usage.json", "r") as f:
-                data = json.load(f)
-                metrics = data.get("metrics", [])
-
-        if service:
-            metrics = [m for m in metrics if m.get("service") == service]
+        # Filter by service and time range
+        dataset = PERFORMANCE_DATASETS.get(metric_type, RESOURCE_USAGE)
+        metrics = await run_blocking(
+            dataset.query, {"service": service}, start_time, end_time
+        )
 
-        # Filter by time range
-        metrics = _filter_metrics_by_time(metrics, start_time, end_time)
+        if metric_type in ["cpu_usage", "memory_usage"]:
+            raw_metrics = metrics
+            # Transform resource metrics to match expected format
+            metrics = []
+            for m in raw_metrics:
+                if metric_type == "cpu_usage":
+                    metrics.append(
+                        {
+                            "timestamp": m["timestamp"],
+                            "service": m["service"],
+                            "value": m["cpu_usage_percent"],
+                            "unit": "percent",
+                        }
+                    )
+                else:  # memory_usage
+                    metrics.append(
+                        {
+                            "timestamp": m["timestamp"],
+                            "service": m["service"],
+                            "value": m["memory_usage_mb"],
+                            "unit": "MB",
+                        }
+                    )
+
+        metrics = downsample(
+            metrics, max_points, PERFORMANCE_VALUE_FIELDS.get(metric_type)
+        )
 
-        return {"metrics": metrics}
+        # Append ingested samples, already time filtered by the store
+        if metric_type:
+            metrics = metrics + await run_blocking(
+                METRICS_STORE.points,
+                metric_type,
+                service,
+                start_time,
+                end_time,
+                max_points,
+            )
+
+        return {"metrics": project(metrics, parse_fields(fields))}
+    except InvalidTimeRangeError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
     except Exception as e:
         logging.error(f"Error retrieving performance metrics: {str(e)}")
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+@app.get("/metrics/rollups")
+async def get_metric_rollups(
+    metric_name: str = Query(..., description="Name of the ingested metric"),
+    resolution: str = Query(
+        "1m", enum=list(ROLLUP_RESOLUTIONS), description="Rollup bucket width"
+    ),
+    service: Optional[str] = Query(None, description="Filter by service name"),
+    start_time: Optional[str] = Query(None, description="Start time for rollups"),
+    end_time: Optional[str] = Query(None, description="End time for rollups"),
+    fields: Optional[str] = Query(
+        None, description="Comma separated fields to return, e.g. timestamp,value"
+    ),
+    api_key: str = Depends(_validate_api_key),
+):
+    """Retrieve pre-aggregated count/min/max/avg/percentiles per time bucket"""
+    try:
+        rollups = await run_blocking(
+            METRICS_STORE.rollups,
+            metric_name,
+            resolution,
+            service,
+            start_time,
+            end_time,
+        )
+
+        return {
+            "metric_name": metric_name,
+            "resolution": resolution,
+            "rollups": project(rollups, parse_fields(fields)),
+        }
+    except InvalidTimeRangeError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except Exception as e:
+        logging.error(f"Error retrieving metric rollups: {str(e)}")
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
 @app.get("/metrics/errors")
 async def get_error_rates(
     time_window: Optional[str] = Query(
         "24h", enum=["1h", "6h", "24h", "7d"], description="Time window for error rates"
     ),
     service: Optional[str] = Query(None, description="Filter by service name"),
+    max_points: Optional[int] = Query(
+        None,
+        ge=MIN_DOWNSAMPLE_POINTS,
+        description="Downsample each series to at most this many points, keeping peaks",
+    ),
+    fields: Optional[str] = Query(
+        None, description="Comma separated fields to return, e.g. timestamp,value"
+    ),
     api_key: str = Depends(_validate_api_key),
 ):
     """Fetch error rate statistics"""
     try:
-        with open(DATA_PATH / "error_rates.json", "r") as f:
-            data = json.load(f)
-
-        error_rates = data.get("error_rates", [])
-
-        if service:
-            error_rates = [e for e in error_rates if e.get("service") == service]
+        error_rates = await run_blocking(ERROR_RATES.query, {"service": service})
 
         # TODO: In real implementation, would filter by time window
 
-        return {"error_rates": error_rates}
+        error_rates = downsample(error_rates, max_points, "error_rate")
+
+        return {"error_rates": project(error_rates, parse_fields(fields))}
     except Exception as e:
         logging.error(f"Error retrieving error rates: {str(e)}")
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -199,17 +319,19 @@ async def get_resource_metrics(
     time_window: Optional[str] = Query(
         "24h", enum=["1h", "6h", "24h", "7d"], description="Time window for metrics"
     ),
+    max_points: Optional[int] = Query(
+        None,
+        ge=MIN_DOWNSAMPLE_POINTS,
+        description="Downsample each series to at most this many points, keeping peaks",
+    ),
+    fields: Optional[str] = Query(
+        None, description="Comma separated fields to return, e.g. timestamp,value"
+    ),
     api_key: str = Depends(_validate_api_key),
 ):
     """Monitor resource utilization"""
     try:
-        with open(DATA_PATH / "resource_usage.json", "r") as f:
-            data = json.load(f)
-
-        metrics = data.get("metrics", [])
-
-        if service:
-            metrics = [m for m in metrics if m.get("service") == service]
+        metrics = await run_blocking(RESOURCE_USAGE.query, {"service": service})
 
         # Filter by resource type if specified
         if resource_type:
@@ -230,7 +352,9 @@ async def get_resource_metrics(
                 filtered_metrics.append(filtered)
             metrics = filtered_metrics
 
-        return {"metrics": metrics}
+        metrics = downsample(metrics, max_points, RESOURCE_VALUE_FIELDS[resource_type])
+
+        return {"metrics": project(metrics, parse_fields(fields))}
     except Exception as e:
         logging.error(f"Error retrieving resource metrics: {str(e)}")
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -244,23 +368,31 @@ async def get_availability_metrics(
         enum=["1h", "6h", "24h", "7d", "30d"],
         description="Time window for availability calculation",
     ),
+    max_points: Optional[int] = Query(
+        None,
+        ge=MIN_DOWNSAMPLE_POINTS,
+        description="Downsample each series to at most this many points, keeping peaks",
+    ),
+    fields: Optional[str] = Query(
+        None, description="Comma separated fields to return, e.g. timestamp,value"
+    ),
     api_key: str = Depends(_validate_api_key),
 ):
     """Check service availability"""
     try:
-        with open(DATA_PATH / "availability.json", "r") as f:
-            data = json.load(f)
-
-        availability_metrics = data.get("availability_metrics", [])
-
-        if service:
-            availability_metrics = [
-                a for a in availability_metrics if a.get("service") == service
-            ]
+        availability_metrics = await run_blocking(
+            AVAILABILITY.query, {"service": service}
+        )
 
         # TODO: In real implementation, would calculate based on time window
 
-        return {"availability_metrics": availability_metrics}
+        availability_metrics = downsample(
+            availability_metrics, max_points, "availability_percentage"
+        )
+
+        return {
+            "availability_metrics": project(availability_metrics, parse_fields(fields))
+        }
     except Exception as e:
         logging.error(f"Error retrieving availability metrics: {str(e)}")
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -283,8 +415,8 @@ async def analyze_trends(
     """Identify metric trends and anomalies"""
     try:
         # Read trends from actual data file
-        trends_file = DATA_PATH / "trends.json"
-        if not trends_file.exists():
+        data = await run_blocking(TRENDS.document)
+        if data is None:
             return {
                 "trend": "no_data",
                 "average_value": 0,
@@ -292,9 +424,6 @@ async def analyze_trends(
                 "anomalies": [],
             }
 
-        with open(trends_file, "r") as f:
-            data = json.load(f)
-
         # Determine which trend data to use based on metric name
         if "response" in metric_name.lower():
             trend_data = data.get("response_time_trends", {})
@@ -324,6 +453,103 @@ async def analyze_trends(
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+def _baseline_start(start: Optional[float]) -> Optional[float]:
+    return start - CORRELATION_BASELINE_SECONDS if start is not None else None
+
+
+def _metric_series(start: Optional[float], end: Optional[float]) -> list:
+    """Static metric series from the data files"""
+    series = {}
+    for dataset, field, metric in CORRELATED_METRICS:
+        for m in dataset.load():
+            if field not in m:
+                continue
+            epoch = to_epoch(m.get("timestamp"))
+            if epoch is None:
+                continue
+            if (start is None or epoch >= start) and (end is None or epoch <= end):
+                series.setdefault((metric, m.get("service")), []).append(
+                    (epoch, m[field])
+                )
+
+    return [(metric, service, samples) for (metric, service), samples in series.items()]
+
+
+def _log_records(start: Optional[float], end: Optional[float]) -> list:
+    """Ingested logs from the logs server WAL plus known pattern occurrences"""
+    if start is not None:
+        start -= BURST_BUCKET_SECONDS
+    records = list(scan_wal(LOGS_DATA_PATH / "wal", start, end))
+
+    for pattern in LOG_PATTERNS.load():
+        for occurrence in pattern.get("occurrences", []):
+            epoch = to_epoch(occurrence.get("timestamp"))
+            if epoch is None:
+                continue
+            if (start is None or epoch >= start) and (end is None or epoch <= end):
+                records.append(
+                    (epoch, {"level": pattern.get("severity"), **occurrence})
+                )
+    return records
+
+
+def _k8s_events() -> list:
+    """Cluster events plus the per-pod events recorded in the pod snapshot"""
+    events = {}
+    for event in K8S_EVENTS.load():
+        key = (event.get("object"), event.get("reason"), event.get("timestamp"))
+        events[key] = event
+    for pod in K8S_PODS.load():
+        for event in pod.get("events", []):
+            obj = f"pod/{pod.get('name')}"
+            key = (obj, event.get("reason"), event.get("timestamp"))
+            events.setdefault(key, {"object": obj, **event})
+
+    epochs = ((to_epoch(event.get("timestamp")), event) for event in events.values())
+    return [(epoch, event) for epoch, event in epochs if epoch is not None]
+
+
+@app.get("/metrics/correlate")
+async def correlate_signals(
+    service: Optional[str] = Query(
+        None, description="Service to correlate signals for"
+    ),
+    start_time: Optional[str] = Query(None, description="Start of the time window"),
+    end_time: Optional[str] = Query(None, description="End of the time window"),
+    window_seconds: int = Query(
+        DEFAULT_WINDOW_SECONDS,
+        ge=1,
+        le=3600,
+        description="Signals this close together are treated as correlated",
+    ),
+    limit: int = Query(5, ge=1, le=50, description="Number of clusters to return"),
+    api_key: str = Depends(_validate_api_key),
+):
+    """Correlate metric spikes, error log bursts and k8s events in one timeline"""
+    try:
+        start = parse_time_bound(start_time)
+        end = parse_time_bound(end_time)
+
+        baseline_start = _baseline_start(start)
+        series = await run_blocking(_metric_series, baseline_start, end)
+        series += await run_blocking(METRICS_STORE.series_samples, baseline_start, end)
+
+        signals = (
+            metric_spikes(series)
+            + error_bursts(await run_blocking(_log_records, start, end))
+            + k8s_signals(await run_blocking(_k8s_events))
+        )
+        result = correlate(signals, start, end, service, window_seconds, limit)
+        result.update(start_time=start_time, end_time=end_time)
+
+        return result
+    except InvalidTimeRangeError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except Exception as e:
+        logging.error(f"Error correlating signals: {str(e)}")
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
 @app.get("/")
 async def health_check(api_key: str = Depends(_validate_api_key)):
     """Health check endpoint"""
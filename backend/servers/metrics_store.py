@@ -0,0 +1,501 @@
+import json
+import logging
+import math
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from response_shaping import lttb
+from store import parse_time_bound, to_epoch
+
+logger = logging.getLogger(__name__)
+
+# Rollup resolutions maintained for every series, in seconds
+ROLLUP_RESOLUTIONS = {"1m": 60, "5m": 300, "1h": 3600}
+
+# Relative accuracy of the percentile sketches
+SKETCH_RELATIVE_ACCURACY = 0.01
+
+JOURNAL_FILE = "samples.ndjson"
+
+# The journal is rewritten as a snapshot of the retained samples once it has
+# grown by this much since the last snapshot, and at least by the snapshot's
+# own size, which bounds it to a small multiple of the live data
+DEFAULT_COMPACT_BYTES = 64 * 1024 * 1024
+
+# Samples per journal line in a snapshot
+SNAPSHOT_CHUNK_SAMPLES = 10000
+
+SeriesKey = Tuple[str, str]
+
+
+def _to_iso(epoch: float) -> str:
+    return (
+        datetime.fromtimestamp(epoch, tz=timezone.utc)
+        .isoformat()
+        .replace("+00:00", "Z")
+    )
+
+
+class QuantileSketch:
+    """Mergeable log-bucketed quantile sketch (DDSketch style).
+
+    Values are counted in buckets whose bounds grow geometrically, so every
+    quantile estimate is within SKETCH_RELATIVE_ACCURACY of the true value
+    and memory grows with the value range rather than the sample count.
+    """
+
+    def __init__(self, relative_accuracy: float = SKETCH_RELATIVE_ACCURACY):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        if value <= 0:
+            # Latencies and utilizations are non-negative; clamp the rest
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def merge(self, other: "QuantileSketch") -> None:
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return 2 * self.gamma**index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class _Rollup:
+    """Aggregate of all samples that fall into one rollup bucket"""
+
+    __slots__ = ("count", "total", "minimum", "maximum", "sketch")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.sketch = QuantileSketch()
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        self.sketch.add(value)
+
+    def to_dict(self, bucket_start: float) -> Dict[str, Any]:
+        return {
+            "timestamp": _to_iso(bucket_start),
+            "count": self.count,
+            "min": self.minimum,
+            "max": self.maximum,
+            "avg": round(self.total / self.count, 3),
+            "p50": round(self.sketch.quantile(0.50), 3),
+            "p95": round(self.sketch.quantile(0.95), 3),
+            "p99": round(self.sketch.quantile(0.99), 3),
+        }
+
+
+class MetricSeries:
+    """Time-sorted samples for one (metric, service) pair plus its rollups"""
+
+    def __init__(self, metric: str, service: str, unit: Optional[str] = None):
+        self.metric = metric
+        self.service = service
+        self.unit = unit
+        self.times: List[float] = []
+        self.values: List[float] = []
+        self.rollups: Dict[str, Dict[float, _Rollup]] = {
+            name: {} for name in ROLLUP_RESOLUTIONS
+        }
+
+    def add(self, epoch: float, value: float) -> None:
+        # Samples normally arrive in order, so appending is the fast path
+        if not self.times or epoch >= self.times[-1]:
+            self.times.append(epoch)
+            self.values.append(value)
+        else:
+            position = bisect_right(self.times, epoch)
+            self.times.insert(position, epoch)
+            self.values.insert(position, value)
+
+        # Rollup aggregates are order independent, so late samples are fine
+        for name, width in ROLLUP_RESOLUTIONS.items():
+            bucket_start = epoch - epoch % width
+            buckets = self.rollups[name]
+            rollup = buckets.get(bucket_start)
+            if rollup is None:
+                rollup = buckets[bucket_start] = _Rollup()
+            rollup.add(value)
+
+    def range(
+        self, start: Optional[float] = None, end: Optional[float] = None
+    ) -> Tuple[int, int]:
+        lo = bisect_left(self.times, start) if start is not None else 0
+        hi = bisect_right(self.times, end) if end is not None else len(self.times)
+        return lo, hi
+
+
+class MetricsStore:
+    """Append-only store for ingested metric samples.
+
+    Every accepted sample is appended to a journal file and applied to the
+    in-memory sorted series, rollups and sketches in the same call, so queries
+    see new data immediately and no periodic rebuild is needed. The journal is
+    replayed on startup; once it has grown enough it is compacted into a
+    snapshot of the retained samples (see DEFAULT_COMPACT_BYTES), so its size
+    and the replay time follow the live data rather than the ingest history.
+    """
+
+    def __init__(
+        self,
+        journal_dir: Path,
+        retention_seconds: Optional[float] = None,
+        compact_bytes: int = DEFAULT_COMPACT_BYTES,
+    ):
+        """
+        Args:
+            journal_dir: Directory holding the journal file
+            retention_seconds: Drop samples older than this when compacting;
+                None keeps all
+            compact_bytes: Journal growth that triggers a compaction
+        """
+        self.journal_path = Path(journal_dir) / JOURNAL_FILE
+        self.retention_seconds = retention_seconds
+        self.compact_bytes = compact_bytes
+        self._lock = threading.RLock()
+        self._series: Dict[SeriesKey, MetricSeries] = {}
+        self.samples_ingested = 0
+        self._journal_bytes = 0
+        self._snapshot_bytes = 0
+
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        self._replay()
+        self._journal = open(self.journal_path, "ab")
+        self._maybe_compact()
+
+    def _replay(self) -> None:
+        if not self.journal_path.exists():
+            return
+        started = time.perf_counter()
+        offset = 0
+        with open(self.journal_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    logger.warning(f"Truncating partial journal record at {offset}")
+                    break
+                try:
+                    self._apply(*self._parse_series(json.loads(line)))
+                except ValueError as e:
+                    logger.warning(f"Skipping bad journal record at {offset}: {e}")
+                offset += len(line)
+        if offset != self.journal_path.stat().st_size:
+            os.truncate(self.journal_path, offset)
+        self._journal_bytes = offset
+        logger.info(
+            f"Replayed {self.samples_ingested} metric samples into "
+            f"{len(self._series)} series in "
+            f"{(time.perf_counter() - started) * 1000:.1f}ms"
+        )
+
+    @staticmethod
+    def _parse_series(
+        raw: Any,
+    ) -> Tuple[str, str, Optional[str], List[Tuple[float, float]]]:
+        """Validate one remote-write style time series entry"""
+        if not isinstance(raw, dict):
+            raise ValueError("time series must be a JSON object")
+        metric = raw.get("metric")
+        if not isinstance(metric, str) or not metric:
+            raise ValueError("time series requires a 'metric' name")
+        service = str(raw.get("service", "unknown"))
+        unit = raw.get("unit")
+
+        samples = []
+        for sample in raw.get("samples", []):
+            if isinstance(sample, (list, tuple)) and len(sample) == 2:
+                timestamp, value = sample
+            elif isinstance(sample, dict):
+                timestamp, value = sample.get("timestamp"), sample.get("value")
+            else:
+                raise ValueError("sample must be [timestamp, value] or an object")
+            epoch = to_epoch(timestamp)
+            if epoch is None:
+                raise ValueError(f"invalid sample timestamp: {timestamp!r}")
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                raise ValueError(f"invalid sample value: {value!r}")
+            samples.append((epoch, float(value)))
+        if not samples:
+            raise ValueError("time series has no samples")
+        return metric, service, unit, samples
+
+    def _apply(
+        self,
+        metric: str,
+        service: str,
+        unit: Optional[str],
+        samples: List[Tuple[float, float]],
+    ) -> None:
+        series = self._series.get((metric, service))
+        if series is None:
+            series = self._series[(metric, service)] = MetricSeries(
+                metric, service, unit
+            )
+        elif unit and not series.unit:
+            series.unit = unit
+        for epoch, value in samples:
+            series.add(epoch, value)
+        self.samples_ingested += len(samples)
+
+    def ingest(
+        self, timeseries: Iterable[Any], durable: bool = False
+    ) -> Dict[str, Any]:
+        """Apply a batch of time series and append it to the journal.
+
+        Args:
+            timeseries: Entries of the form
+                {"metric", "service", "unit", "samples": [[ts, value], ...]}
+            durable: fsync the journal before returning
+
+        Returns:
+            Dict with accepted series/sample counts and per-series errors
+        """
+        parsed = []
+        errors = []
+        for position, raw in enumerate(timeseries):
+            try:
+                parsed.append(self._parse_series(raw))
+            except ValueError as e:
+                errors.append({"series": position, "error": str(e)})
+
+        lines = [
+            json.dumps(
+                {
+                    "metric": metric,
+                    "service": service,
+                    "unit": unit,
+                    "samples": samples,
+                },
+                separators=(",", ":"),
+            ).encode()
+            + b"\n"
+            for metric, service, unit, samples in parsed
+        ]
+
+        with self._lock:
+            if lines:
+                chunk = b"".join(lines)
+                self._journal.write(chunk)
+                self._journal.flush()
+                if durable:
+                    os.fsync(self._journal.fileno())
+                self._journal_bytes += len(chunk)
+            for entry in parsed:
+                self._apply(*entry)
+            self._maybe_compact()
+
+        return {
+            "accepted_series": len(parsed),
+            "accepted_samples": sum(len(entry[3]) for entry in parsed),
+            "rejected_series": len(errors),
+            "errors": errors[:10],
+        }
+
+    def _maybe_compact(self) -> None:
+        growth = self._journal_bytes - self._snapshot_bytes
+        if growth >= max(self.compact_bytes, self._snapshot_bytes):
+            self.compact()
+
+    def compact(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Drop samples past the retention period and rewrite the journal.
+
+        The retention cutoff is aligned down to the widest rollup bucket, so
+        rollups never keep part of a bucket whose samples were dropped. The
+        snapshot is written to a temporary file and swapped in atomically.
+
+        Args:
+            now: Wall-clock time used for retention, defaults to time.time()
+
+        Returns:
+            Counts of retained series and samples, dropped samples and the
+            journal size
+        """
+        with self._lock:
+            dropped = 0
+            if self.retention_seconds is not None:
+                cutoff = (now or time.time()) - self.retention_seconds
+                cutoff -= cutoff % max(ROLLUP_RESOLUTIONS.values())
+                for key, series in list(self._series.items()):
+                    lo = bisect_left(series.times, cutoff)
+                    del series.times[:lo]
+                    del series.values[:lo]
+                    dropped += lo
+                    for buckets in series.rollups.values():
+                        for bucket_start in [b for b in buckets if b < cutoff]:
+                            del buckets[bucket_start]
+                    if not series.times:
+                        del self._series[key]
+
+            temp_path = self.journal_path.with_name(JOURNAL_FILE + ".tmp")
+            with open(temp_path, "wb") as f:
+                for series in self._series.values():
+                    samples = list(zip(series.times, series.values))
+                    for i in range(0, len(samples), SNAPSHOT_CHUNK_SAMPLES):
+                        entry = {
+                            "metric": series.metric,
+                            "service": series.service,
+                            "unit": series.unit,
+                            "samples": samples[i : i + SNAPSHOT_CHUNK_SAMPLES],
+                        }
+                        f.write(json.dumps(entry, separators=(",", ":")).encode())
+                        f.write(b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+                size = f.tell()
+            self._journal.close()
+            os.replace(temp_path, self.journal_path)
+            self._journal = open(self.journal_path, "ab")
+            self._journal_bytes = self._snapshot_bytes = size
+
+            summary = {
+                "series": len(self._series),
+                "samples": sum(len(s.times) for s in self._series.values()),
+                "dropped_samples": dropped,
+                "journal_bytes": size,
+            }
+        logger.info(f"Compacted metrics journal: {summary}")
+        return summary
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._journal.closed:
+                self._journal.flush()
+                os.fsync(self._journal.fileno())
+                self._journal.close()
+
+    def points(
+        self,
+        metric: str,
+        service: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        max_points: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Raw samples for a metric in time order.
+
+        With ``max_points`` each series is downsampled with LTTB before the
+        point dicts are built, so long windows cost O(max_points) to return.
+        """
+        start = parse_time_bound(start_time)
+        end = parse_time_bound(end_time)
+
+        points: List[Tuple[float, Dict[str, Any]]] = []
+        with self._lock:
+            for (name, series_service), series in self._series.items():
+                if name != metric or (service and series_service != service):
+                    continue
+                lo, hi = series.range(start, end)
+                positions = range(lo, hi)
+                if max_points and hi - lo > max_points:
+                    positions = [
+                        lo + i
+                        for i in lttb(
+                            series.times[lo:hi], series.values[lo:hi], max_points
+                        )
+                    ]
+                for position in positions:
+                    epoch = series.times[position]
+                    point = {
+                        "timestamp": _to_iso(epoch),
+                        "service": series_service,
+                        "value": series.values[position],
+                    }
+                    if series.unit:
+                        point["unit"] = series.unit
+                    points.append((epoch, point))
+
+        points.sort(key=lambda item: item[0])
+        return [point for _, point in points]
+
+    def series_samples(
+        self, start: Optional[float] = None, end: Optional[float] = None
+    ) -> List[Tuple[str, str, List[Tuple[float, float]]]]:
+        """(metric, service, [(epoch, value), ...]) for every series"""
+        with self._lock:
+            result = []
+            for (metric, service), series in self._series.items():
+                lo, hi = series.range(start, end)
+                result.append(
+                    (
+                        metric,
+                        service,
+                        list(zip(series.times[lo:hi], series.values[lo:hi])),
+                    )
+                )
+            return result
+
+    def rollups(
+        self,
+        metric: str,
+        resolution: str = "1m",
+        service: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Pre-aggregated buckets for a metric, one entry per service/bucket"""
+        if resolution not in ROLLUP_RESOLUTIONS:
+            raise ValueError(f"Unknown resolution: {resolution}")
+        start = parse_time_bound(start_time)
+        end = parse_time_bound(end_time)
+
+        results = []
+        with self._lock:
+            for (name, series_service), series in self._series.items():
+                if name != metric or (service and series_service != service):
+                    continue
+                for bucket_start in sorted(series.rollups[resolution]):
+                    if start is not None and bucket_start < start:
+                        continue
+                    if end is not None and bucket_start > end:
+                        continue
+                    bucket = series.rollups[resolution][bucket_start].to_dict(
+                        bucket_start
+                    )
+                    bucket["service"] = series_service
+                    results.append(bucket)
+
+        results.sort(key=lambda bucket: bucket["timestamp"])
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "series": len(self._series),
+                "samples": sum(len(s.times) for s in self._series.values()),
+                "rollup_buckets": sum(
+                    len(buckets)
+                    for s in self._series.values()
+                    for buckets in s.rollups.values()
+                ),
+            }
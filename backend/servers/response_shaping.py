@@ -0,0 +1,199 @@
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from store import to_epoch
+
+# Fields that identify which series a time series record belongs to
+DEFAULT_SERIES_FIELDS = ("service", "endpoint")
+
+# Rough size of an LLM token in serialized JSON, for token budgets
+CHARS_PER_TOKEN = 4
+
+# LTTB always keeps the first and last point plus one per bucket in between
+MIN_DOWNSAMPLE_POINTS = 3
+
+
+def lttb(xs: Sequence[float], ys: Sequence[float], threshold: int) -> List[int]:
+    """Largest-Triangle-Three-Buckets downsampling.
+
+    Returns the indices of at most ``threshold`` points, always including the
+    first and last. The points in between are split into equal buckets and
+    from each the point forming the largest triangle with the previously kept
+    point and the average of the next bucket is kept, which preserves peaks
+    and troughs that plain decimation or bucket averages would flatten.
+    """
+    n = len(xs)
+    if threshold >= n:
+        return list(range(n))
+    if threshold < MIN_DOWNSAMPLE_POINTS:
+        raise ValueError(f"Downsampling needs at least {MIN_DOWNSAMPLE_POINTS} points")
+
+    every = (n - 2) / (threshold - 2)
+    selected = [0]
+    a = 0
+    for i in range(threshold - 2):
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        span = avg_end - avg_start
+        avg_x = sum(xs[avg_start:avg_end]) / span
+        avg_y = sum(ys[avg_start:avg_end]) / span
+
+        best, best_area = -1, -1.0
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            area = abs(
+                (xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a])
+            )
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return selected
+
+
+def downsample(
+    records: Sequence[Dict[str, Any]],
+    max_points: Optional[int],
+    value_field: str,
+    series_fields: Sequence[str] = DEFAULT_SERIES_FIELDS,
+    time_field: str = "timestamp",
+) -> List[Dict[str, Any]]:
+    """Downsample time series records to at most ``max_points`` per series.
+
+    Records are grouped into series by ``series_fields`` and each series is
+    reduced with LTTB over (time_field, value_field). Records without a
+    parseable time or numeric value are kept, and the output preserves the
+    input order.
+    """
+    if not max_points or len(records) <= max_points:
+        return list(records)
+
+    series: Dict[Tuple[Any, ...], List[Tuple[float, float, int]]] = {}
+    keep = set()
+    for position, record in enumerate(records):
+        epoch = to_epoch(record.get(time_field))
+        value = record.get(value_field)
+        if epoch is None or not isinstance(value, (int, float)):
+            keep.add(position)
+            continue
+        key = tuple(record.get(field) for field in series_fields)
+        series.setdefault(key, []).append((epoch, float(value), position))
+
+    for points in series.values():
+        points.sort()
+        indices = lttb([p[0] for p in points], [p[1] for p in points], max_points)
+        keep.update(points[i][2] for i in indices)
+
+    return [record for position, record in enumerate(records) if position in keep]
+
+
+class InvalidCursorError(ValueError):
+    """A continuation cursor that was not issued by fit_to_budget"""
+
+
+def _encoded_size(item: Any) -> int:
+    return len(json.dumps(item, separators=(",", ":"), default=str).encode()) + 1
+
+
+def collapse(
+    items: Iterable[Dict[str, Any]],
+    key_fields: Sequence[str],
+    count_field: str = "count",
+    time_field: str = "timestamp",
+) -> List[Dict[str, Any]]:
+    """Merge items that are identical on ``key_fields`` into one with a count.
+
+    The first occurrence is kept and its ``count_field`` becomes the sum of
+    the merged counts (1 for items without one). Merged items also get the
+    first and last ``time_field`` values seen.
+    """
+    merged: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+    for item in items:
+        key = tuple(str(item.get(field)) for field in key_fields)
+        existing = merged.get(key)
+        if existing is None:
+            merged[key] = dict(item)
+            continue
+        existing[count_field] = existing.get(count_field, 1) + item.get(count_field, 1)
+        timestamp = item.get(time_field)
+        if timestamp:
+            first = existing.get("first_seen", existing.get(time_field))
+            last = existing.get("last_seen", existing.get(time_field))
+            existing["first_seen"] = min(t for t in (first, timestamp) if t)
+            existing["last_seen"] = max(t for t in (last, timestamp) if t)
+    return list(merged.values())
+
+
+def fit_to_budget(
+    items: Iterable[Dict[str, Any]],
+    max_bytes: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    cursor: Optional[str] = None,
+    collapse_fields: Optional[Sequence[str]] = None,
+    severity: Optional[Callable[[Dict[str, Any]], float]] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Shape a list of items to fit a response size budget.
+
+    Identical items (on ``collapse_fields``) are collapsed into one with a
+    count, the rest are ordered most severe first, and items are taken in
+    that order until the budget is spent. The cursor is the offset of the
+    first item not returned; passing it back continues from there, provided
+    the underlying data has not changed in between.
+
+    Args:
+        items: Items to shape
+        max_bytes: Budget for the serialized items
+        max_tokens: Budget in LLM tokens, estimated at CHARS_PER_TOKEN each
+        cursor: next_cursor of a previous response
+        collapse_fields: Fields that make two items identical
+        severity: Ranks items; higher values are returned first
+
+    Returns:
+        The items to return and a shaping summary with ``truncated`` and
+        ``next_cursor``
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed
+    """
+    try:
+        offset = int(cursor) if cursor else 0
+    except ValueError:
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}") from None
+    if offset < 0:
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}")
+
+    items = list(items)
+    raw_count = len(items)
+    if collapse_fields:
+        items = collapse(items, collapse_fields)
+    if severity:
+        # Stable, so equally severe items keep their original order
+        items.sort(key=severity, reverse=True)
+
+    budgets = [
+        budget
+        for budget in (max_bytes, max_tokens * CHARS_PER_TOKEN if max_tokens else None)
+        if budget
+    ]
+    budget = min(budgets) if budgets else None
+
+    selected = []
+    used = 0
+    position = offset
+    while position < len(items):
+        size = _encoded_size(items[position])
+        # Always return at least one item so a cursor makes progress
+        if budget is not None and selected and used + size > budget:
+            break
+        selected.append(items[position])
+        used += size
+        position += 1
+
+    truncated = position < len(items)
+    return selected, {
+        "total": len(items),
+        "collapsed_from": raw_count,
+        "returned": len(selected),
+        "truncated": truncated,
+        "next_cursor": str(position) if truncated else None,
+    }
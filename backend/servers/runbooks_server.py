@@ -6,15 +6,14 @@ from typing import Optional
 from fastapi import (
     Depends,
     FastAPI,
-    Header,
-    HTTPException,
     Query,
 )
 from fastapi import (
     Path as PathParam,
 )
 from fastapi.responses import JSONResponse
-from retrieve_api_key import retrieve_api_key
+from loop_monitor import run_blocking
+from store import Dataset, api_key_validator, install_backend, load_api_key
 
 # Configure logging with basicConfig
 logging.basicConfig(
@@ -27,27 +26,20 @@ app = FastAPI(title="DevOps Runbooks API", version="1.0.0")
 
 DATA_PATH = Path(__file__).parent.parent / "data" / "runbooks_data"
 
-# API Key for authentication
-CREDENTIAL_PROVIDER_NAME = "sre-agent-api-key-credential-provider"
-
 # Retrieve API key from credential provider at startup
-try:
-    EXPECTED_API_KEY = retrieve_api_key(CREDENTIAL_PROVIDER_NAME)
-    if not EXPECTED_API_KEY:
-        logging.error("Failed to retrieve API key from credential provider")
-        raise RuntimeError(
-            "Cannot start server without valid API key from credential provider"
-        )
-except Exception as e:
-    logging.error(f"Error retrieving API key: {e}")
-    raise RuntimeError(f"Cannot start server: {e}") from e
+EXPECTED_API_KEY = load_api_key()
+_validate_api_key = api_key_validator(EXPECTED_API_KEY)
 
+SERVER_METRICS, DATA_WATCHER, JSON_FILES = install_backend(
+    app, [DATA_PATH], dependencies=[Depends(_validate_api_key)]
+)
 
-def _validate_api_key(x_api_key: str = Header(None, alias="X-API-Key")):
-    """Validate API key from header"""
-    if not x_api_key or x_api_key != EXPECTED_API_KEY:
-        raise HTTPException(status_code=401, detail="Invalid or missing API key")
-    return x_api_key
+PLAYBOOKS = Dataset(JSON_FILES, DATA_PATH / "incident_playbooks.json", "playbooks")
+GUIDES = Dataset(JSON_FILES, DATA_PATH / "troubleshooting_guides.json", "guides")
+ESCALATION_PROCEDURES = Dataset(
+    JSON_FILES, DATA_PATH / "escalation_procedures.json", "escalation_procedures"
+)
+RESOLUTIONS = Dataset(JSON_FILES, DATA_PATH / "common_resolutions.json", "resolutions")
 
 
 @app.get("/runbooks/search")
@@ -73,36 +65,23 @@ async def search_runbooks(
             f"🔍 RUNBOOKS API: search_runbooks called - incident_type={incident_type}, keyword={keyword}, severity={severity}"
         )
 
-        with open(DATA_PATH / "incident_playbooks.json", "r") as f:
-            data = json.load(f)
-
-        runbooks = data.get("playbooks", [])
-        original_count = len(runbooks)
-
-        if incident_type:
-            runbooks = [r for r in runbooks if r.get("incident_type") == incident_type]
-            logging.info(
-                f"📋 RUNBOOKS API: Filtered by incident_type '{incident_type}': {len(runbooks)} runbooks"
-            )
-
-        if severity:
-            runbooks = [r for r in runbooks if r.get("severity") == severity]
-            logging.info(
-                f"📋 RUNBOOKS API: Filtered by severity '{severity}': {len(runbooks)} runbooks"
-            )
-
-        if keyword:
-            runbooks = [
-                r
-                for r in runbooks
-                if keyword.lower() in r.get("title", "").lower()
+        def matches_keyword(r):
+            return (
+                keyword.lower() in r.get("title", "").lower()
                 or keyword.lower() in r.get("description", "").lower()
                 or any(keyword.lower() in step.lower() for step in r.get("steps", []))
-            ]
-            logging.info(
-                f"📋 RUNBOOKS API: Filtered by keyword '{keyword}': {len(runbooks)} runbooks"
             )
 
+        runbooks = await run_blocking(
+            PLAYBOOKS.query,
+            {"incident_type": incident_type, "severity": severity},
+            where=matches_keyword if keyword else None,
+        )
+        original_count = len(PLAYBOOKS)
+        logging.info(
+            f"📋 RUNBOOKS API: Filtered by incident_type '{incident_type}', severity '{severity}', keyword '{keyword}': {len(runbooks)} runbooks"
+        )
+
         response_data = {"runbooks": runbooks}
 
         # Log detailed response
@@ -140,10 +119,7 @@ async def get_incident_playbook(
             f"🔍 RUNBOOKS API: get_incident_playbook called for playbook_id='{playbook_id}'"
         )
 
-        with open(DATA_PATH / "incident_playbooks.json", "r") as f:
-            data = json.load(f)
-
-        playbooks = data.get("playbooks", [])
+        playbooks = await run_blocking(PLAYBOOKS.query, {"id": playbook_id}, limit=1)
 
         for playbook in playbooks:
             if playbook.get("id") == playbook_id:
@@ -183,29 +159,22 @@ async def get_troubleshooting_guide(
             f"🔍 RUNBOOKS API: get_troubleshooting_guide called - category={category}, issue_type={issue_type}"
         )
 
-        with open(DATA_PATH / "troubleshooting_guides.json", "r") as f:
-            data = json.load(f)
-
-        guides = data.get("guides", [])
-        original_count = len(guides)
-
-        if category:
-            guides = [g for g in guides if g.get("category") == category]
-            logging.info(
-                f"📋 RUNBOOKS API: Filtered by category '{category}': {len(guides)} guides"
-            )
-
-        if issue_type:
-            guides = [
-                g
-                for g in guides
-                if issue_type.lower() in g.get("title", "").lower()
+        def matches_issue_type(g):
+            return (
+                issue_type.lower() in g.get("title", "").lower()
                 or issue_type.lower() in g.get("id", "").lower()
-            ]
-            logging.info(
-                f"📋 RUNBOOKS API: Filtered by issue_type '{issue_type}': {len(guides)} guides"
             )
 
+        guides = await run_blocking(
+            GUIDES.query,
+            {"category": category},
+            where=matches_issue_type if issue_type else None,
+        )
+        original_count = len(GUIDES)
+        logging.info(
+            f"📋 RUNBOOKS API: Filtered by category '{category}', issue_type '{issue_type}': {len(guides)} guides"
+        )
+
         response_data = {"guides": guides}
 
         # Log detailed response
@@ -244,24 +213,18 @@ async def get_escalation_procedures(
 ):
     """Retrieve escalation procedures"""
     try:
-        with open(DATA_PATH / "escalation_procedures.json", "r") as f:
-            data = json.load(f)
-
-        procedures = data.get("escalation_procedures", [])
 
-        if severity:
-            procedures = [p for p in procedures if p.get("severity") == severity]
+        def matches_incident_type(p):
+            return incident_type.lower() in p.get("title", "").lower() or any(
+                incident_type.lower() in condition.lower()
+                for condition in p.get("trigger_conditions", [])
+            )
 
-        if incident_type:
-            procedures = [
-                p
-                for p in procedures
-                if incident_type.lower() in p.get("title", "").lower()
-                or any(
-                    incident_type.lower() in condition.lower()
-                    for condition in p.get("trigger_conditions", [])
-                )
-            ]
+        procedures = await run_blocking(
+            ESCALATION_PROCEDURES.query,
+            {"severity": severity},
+            where=matches_incident_type if incident_type else None,
+        )
 
         return {"escalation_procedures": procedures}
     except Exception as e:
@@ -281,24 +244,21 @@ async def get_common_resolutions(
             f"🔍 RUNBOOKS API: get_common_resolutions called - issue='{issue}', service={service}"
         )
 
-        with open(DATA_PATH / "common_resolutions.json", "r") as f:
-            data = json.load(f)
-
-        resolutions = data.get("resolutions", [])
-        original_count = len(resolutions)
-
         # Filter by issue
-        matching_resolutions = []
-        for resolution in resolutions:
-            if (
+        def matches_issue(resolution):
+            return (
                 issue.lower() in resolution.get("issue", "").lower()
                 or issue.lower() in resolution.get("id", "").lower()
                 or any(
                     issue.lower() in symptom.lower()
                     for symptom in resolution.get("symptoms", [])
                 )
-            ):
-                matching_resolutions.append(resolution)
+            )
+
+        matching_resolutions = await run_blocking(
+            RESOLUTIONS.query, where=matches_issue
+        )
+        original_count = len(RESOLUTIONS)
 
         logging.info(
             f"📋 RUNBOOKS API: Found {len(matching_resolutions)} matching resolutions for issue '{issue}'"
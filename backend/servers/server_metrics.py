@@ -0,0 +1,257 @@
+import os
+import resource
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from loop_monitor import LAG_PERCENTILES, LoopLagMonitor, route_label
+
+# Request latency histogram buckets (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Response body size histogram buckets (bytes)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+GaugeValue = Union[float, Mapping[str, float]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def process_rss_bytes() -> int:
+    """Current resident set size, or the peak where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Histogram:
+    """Cumulative bucket histogram in the Prometheus layout"""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, **labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            cumulative += count
+            lines.append(
+                f"{name}_bucket{_labels(**labels, le=_format(bound))} {cumulative}"
+            )
+        lines.append(f"{name}_sum{_labels(**labels)} {_format(self.sum)}")
+        lines.append(f"{name}_count{_labels(**labels)} {self.count}")
+        return lines
+
+
+class ServerMetrics:
+    """In-process counters and histograms for one backend server.
+
+    Recording is a dict update and a bisect, cheap enough to leave on for
+    every request. Gauges such as index sizes are computed by callbacks
+    only when the metrics are scraped.
+    """
+
+    def __init__(self, loop_monitor: Optional[LoopLagMonitor] = None):
+        self.loop_monitor = loop_monitor
+        self.requests: Dict[Tuple[str, str, str], int] = {}
+        self.latency: Dict[str, Histogram] = {}
+        self.response_bytes: Dict[str, Histogram] = {}
+        self.cache_lookups: Dict[Tuple[str, str], int] = {}
+        self.dataset_reloads: Dict[str, int] = {}
+        self._gauges: List[Tuple[str, str, str, Callable[[], GaugeValue]]] = []
+
+    def observe_request(
+        self, route: str, method: str, status: int, seconds: float, size: int
+    ) -> None:
+        key = (route, method, str(status))
+        self.requests[key] = self.requests.get(key, 0) + 1
+        if route not in self.latency:
+            self.latency[route] = Histogram(LATENCY_BUCKETS)
+            self.response_bytes[route] = Histogram(SIZE_BUCKETS)
+        self.latency[route].observe(seconds)
+        self.response_bytes[route].observe(size)
+
+    def cache_lookup(self, cache: str, hit: bool) -> None:
+        key = (cache, "hit" if hit else "miss")
+        self.cache_lookups[key] = self.cache_lookups.get(key, 0) + 1
+
+    def dataset_reloaded(self, dataset: str) -> None:
+        self.dataset_reloads[dataset] = self.dataset_reloads.get(dataset, 0) + 1
+
+    def gauge(
+        self,
+        name: str,
+        help_text: str,
+        collect: Callable[[], GaugeValue],
+        label: str = "name",
+    ) -> None:
+        """Register a gauge computed at scrape time.
+
+        ``collect`` returns a single number, or a mapping of ``label`` values
+        to numbers for a labelled family such as index sizes.
+        """
+        self._gauges.append((name, help_text, label, collect))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP backend_requests_total Requests served by route, method and status",
+            "# TYPE backend_requests_total counter",
+        ]
+        for (route, method, status), count in sorted(self.requests.items()):
+            labels = _labels(route=route, method=method, status=status)
+            lines.append(f"backend_requests_total{labels} {count}")
+
+        lines += [
+            "# HELP backend_request_duration_seconds Request latency by route",
+            "# TYPE backend_request_duration_seconds histogram",
+        ]
+        for route, histogram in sorted(self.latency.items()):
+            lines += histogram.render("backend_request_duration_seconds", route=route)
+
+        lines += [
+            "# HELP backend_response_size_bytes Response body size by route",
+            "# TYPE backend_response_size_bytes histogram",
+        ]
+        for route, histogram in sorted(self.response_bytes.items()):
+            lines += histogram.render("backend_response_size_bytes", route=route)
+
+        lines += [
+            "# HELP backend_cache_lookups_total Cache lookups by cache and result",
+            "# TYPE backend_cache_lookups_total counter",
+        ]
+        for (cache, result), count in sorted(self.cache_lookups.items()):
+            labels = _labels(cache=cache, result=result)
+            lines.append(f"backend_cache_lookups_total{labels} {count}")
+        lines += [
+            "# HELP backend_cache_hit_ratio Share of cache lookups that were hits",
+            "# TYPE backend_cache_hit_ratio gauge",
+        ]
+        for cache in sorted({cache for cache, _ in self.cache_lookups}):
+            hits = self.cache_lookups.get((cache, "hit"), 0)
+            total = hits + self.cache_lookups.get((cache, "miss"), 0)
+            lines.append(
+                f"backend_cache_hit_ratio{_labels(cache=cache)} {_format(hits / total)}"
+            )
+
+        lines += [
+            "# HELP backend_dataset_reloads_total Dataset loads from disk",
+            "# TYPE backend_dataset_reloads_total counter",
+        ]
+        for dataset, count in sorted(self.dataset_reloads.items()):
+            lines.append(
+                f"backend_dataset_reloads_total{_labels(dataset=dataset)} {count}"
+            )
+
+        for name, help_text, label, collect in self._gauges:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            value = collect()
+            if isinstance(value, Mapping):
+                for key, item in sorted(value.items()):
+                    if isinstance(item, (int, float)):
+                        lines.append(f"{name}{_labels(**{label: key})} {_format(item)}")
+            else:
+                lines.append(f"{name} {_format(value)}")
+
+        if self.loop_monitor is not None:
+            lines += [
+                "# HELP backend_event_loop_lag_seconds Event loop lag over recent samples",
+                "# TYPE backend_event_loop_lag_seconds summary",
+            ]
+            percentiles = self.loop_monitor.percentiles()
+            for p in LAG_PERCENTILES:
+                labels = _labels(quantile=_format(p / 100))
+                lag = percentiles[f"p{p}"] / 1000
+                lines.append(f"backend_event_loop_lag_seconds{labels} {_format(lag)}")
+            samples = self.loop_monitor.samples
+            lines.append(f"backend_event_loop_lag_seconds_sum {_format(sum(samples))}")
+            lines.append(f"backend_event_loop_lag_seconds_count {len(samples)}")
+
+        lines += [
+            "# HELP process_resident_memory_bytes Resident memory size in bytes",
+            "# TYPE process_resident_memory_bytes gauge",
+            f"process_resident_memory_bytes {process_rss_bytes()}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Records per-route request counts, latency and response sizes"""
+
+    def __init__(self, app, metrics: ServerMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metrics.observe_request(
+                route_label(scope),
+                scope["method"],
+                status,
+                time.perf_counter() - started,
+                size,
+            )
+
+
+def install_server_metrics(
+    app: FastAPI, loop_monitor: Optional[LoopLagMonitor] = None, dependencies=None
+) -> ServerMetrics:
+    """Instrument an app and serve its metrics on /internal/metrics"""
+    metrics = ServerMetrics(loop_monitor)
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+    @app.get("/internal/metrics", dependencies=dependencies, include_in_schema=False)
+    async def get_server_metrics():
+        """Prometheus text format metrics"""
+        return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+    return metrics
@@ -0,0 +1,130 @@
+import logging
+import secrets
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Number of snapshot diffs kept per dataset
+DEFAULT_HISTORY_SIZE = 64
+
+# Versions are <epoch> << EPOCH_SHIFT | <update count>. The epoch is random
+# per process, so a version from before a restart never matches the current
+# history; 20 epoch bits keep versions below 2**53 for JSON clients.
+EPOCH_SHIFT = 32
+EPOCH_BITS = 20
+PROCESS_EPOCH = secrets.randbelow(2**EPOCH_BITS - 1) + 1
+
+ObjectKey = Tuple[str, str]
+Delta = Tuple[List[Dict[str, Any]], List[Dict[str, str]]]
+
+
+def _object_key(obj: Dict[str, Any]) -> ObjectKey:
+    return (obj.get("namespace") or "", obj.get("name", ""))
+
+
+class SnapshotDiff:
+    """Objects added, changed and removed between two consecutive versions"""
+
+    __slots__ = ("version", "upserted", "removed")
+
+    def __init__(self, version: int):
+        self.version = version
+        self.upserted: List[ObjectKey] = []
+        self.removed: List[ObjectKey] = []
+
+
+class SnapshotHistory:
+    """Versioned snapshots of one object list with a bounded diff history.
+
+    Every update that changes the list bumps the version and records which
+    objects were upserted or removed. ``delta`` folds the diffs since a
+    client's last seen version into one net change, so polling an unchanged
+    dataset returns nothing but the version. Versions carry the process
+    epoch, so clients whose version has fallen out of the history or comes
+    from before a restart get a full snapshot. Updates may run on another
+    thread than reads; ``read`` returns a consistent version and contents.
+    """
+
+    def __init__(
+        self, max_history: int = DEFAULT_HISTORY_SIZE, epoch: int = PROCESS_EPOCH
+    ):
+        self.epoch = epoch
+        self.version = epoch << EPOCH_SHIFT
+        self.objects: Dict[ObjectKey, Dict[str, Any]] = {}
+        self._history: Deque[SnapshotDiff] = deque(maxlen=max_history)
+        self._lock = threading.Lock()
+
+    @property
+    def initial_version(self) -> int:
+        """Version before the first snapshot"""
+        return self.epoch << EPOCH_SHIFT
+
+    def update(self, objects: Iterable[Dict[str, Any]]) -> bool:
+        """Replace the snapshot, returning True if anything changed"""
+        current = {_object_key(obj): obj for obj in objects}
+        with self._lock:
+            first = self.version == self.initial_version
+            diff = SnapshotDiff(self.version + 1)
+            for key, obj in current.items():
+                if self.objects.get(key) != obj:
+                    diff.upserted.append(key)
+            diff.removed = [key for key in self.objects if key not in current]
+
+            if not first and not diff.upserted and not diff.removed:
+                return False
+
+            self.objects = current
+            self.version = diff.version
+            # The first snapshot has nothing to diff against
+            if not first:
+                self._history.append(diff)
+        logger.info(
+            f"Snapshot version {diff.version}: {len(diff.upserted)} upserted, "
+            f"{len(diff.removed)} removed"
+        )
+        return True
+
+    def read(
+        self, since_version: Optional[int] = None
+    ) -> Tuple[int, List[Dict[str, Any]], Optional[Delta]]:
+        """Current version, objects and the delta since a version, read together.
+
+        The delta is None when since_version is None or unknown; callers then
+        return the objects as a full snapshot.
+        """
+        with self._lock:
+            delta = self._delta(since_version) if since_version is not None else None
+            return self.version, list(self.objects.values()), delta
+
+    def delta(self, since_version: int) -> Optional[Delta]:
+        """Net (upserted objects, removed keys) since a version.
+
+        Returns None when the version is unknown and a full snapshot is needed.
+        """
+        with self._lock:
+            return self._delta(since_version)
+
+    def _delta(self, since_version: int) -> Optional[Delta]:
+        if since_version >> EPOCH_SHIFT != self.epoch:
+            return None
+        if since_version == self.version:
+            return [], []
+        oldest = self._history[0].version if self._history else self.version + 1
+        if since_version > self.version or since_version < oldest - 1:
+            return None
+
+        touched = set()
+        for diff in self._history:
+            if diff.version > since_version:
+                touched.update(diff.upserted)
+                touched.update(diff.removed)
+
+        upserted = [self.objects[key] for key in sorted(touched) if key in self.objects]
+        removed = [
+            {"namespace": namespace, "name": name} if namespace else {"name": name}
+            for namespace, name in sorted(touched)
+            if (namespace, name) not in self.objects
+        ]
+        return upserted, removed
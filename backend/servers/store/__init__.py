@@ -0,0 +1,33 @@
+"""Shared data access for the backend servers.
+
+A Dataset is a list of records read through a pluggable Engine, indexed
+and versioned, and queried with filters, time ranges, projection and
+pagination. Changes to loading, indexing or filtering made here apply to
+every server at once.
+"""
+
+from .app import install_backend
+from .auth import CREDENTIAL_PROVIDER_NAME, api_key_validator, load_api_key
+from .dataset import Dataset
+from .engines import Engine, JsonFileEngine, MemoryEngine
+from .query import filter_by_time, matches_filters, paginate, parse_fields, project
+from .timestamps import InvalidTimeRangeError, parse_time_bound, to_epoch
+
+__all__ = [
+    "Dataset",
+    "Engine",
+    "JsonFileEngine",
+    "MemoryEngine",
+    "install_backend",
+    "CREDENTIAL_PROVIDER_NAME",
+    "api_key_validator",
+    "load_api_key",
+    "filter_by_time",
+    "matches_filters",
+    "paginate",
+    "parse_fields",
+    "project",
+    "InvalidTimeRangeError",
+    "parse_time_bound",
+    "to_epoch",
+]
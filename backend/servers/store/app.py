@@ -0,0 +1,31 @@
+from pathlib import Path
+from typing import Iterable, Tuple
+
+from data_watcher import DataWatcher, JsonFileCache, install_data_watcher
+from fastapi import FastAPI
+from loop_monitor import install_loop_monitor
+from server_metrics import ServerMetrics, install_server_metrics
+
+from .engines import JsonFileEngine
+
+
+def install_backend(
+    app: FastAPI, directories: Iterable[Path], dependencies=None
+) -> Tuple[ServerMetrics, DataWatcher, JsonFileEngine]:
+    """Instrument a backend server and serve its data directories.
+
+    Installs the event loop monitor and /internal/metrics, watches the data
+    directories, and returns a JSON file engine whose loads and cache
+    lookups are reported in the server metrics.
+    """
+    loop_monitor = install_loop_monitor(app, dependencies=dependencies)
+    metrics = install_server_metrics(app, loop_monitor, dependencies=dependencies)
+    watcher = install_data_watcher(app, directories)
+    engine = JsonFileEngine(
+        JsonFileCache(
+            watcher,
+            on_load=lambda path: metrics.dataset_reloaded(path.stem),
+            on_lookup=lambda hit: metrics.cache_lookup(JsonFileEngine.name, hit),
+        )
+    )
+    return metrics, watcher, engine
@@ -0,0 +1,41 @@
+import logging
+from typing import Callable
+
+from fastapi import Header, HTTPException
+
+# Credential provider holding the API key shared by the backend servers
+CREDENTIAL_PROVIDER_NAME = "sre-agent-api-key-credential-provider"
+
+
+def load_api_key(credential_provider_name: str = CREDENTIAL_PROVIDER_NAME) -> str:
+    """Retrieve the API key from the credential provider at startup.
+
+    Raises RuntimeError when no key can be retrieved, as a server must not
+    start without one.
+    """
+    # Imported here so the store can be used without the AWS SDK configured
+    from retrieve_api_key import retrieve_api_key
+
+    try:
+        api_key = retrieve_api_key(credential_provider_name)
+        if not api_key:
+            logging.error("Failed to retrieve API key from credential provider")
+            raise RuntimeError(
+                "Cannot start server without valid API key from credential provider"
+            )
+    except Exception as e:
+        logging.error(f"Error retrieving API key: {e}")
+        raise RuntimeError(f"Cannot start server: {e}") from e
+    return api_key
+
+
+def api_key_validator(expected_api_key: str) -> Callable[..., str]:
+    """FastAPI dependency checking the X-API-Key header against a key"""
+
+    def validate_api_key(x_api_key: str = Header(None, alias="X-API-Key")):
+        """Validate API key from header"""
+        if not x_api_key or x_api_key != expected_api_key:
+            raise HTTPException(status_code=401, detail="Invalid or missing API key")
+        return x_api_key
+
+    return validate_api_key
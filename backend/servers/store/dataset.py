@@ -0,0 +1,144 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Mapping, Optional, Sequence
+
+from .engines import Engine
+from .query import filter_by_time, matches_filters, paginate, project
+
+Record = Dict[str, Any]
+Index = Dict[Any, List[Record]]
+
+_UNLOADED = object()
+
+
+class _Snapshot:
+    """Records of one version of a source document and their indexes"""
+
+    __slots__ = ("document", "records", "version", "indexes")
+
+    def __init__(self, document: Any, records: List[Record], version: int):
+        self.document = document
+        self.records = records
+        self.version = version
+        self.indexes: Dict[str, Index] = {}
+
+
+class Dataset:
+    """A list of records within a source document, e.g. "events" in events.json.
+
+    Records are read through a pluggable engine and kept together with
+    lazily built hash indexes on the fields queries filter by. When the
+    engine hands back a new document the version is bumped and the indexes
+    are dropped, so an equality filter costs one dict lookup until the data
+    changes. A reload swaps in a new snapshot, so concurrent queries see
+    either the old or the new records, never a mix.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        source: Hashable,
+        key: Optional[str] = None,
+        time_field: str = "timestamp",
+        required: bool = True,
+    ):
+        self.engine = engine
+        self.source = source
+        self.key = key
+        self.time_field = time_field
+        self.required = required
+        self._snapshot = _Snapshot(_UNLOADED, [], 0)
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        """Incremented every time a changed source document is loaded"""
+        return self._snapshot.version
+
+    def __len__(self) -> int:
+        """Number of records as of the last load or query"""
+        return len(self._snapshot.records)
+
+    def _records_of(self, document: Any) -> List[Record]:
+        if document is None:
+            return []
+        if self.key is None:
+            return document if isinstance(document, list) else []
+        return document.get(self.key, []) if isinstance(document, dict) else []
+
+    def _refresh(self) -> _Snapshot:
+        document = self.engine.read(self.source)
+        if document is None and self.required:
+            raise FileNotFoundError(f"Dataset source not found: {self.source}")
+
+        snapshot = self._snapshot
+        if document is snapshot.document:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if document is not snapshot.document:
+                snapshot = _Snapshot(
+                    document, self._records_of(document), snapshot.version + 1
+                )
+                self._snapshot = snapshot
+            return snapshot
+
+    def load(self) -> List[Record]:
+        """All records, reloaded if the source changed"""
+        return self._refresh().records
+
+    def document(self) -> Any:
+        """The whole source document, for sources that are not a record list"""
+        return self._refresh().document
+
+    def _index(self, snapshot: _Snapshot, field: str) -> Index:
+        index = snapshot.indexes.get(field)
+        if index is None:
+            index = {}
+            for record in snapshot.records:
+                try:
+                    index.setdefault(record.get(field), []).append(record)
+                except TypeError:
+                    # Unhashable values never equal a query parameter
+                    continue
+            snapshot.indexes[field] = index
+        return index
+
+    def index(self, field: str) -> Index:
+        """Records grouped by the value of a field"""
+        return self._index(self._refresh(), field)
+
+    def query(
+        self,
+        filters: Optional[Mapping[str, Any]] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        where: Optional[Callable[[Record], bool]] = None,
+        fields: Optional[Sequence[str]] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[Record]:
+        """Records matching every filter, in source order.
+
+        ``filters`` maps fields to the value they must equal; None values are
+        ignored so optional query parameters can be passed straight through.
+        The time range applies to ``time_field``, ``where`` is any further
+        predicate, and ``fields`` projects the page of records returned.
+        """
+        snapshot = self._refresh()
+        filters = {f: v for f, v in (filters or {}).items() if v is not None}
+
+        if filters:
+            # Start from the smallest index bucket and check the rest per record
+            candidates = min(
+                (self._index(snapshot, f).get(v, []) for f, v in filters.items()),
+                key=len,
+            )
+            records = [r for r in candidates if matches_filters(r, filters)]
+        else:
+            records = snapshot.records
+
+        if start_time or end_time:
+            records = filter_by_time(records, start_time, end_time, self.time_field)
+        if where is not None:
+            records = [r for r in records if where(r)]
+        return project(paginate(records, offset, limit), fields)
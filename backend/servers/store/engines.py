@@ -0,0 +1,51 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Hashable, Optional
+
+from data_watcher import JsonFileCache
+
+
+class Engine(ABC):
+    """Where datasets read their source documents from.
+
+    ``read`` returns the parsed document or None when the source does not
+    exist. An engine must return the same object until the source changes
+    and a new object afterwards, which is how datasets notice a reload
+    without comparing contents.
+    """
+
+    name = "engine"
+
+    @abstractmethod
+    def read(self, source: Hashable) -> Optional[Any]:
+        """The parsed source document, None when it does not exist"""
+
+
+class JsonFileEngine(Engine):
+    """JSON data files, parsed once and refreshed by the data watcher"""
+
+    name = "json_files"
+
+    def __init__(self, cache: Optional[JsonFileCache] = None):
+        self.cache = cache if cache is not None else JsonFileCache()
+
+    def read(self, source: Hashable) -> Optional[Any]:
+        try:
+            return self.cache.get(source)
+        except FileNotFoundError:
+            return None
+
+
+class MemoryEngine(Engine):
+    """Documents held in memory, e.g. for tests or data pushed over the API"""
+
+    name = "memory"
+
+    def __init__(self, documents: Optional[Dict[Hashable, Any]] = None):
+        self.documents: Dict[Hashable, Any] = dict(documents or {})
+
+    def read(self, source: Hashable) -> Optional[Any]:
+        return self.documents.get(source)
+
+    def put(self, source: Hashable, document: Any) -> None:
+        """Replace a source document; datasets reading it reload on next access"""
+        self.documents[source] = document
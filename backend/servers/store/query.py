@@ -0,0 +1,88 @@
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from .timestamps import parse_time_bound, to_epoch
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Split a comma separated ``fields=`` query parameter"""
+    if not fields:
+        return None
+    parsed = [field.strip() for field in fields.split(",") if field.strip()]
+    return parsed or None
+
+
+def _project_one(record: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+    projected: Dict[str, Any] = {}
+    for field in fields:
+        value: Any = record
+        path = field.split(".")
+        for part in path:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = projected
+            for part in path[:-1]:
+                target = target.setdefault(part, {})
+            target[path[-1]] = value
+    return projected
+
+
+def project(
+    records: Iterable[Dict[str, Any]], fields: Optional[Sequence[str]]
+) -> List[Dict[str, Any]]:
+    """Keep only the requested fields of each record.
+
+    Dotted names select nested values ("resource_usage.cpu") and keep their
+    nesting in the output. Fields a record does not have are left out rather
+    than returned as nulls. With no fields the records are returned as is.
+    """
+    if not fields:
+        return list(records)
+    return [_project_one(record, fields) for record in records]
+
+
+def matches_filters(record: Dict[str, Any], filters: Mapping[str, Any]) -> bool:
+    """Whether a record equals every filter value"""
+    return all(record.get(field) == value for field, value in filters.items())
+
+
+def filter_by_time(
+    records: Iterable[Dict[str, Any]],
+    start_time: Optional[str] = None,
+    end_time: Optional[str] = None,
+    time_field: str = "timestamp",
+) -> List[Dict[str, Any]]:
+    """Records whose timestamp falls within [start_time, end_time].
+
+    Once a bound is given, records without a timestamp are dropped while
+    records whose timestamp cannot be parsed are kept. An unparseable bound
+    raises InvalidTimeRangeError.
+    """
+    start = parse_time_bound(start_time)
+    end = parse_time_bound(end_time)
+    if start is None and end is None:
+        return list(records)
+
+    filtered = []
+    for record in records:
+        timestamp = record.get(time_field)
+        if not timestamp:
+            continue
+        epoch = to_epoch(timestamp)
+        if epoch is not None:
+            if start is not None and epoch < start:
+                continue
+            if end is not None and epoch > end:
+                continue
+        filtered.append(record)
+    return filtered
+
+
+def paginate(
+    records: List[Any], offset: int = 0, limit: Optional[int] = None
+) -> List[Any]:
+    """One page of records"""
+    if limit is None:
+        return records[offset:] if offset else records
+    return records[offset : offset + limit]
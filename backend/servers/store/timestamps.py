@@ -0,0 +1,45 @@
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+
+def to_epoch(timestamp: Any) -> Optional[float]:
+    """Convert an ISO timestamp string or epoch number to epoch seconds.
+
+    Timestamps without a timezone are taken as UTC. Returns None for missing
+    or unparseable timestamps instead of raising, so callers decide whether
+    such records are kept or dropped.
+    """
+    if isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool):
+        # Remote-write samples carry milliseconds
+        return timestamp / 1000 if timestamp > 1e11 else float(timestamp)
+    if not isinstance(timestamp, str) or not timestamp:
+        return None
+    try:
+        if timestamp.endswith("Z"):
+            timestamp = timestamp[:-1] + "+00:00"
+        dt = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+class InvalidTimeRangeError(ValueError):
+    """A query time bound that is not a timestamp"""
+
+
+def parse_time_bound(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds of a query time bound, None when it is not given.
+
+    An unparseable bound raises instead of being dropped, which would widen
+    the query to every record.
+    """
+    if not value:
+        return None
+    epoch = to_epoch(value)
+    if epoch is None:
+        raise InvalidTimeRangeError(
+            f"Invalid time bound {value!r}, expected an ISO 8601 timestamp"
+        )
+    return epoch
@@ -14,7 +14,7 @@ from langgraph.prebuilt import create_react_agent
 from .agent_state import AgentState
 from .constants import AgentMetadata
 from .llm_utils import create_llm_with_error_handling
-from .memory import SREMemoryClient, create_conversation_memory_manager
+from .memory import create_conversation_memory_manager, get_memory_client
 from .prompt_loader import prompt_loader
 
 # Logging will be configured by the main entry point
@@ -164,6 +164,15 @@ class BaseAgentNode:
                 f"As the {self.name}, help with: {state.get('current_query', '')}"
             )
 
+            # Hand over the findings of the plan steps this agent depends on
+            upstream_results = state.get("upstream_results", {}).get(
+                self._get_agent_type(), {}
+            )
+            if upstream_results:
+                agent_prompt += "\n\nFindings from earlier investigation steps:"
+                for agent_name, result in upstream_results.items():
+                    agent_prompt += f"\n\n[{agent_name}]\n{result}"
+
             # If auto_approve_plan is set, add instruction to not ask follow-up questions
             if state.get("auto_approve_plan", False):
                 agent_prompt += "\n\nIMPORTANT: Provide a complete, actionable response without asking any follow-up questions. Do not ask if the user wants more details or if they would like you to investigate further."
@@ -179,7 +188,7 @@ class BaseAgentNode:
                 try:
                     # Get region from llm_kwargs if available
                     region = self.llm_kwargs.get("region_name", "us-east-1") if self.llm_provider == "bedrock" else "us-east-1"
-                    memory_client = SREMemoryClient(region=region)
+                    memory_client = get_memory_client(region=region)
                     conversation_manager = create_conversation_memory_manager(
                         memory_client
                     )
@@ -357,16 +366,16 @@ class BaseAgentNode:
 
                     if success:
                         logger.info(
-                            f"{self.name} - Successfully stored {len(messages_to_store)} conversation messages"
+                            f"{self.name} - Queued {len(messages_to_store)} conversation messages for storage"
                         )
                     else:
                         logger.warning(
-                            f"{self.name} - Failed to store conversation messages"
+                            f"{self.name} - Failed to queue conversation messages"
                         )
 
                 except Exception as e:
                     logger.error(
-                        f"{self.name} - Error storing conversation messages: {e}",
+                        f"{self.name} - Error queuing conversation messages: {e}",
                         exc_info=True,
                     )
 
@@ -376,10 +385,10 @@ class BaseAgentNode:
                     # Check if memory hooks are available through the memory client
                     from .memory.hooks import MemoryHookProvider
 
-                    # Use the SREMemoryClient that's already imported at the top
+                    # Use the shared memory client that's already imported at the top
                     # Get region from llm_kwargs if available
                     region = self.llm_kwargs.get("region_name", "us-east-1") if self.llm_provider == "bedrock" else "us-east-1"
-                    memory_client = SREMemoryClient(region=region)
+                    memory_client = get_memory_client(region=region)
                     memory_hooks = MemoryHookProvider(memory_client)
 
                     # Create response object for hooks
@@ -409,16 +418,13 @@ class BaseAgentNode:
                         f"{self.name} - Failed to process agent response for memory patterns: {e}"
                     )
 
-            # Update state with streaming info
+            # Return only this agent's additions; the state reducers merge
+            # them with those of agents running in parallel
             return {
-                "agent_results": {
-                    **state.get("agent_results", {}),
-                    self.name: agent_response,
-                },
-                "agents_invoked": state.get("agents_invoked", []) + [self.name],
-                "messages": messages + all_messages,
+                "agent_results": {self.name: agent_response},
+                "agents_invoked": [self.name],
+                "messages": all_messages,
                 "metadata": {
-                    **state.get("metadata", {}),
                     f"{self.name.replace(' ', '_')}_trace": all_messages,
                 },
             }
@@ -426,11 +432,8 @@ class BaseAgentNode:
         except Exception as e:
             logger.error(f"Error in {self.name}: {e}")
             return {
-                "agent_results": {
-                    **state.get("agent_results", {}),
-                    self.name: f"Error: {str(e)}",
-                },
-                "agents_invoked": state.get("agents_invoked", []) + [self.name],
+                "agent_results": {self.name: f"Error: {str(e)}"},
+                "agents_invoked": [self.name],
             }
 
 
@@ -16,11 +16,25 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def merge_dicts(left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]):
+    """Reducer merging dict updates, so parallel agents can each add their keys."""
+    return {**(left or {}), **(right or {})}
+
+
+def append_unique(left: Optional[List[str]], right: Optional[List[str]]):
+    """Reducer appending list updates while keeping each item once, in order."""
+    merged = list(left or [])
+    merged.extend(item for item in right or [] if item not in merged)
+    return merged
+
+
 class AgentState(TypedDict):
     """State shared across all agents in the multi-agent system.
 
     This state is passed between agents and maintains conversation history,
-    intermediate results, and routing information.
+    intermediate results, and routing information. Fields that agents running
+    in parallel write to are merged with reducers, so each agent returns only
+    its own additions.
     """
 
     # Conversation messages using LangGraph's message annotation
@@ -29,20 +43,26 @@ class AgentState(TypedDict):
     # Which agent should act next (set by supervisor)
     next: Literal["kubernetes", "logs", "metrics", "runbooks", "FINISH"]
 
+    # Agents the supervisor dispatches together in the next step
+    next_agents: List[str]
+
+    # Results of the plan steps each dispatched agent depends on, by agent type
+    upstream_results: Dict[str, Dict[str, Any]]
+
     # Intermediate results from each agent
-    agent_results: Dict[str, Any]
+    agent_results: Annotated[Dict[str, Any], merge_dicts]
 
     # Current query being processed
     current_query: Optional[str]
 
     # Metadata about the conversation
-    metadata: Dict[str, Any]
+    metadata: Annotated[Dict[str, Any], merge_dicts]
 
     # Flag to indicate if we need multiple agents
     requires_collaboration: bool
 
     # List of agents that have already responded
-    agents_invoked: List[str]
+    agents_invoked: Annotated[List[str], append_unique]
 
     # Final aggregated response (set by supervisor)
     final_response: Optional[str]
@@ -201,6 +201,63 @@ class MemoryConfig(BaseModel):
         description="Maximum number of past investigation memories to retrieve",
     )
 
+    retrieval_timeout_seconds: float = Field(
+        default=5.0,
+        gt=0,
+        description="How long investigation start waits for memory retrievals before continuing without the missing ones",
+    )
+
+    retrieval_cache_ttl_seconds: float = Field(
+        default=60.0,
+        ge=0,
+        description="How long memory retrieval results are reused before being fetched again",
+    )
+
+    retrieval_cache_max_entries: int = Field(
+        default=256,
+        ge=1,
+        description="Maximum number of memory retrieval results kept in the cache",
+    )
+
+    parsed_record_cache_max_entries: int = Field(
+        default=1024,
+        ge=1,
+        description="Maximum number of parsed memory records kept for reuse across retrievals",
+    )
+
+    # Memory context in the planning prompt
+    context_token_budget: int = Field(
+        default=2000,
+        ge=100,
+        description="Approximate number of tokens of memory context given to the planning prompt",
+    )
+
+    context_max_item_chars: int = Field(
+        default=600,
+        ge=50,
+        description="Maximum characters of a single memory record in the planning prompt",
+    )
+
+    context_relevance_weight: float = Field(
+        default=0.7,
+        ge=0.0,
+        le=1.0,
+        description="Weight of query relevance against recency when ranking memory records",
+    )
+
+    context_recency_half_life_days: float = Field(
+        default=30.0,
+        gt=0,
+        description="Age in days at which a memory record's recency score halves",
+    )
+
+    context_duplicate_similarity: float = Field(
+        default=0.8,
+        gt=0.0,
+        le=1.0,
+        description="Term overlap at which a memory record counts as a near-duplicate of a higher ranked one",
+    )
+
     # Content length limits for memory storage
     max_content_length: int = Field(
         default=9000,
@@ -209,6 +266,32 @@ class MemoryConfig(BaseModel):
         description="Maximum character length for conversation content stored in memory",
     )
 
+    # Background writing of memory events
+    max_pending_events: int = Field(
+        default=1000,
+        ge=1,
+        description="Maximum number of memory events buffered for background writing",
+    )
+
+    event_batch_size: int = Field(
+        default=50,
+        ge=1,
+        le=100,
+        description="Maximum number of messages written in one create_event call",
+    )
+
+    event_batch_linger_seconds: float = Field(
+        default=0.5,
+        ge=0,
+        description="How long the background writer waits for more events to coalesce",
+    )
+
+    event_write_retries: int = Field(
+        default=3,
+        ge=0,
+        description="Retries, with exponential backoff, of a failed memory event write",
+    )
+
 
 class AgentsConstant(BaseModel):
     """Agent-specific constants for the SRE system."""
@@ -227,6 +310,11 @@ class AgentsConstant(BaseModel):
         default="sre-session", description="Prefix used for session IDs"
     )
 
+    max_parallel_agents: int = Field(
+        default=3,
+        description="Maximum number of agents the supervisor runs in parallel for one plan wave",
+    )
+
     memory_types: dict[str, str] = Field(
         default={
             "preferences": "preferences",
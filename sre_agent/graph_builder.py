@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 
 import logging
-from typing import Any, Dict, List, Literal
+from typing import Any, Dict, List, Literal, Union
 
 from langchain_core.messages import HumanMessage
 from langchain_core.tools import BaseTool
 from langgraph.graph import END, StateGraph
+from langgraph.types import Send
 
 from .agent_nodes import (
     create_kubernetes_agent,
@@ -43,8 +44,13 @@ def _should_continue(state: AgentState) -> Literal["supervisor", "FINISH"]:
     return "supervisor"
 
 
-def _route_supervisor(state: AgentState) -> str:
-    """Route from supervisor to the appropriate agent or finish."""
+def _route_supervisor(state: AgentState) -> Union[str, List[Send]]:
+    """Route from supervisor to the appropriate agents or finish.
+
+    When the supervisor dispatches several independent agents at once they
+    are sent in parallel; their updates are merged by the AgentState
+    reducers before control returns to the supervisor.
+    """
     next_agent = state.get("next", "FINISH")
 
     if next_agent == "FINISH":
@@ -63,7 +69,17 @@ def _route_supervisor(state: AgentState) -> str:
         "runbooks_agent": "runbooks_agent",
     }
 
-    return agent_map.get(next_agent, "aggregate")
+    nodes = []
+    for agent in state.get("next_agents") or [next_agent]:
+        node = agent_map.get(agent)
+        if node and node not in nodes:
+            nodes.append(node)
+
+    if not nodes:
+        return "aggregate"
+    if len(nodes) == 1:
+        return nodes[0]
+    return [Send(node, state) for node in nodes]
 
 
 async def _prepare_initial_state(state: AgentState) -> Dict[str, Any]:
@@ -77,12 +93,12 @@ async def _prepare_initial_state(state: AgentState) -> Dict[str, Any]:
             current_query = msg.content
             break
 
+    # agent_results, agents_invoked and metadata have merging reducers, so
+    # returning empty values here would not reset them. The graph has no
+    # checkpointer and every run starts from a fresh initial state instead.
     return {
         "current_query": current_query,
-        "agent_results": {},
-        "agents_invoked": [],
         "requires_collaboration": False,
-        "metadata": {},
     }
 
 
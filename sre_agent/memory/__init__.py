@@ -1,6 +1,6 @@
 """Memory module for SRE Agent long-term memory capabilities."""
 
-from .client import SREMemoryClient
+from .client import SREMemoryClient, get_memory_client
 from .config import MemoryConfig
 from .conversation_manager import (
     ConversationMemoryManager,
@@ -21,6 +21,7 @@ from .tools import (
 
 __all__ = [
     "SREMemoryClient",
+    "get_memory_client",
     "MemoryConfig",
     "UserPreference",
     "InfrastructureKnowledge",
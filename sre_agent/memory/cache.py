@@ -0,0 +1,171 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Configure logging with basicConfig
+logging.basicConfig(
+    level=logging.INFO,  # Set the log level to INFO
+    # Define log message format
+    format="%(asctime)s,p%(process)s,{%(filename)s:%(lineno)d},%(levelname)s,%(message)s",
+)
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, int]
+RecordKey = Tuple[str, str, str, bytes]
+
+
+class RetrievalCache:
+    """TTL and LRU cache of memory retrieval results.
+
+    Entries are keyed by (namespace, query, top_k) and expire ttl_seconds
+    after they were stored; past max_entries the least recently used entry
+    is evicted. Writes made by this process invalidate the namespaces they
+    affect, so the process reads its own writes once the memory has
+    extracted them. A ttl_seconds of 0 disables caching.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, Tuple[float, List[Dict[str, Any]]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(
+        self, namespace: str, query: str, top_k: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Cached records for a retrieval, or None on a miss."""
+        key = (namespace, query, top_k)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[1])
+
+    def put(
+        self, namespace: str, query: str, top_k: int, records: List[Dict[str, Any]]
+    ) -> None:
+        """Store the records a retrieval returned."""
+        key = (namespace, query, top_k)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, list(records))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, namespace: str) -> int:
+        """Drop entries for a namespace and the namespaces below it."""
+        prefix = namespace.rstrip("/") + "/"
+        with self._lock:
+            stale = [
+                key
+                for key in self._entries
+                if key[0] == namespace or key[0].startswith(prefix)
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        if stale:
+            logger.debug(f"Invalidated {len(stale)} cached retrievals for {namespace}")
+        return len(stale)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss, eviction and invalidation counts and the hit rate."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+class ParsedRecordCache:
+    """LRU cache of memory records parsed into their Pydantic models.
+
+    Entries are keyed by record kind, a scope the parsed model depends on
+    (such as the user id), the memoryRecordId and a hash of the record
+    content, so a record whose content changes is parsed again. Records
+    without a memoryRecordId are not cached. Cached models are shared
+    between callers and must not be modified.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[RecordKey, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(kind: str, record: Dict[str, Any], scope: str = "") -> Optional[RecordKey]:
+        """Cache key for a retrieved record, or None if it cannot be cached."""
+        record_id = record.get("memoryRecordId")
+        if not record_id:
+            return None
+        content = record.get("content")
+        if isinstance(content, dict) and isinstance(content.get("text"), str):
+            serialized = content["text"]
+        else:
+            serialized = json.dumps(content, sort_keys=True, default=str)
+        digest = hashlib.blake2b(serialized.encode(), digest_size=16).digest()
+        return (kind, scope, record_id, digest)
+
+    def get(self, key: RecordKey) -> Optional[Any]:
+        """Parsed model for a record, or None on a miss."""
+        with self._lock:
+            parsed = self._entries.get(key)
+            if parsed is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return parsed
+
+    def put(self, key: RecordKey, parsed: Any) -> None:
+        """Store the model parsed from a record."""
+        with self._lock:
+            self._entries[key] = parsed
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counts and the hit rate."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
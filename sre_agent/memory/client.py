@@ -1,10 +1,16 @@
+import json
 import logging
+import threading
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from bedrock_agentcore.memory import MemoryClient
 
+from ..constants import SREConstants
+from .cache import RetrievalCache
 from .config import _load_memory_config
+from .local_backend import LocalMemoryClient
+from .write_queue import MemoryWriteQueue
 
 # Configure logging with basicConfig
 logging.basicConfig(
@@ -15,6 +21,17 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Files written to the project root after the memory is found or created
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+MEMORY_ID_FILE = PROJECT_ROOT / ".memory_id"
+MEMORY_MANIFEST_FILE = PROJECT_ROOT / ".memory_manifest.json"
+
+STRATEGY_NAMES = (
+    "user_preferences",
+    "infrastructure_knowledge",
+    "investigation_summaries",
+)
+
 
 class SREMemoryClient:
     """Wrapper for AgentCore Memory client tailored for SRE operations."""
@@ -25,20 +42,111 @@ class SREMemoryClient:
         region: str = "us-east-1",
         force_delete: bool = False,
     ):
-        self.client = MemoryClient(region_name=region)
-        self.memory_name = memory_name
         self.config = _load_memory_config()
+        if self.config.backend == "local":
+            self.client = LocalMemoryClient(self.config.local_path)
+        else:
+            self.client = MemoryClient(region_name=region)
+        self.memory_name = memory_name
         self.memory_ids = {}
         self.force_delete = force_delete
+        self._validation_thread: Optional[threading.Thread] = None
+        self.write_queue = MemoryWriteQueue(
+            self._create_event,
+            max_pending=SREConstants.memory.max_pending_events,
+            max_batch_messages=SREConstants.memory.event_batch_size,
+            linger_seconds=SREConstants.memory.event_batch_linger_seconds,
+            max_retries=SREConstants.memory.event_write_retries,
+        )
+        self.retrieval_cache = RetrievalCache(
+            ttl_seconds=SREConstants.memory.retrieval_cache_ttl_seconds,
+            max_entries=SREConstants.memory.retrieval_cache_max_entries,
+        )
         self._initialize_memories()
 
     def _initialize_memories(self):
         """Initialize different memory strategies."""
+        if not self.force_delete and not self._is_local and self._use_cached_memory():
+            return
+        self._discover_memories()
+
+    @property
+    def _is_local(self) -> bool:
+        """Whether memory is kept in the local SQLite backend instead of AgentCore."""
+        return self.config.backend == "local"
+
+    def _use_cached_memory(self) -> bool:
+        """Start from the persisted memory id without control plane calls.
+
+        The memory id comes from the config, or from the .memory_id file when
+        the manifest written with it lists every strategy. The memory is then
+        validated in a background thread, falling back to full discovery if
+        it is gone or incomplete.
+        """
+        memory_id = self.config.memory_id
+        if not memory_id:
+            memory_id = self._read_memory_id_from_file()
+            if not memory_id:
+                return False
+
+            manifest = self._read_memory_manifest()
+            cached_strategies = set(manifest.get("strategies", []))
+            if manifest.get("memory_id") != memory_id or not (
+                cached_strategies.issuperset(STRATEGY_NAMES)
+            ):
+                logger.info(f"No strategy manifest for memory {memory_id}")
+                return False
+
+        self.memory_id = memory_id
+        logger.info(f"Using cached memory: {self.memory_id}, validating in background")
+        self._validation_thread = threading.Thread(
+            target=self._validate_cached_memory, name="memory-validation", daemon=True
+        )
+        self._validation_thread.start()
+        return True
+
+    def _validate_cached_memory(self) -> None:
+        """Check that the cached memory still exists with all its strategies.
+
+        Only a memory that is gone or missing strategies is repaired; on any
+        other error, such as throttling or a timeout, the cached id is kept.
+        """
+        try:
+            memory = self._get_memory(self.memory_id)
+        except Exception as e:
+            if not _is_memory_not_found(e):
+                logger.warning(
+                    f"Could not validate cached memory {self.memory_id}, keeping it: {e}"
+                )
+                return
+            logger.warning(f"Cached memory {self.memory_id} no longer exists: {e}")
+            self._discover_memories()
+            return
+
+        strategy_names = {s.get("name") for s in memory.get("strategies", [])}
+        missing = set(STRATEGY_NAMES) - strategy_names
+        if not missing:
+            logger.info(f"Validated cached memory: {self.memory_id}")
+            return
+        logger.warning(
+            f"Cached memory {self.memory_id} is missing strategies {missing}"
+        )
+        # Add the strategies to this memory rather than looking it up by name again
+        self._discover_memories(
+            existing_memory={"name": self.memory_name, **memory, "id": self.memory_id}
+        )
+
+    def _discover_memories(self, existing_memory: Optional[Dict[str, Any]] = None):
+        """Find or create the memory and add any missing strategies.
+
+        existing_memory skips the lookup by name for a memory already fetched.
+        """
         try:
             logger.info(f"Initializing memory system with name: {self.memory_name}")
 
             # Check for existing memory first
-            existing_memory = self._find_existing_memory()
+            if existing_memory is None:
+                existing_memory = self._find_existing_memory()
 
             if existing_memory and not self.force_delete:
                 # Use existing memory
@@ -69,6 +177,9 @@ class SREMemoryClient:
                         logger.warning(
                             f"{creating_count} strategies are still in CREATING state - memory system may not be fully operational"
                         )
+                    self._write_memory_manifest(
+                        [s.get("name") for s in existing_strategies]
+                    )
                     return  # Memory is already configured
                 else:
                     logger.info(
@@ -157,6 +268,7 @@ class SREMemoryClient:
                 logger.info("Added investigation summaries strategy")
             else:
                 logger.info("Investigation summaries strategy already exists, skipping")
+            self._write_memory_manifest(sorted(existing_names | set(STRATEGY_NAMES)))
             logger.info(f"Memory system initialization complete for {self.memory_name}")
 
         except Exception as e:
@@ -172,11 +284,14 @@ class SREMemoryClient:
         actor_id: str,
         event_data: Dict[str, Any],
         session_id: Optional[str] = None,
+        on_written: Optional[Callable[[bool], Any]] = None,
     ) -> bool:
         """Save an event to memory using create_event API.
 
         actor_id is always required. session_id is required for infrastructure
-        and investigations memory types, but optional for preferences.
+        and investigations memory types, but optional for preferences. Returns
+        whether the event was queued; on_written is called later with whether
+        it was written (see MemoryWriteQueue.put).
         """
         if not self.memory_id:
             logger.warning("Memory system not initialized, skipping save")
@@ -204,7 +319,7 @@ class SREMemoryClient:
                 (str(event_data), "ASSISTANT")  # Store as assistant message
             ]
 
-            logger.info("Calling create_event with:")
+            logger.info("Queueing event with:")
             logger.info(f"  memory_id: {self.memory_id}")
             logger.info(f"  actor_id: {actor_id}")
             logger.info(f"  session_id: {session_id}")
@@ -214,21 +329,14 @@ class SREMemoryClient:
             # but the namespace doesn't use it
             actual_session_id = session_id if session_id else "preferences-default"
 
-            result = self.client.create_event(
-                memory_id=self.memory_id,
-                actor_id=actor_id,
-                session_id=actual_session_id,
-                messages=messages,
+            queued = self.queue_event(
+                actor_id, actual_session_id, messages, on_written=on_written
             )
-
-            event_id = result.get("eventId", "unknown")
-            logger.info(f"create_event result: {result}")
             logger.info("=== SAVE_EVENT TRACE END ===")
-            logger.info(
-                f"Saved {memory_type} event for {actor_id} (event_id: {event_id})"
-            )
-            logger.info(f"Event data size: {len(str(event_data))} characters")
-            return True
+            if queued:
+                logger.info(f"Queued {memory_type} event for {actor_id}")
+                logger.info(f"Event data size: {len(str(event_data))} characters")
+            return queued
 
         except Exception as e:
             logger.error(
@@ -236,6 +344,115 @@ class SREMemoryClient:
             )
             return False
 
+    def save_events(
+        self,
+        memory_type: str,
+        actor_id: str,
+        events: List[Dict[str, Any]],
+        session_id: Optional[str] = None,
+        on_written: Optional[Callable[[int, bool], Any]] = None,
+    ) -> List[bool]:
+        """Save several events to memory as multi-message events.
+
+        Events are queued in chunks of up to event_batch_size messages, so
+        each chunk is written with one create_event call. Returns whether
+        each event was queued, in the order given. For every queued event,
+        on_written is called later with its index and whether it was written.
+        """
+        results = [False] * len(events)
+        if not events:
+            return results
+        if not self.memory_id:
+            logger.warning("Memory system not initialized, skipping save")
+            return results
+
+        if not actor_id:
+            raise ValueError("actor_id is required for save_events")
+
+        if memory_type in ["infrastructure", "investigations"] and not session_id:
+            raise ValueError(f"session_id is required for {memory_type} memory type")
+
+        actual_session_id = session_id if session_id else "preferences-default"
+
+        # Index of each event with its message, skipping events that fail to serialize
+        messages: List[Tuple[int, Tuple[str, str]]] = []
+        for index, event_data in enumerate(events):
+            try:
+                messages.append((index, (str(event_data), "ASSISTANT")))
+            except Exception as e:
+                logger.error(
+                    f"Failed to serialize {memory_type} event {index} for {actor_id}: {e}"
+                )
+
+        batch_size = SREConstants.memory.event_batch_size
+        for start in range(0, len(messages), batch_size):
+            chunk = messages[start : start + batch_size]
+            indexes = [index for index, _ in chunk]
+            try:
+                queued = self.queue_event(
+                    actor_id,
+                    actual_session_id,
+                    [message for _, message in chunk],
+                    on_written=(
+                        _chunk_written(on_written, indexes) if on_written else None
+                    ),
+                )
+            except Exception as e:
+                logger.error(
+                    f"Failed to save {len(chunk)} {memory_type} events for {actor_id}: {e}",
+                    exc_info=True,
+                )
+                queued = False
+            for index in indexes:
+                results[index] = queued
+
+        logger.info(
+            f"Queued {sum(results)}/{len(events)} {memory_type} events for {actor_id}"
+        )
+        return results
+
+    def queue_event(
+        self,
+        actor_id: str,
+        session_id: str,
+        messages: List[Tuple[str, str]],
+        on_written: Optional[Callable[[bool], Any]] = None,
+    ) -> bool:
+        """Queue (content, role) messages to be written as a memory event.
+
+        The event is written by a background thread, coalesced with other
+        events for the same actor and session; False if it was not queued.
+        on_written is called with whether a queued event was written.
+        """
+        if not self.memory_id:
+            logger.warning("Memory system not initialized, skipping save")
+            return False
+        return self.write_queue.put(
+            actor_id, session_id, messages, on_written=on_written
+        )
+
+    def flush_events(self, wait: bool = True, timeout: Optional[float] = None) -> bool:
+        """Write queued memory events now; see MemoryWriteQueue.flush."""
+        return self.write_queue.flush(wait=wait, timeout=timeout)
+
+    def _create_event(
+        self, actor_id: str, session_id: str, messages: List[Tuple[str, str]]
+    ) -> None:
+        """Write one memory event; called by the background write queue."""
+        result = self.client.create_event(
+            memory_id=self.memory_id,
+            actor_id=actor_id,
+            session_id=session_id,
+            messages=messages,
+        )
+        logger.info(
+            f"Wrote {len(messages)} messages for {actor_id}/{session_id} (event_id: {result.get('eventId', 'unknown')})"
+        )
+
+        # Memories extracted from this event land in the actor's namespaces
+        for memory_type in ("preferences", "infrastructure", "investigations"):
+            self.retrieval_cache.invalidate(self._get_namespace(memory_type, actor_id))
+
     def retrieve_memories(
         self,
         memory_type: str,
@@ -244,7 +461,11 @@ class SREMemoryClient:
         max_results: int = 10,
         session_id: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
-        """Retrieve memories using the retrieve_memories API."""
+        """Retrieve memories using the retrieve_memories API.
+
+        Results are cached per namespace, query and max_results for
+        retrieval_cache_ttl_seconds, until this process writes to the actor.
+        """
         if not self.memory_id:
             logger.warning("Memory system not initialized, returning empty results")
             return []
@@ -253,6 +474,13 @@ class SREMemoryClient:
             # Get appropriate namespace (session_id only needed for infrastructure/investigations)
             namespace = self._get_namespace(memory_type, actor_id, session_id)
 
+            cached = self.retrieval_cache.get(namespace, query, max_results)
+            if cached is not None:
+                logger.info(
+                    f"Retrieved {len(cached)} {memory_type} memories for {actor_id} from cache"
+                )
+                return cached
+
             logger.info(
                 f"Retrieving {memory_type} memories: actor_id={actor_id}, namespace={namespace}, query='{query}'"
             )
@@ -264,6 +492,7 @@ class SREMemoryClient:
                 top_k=max_results,
             )
 
+            self.retrieval_cache.put(namespace, query, max_results, result)
             logger.info(
                 f"Retrieved {len(result)} {memory_type} memories for {actor_id}"
             )
@@ -343,13 +572,7 @@ class SREMemoryClient:
                     )
                     # Get full memory details since list might not include all fields
                     try:
-                        from bedrock_agentcore.memory import MemoryControlPlaneClient
-
-                        cp_client = MemoryControlPlaneClient(
-                            region_name=self.client.gmcp_client._client_config.region_name
-                        )
-                        full_memory = cp_client.get_memory(memory_id)
-                        return full_memory
+                        return self._get_memory(memory_id)
                     except Exception as e:
                         logger.warning(f"Failed to get full memory details: {e}")
                         # Return what we have
@@ -365,15 +588,111 @@ class SREMemoryClient:
             logger.warning(f"Failed to list memories: {e}")
             return None
 
+    def _get_memory(self, memory_id: str) -> Dict[str, Any]:
+        """Get full memory details, including strategies, from the control plane."""
+        if self._is_local:
+            return self.client.get_memory(memory_id)
+
+        from bedrock_agentcore.memory import MemoryControlPlaneClient
+
+        cp_client = MemoryControlPlaneClient(
+            region_name=self.client.gmcp_client._client_config.region_name
+        )
+        return cp_client.get_memory(memory_id)
+
+    def _read_memory_id_from_file(self) -> Optional[str]:
+        """Read the memory ID written by a previous run, if it is for this memory."""
+        try:
+            memory_id = MEMORY_ID_FILE.read_text().strip()
+        except OSError:
+            return None
+        if not memory_id.startswith(f"{self.memory_name}-"):
+            return None
+        return memory_id
+
+    def _read_memory_manifest(self) -> Dict[str, Any]:
+        """Read the strategy manifest written by a previous run."""
+        try:
+            manifest = json.loads(MEMORY_MANIFEST_FILE.read_text())
+        except (OSError, ValueError):
+            return {}
+        return manifest if isinstance(manifest, dict) else {}
+
+    def _write_memory_manifest(self, strategy_names: List[str]) -> None:
+        """Record the configured strategies so the next start can skip discovery."""
+        if self._is_local:
+            return
+        try:
+            manifest = {"memory_id": self.memory_id, "strategies": strategy_names}
+            MEMORY_MANIFEST_FILE.write_text(json.dumps(manifest))
+            logger.info(f"Wrote memory manifest to {MEMORY_MANIFEST_FILE}")
+
+        except Exception as e:
+            logger.warning(f"Failed to write memory manifest: {e}")
+
     def _write_memory_id_to_file(self) -> None:
         """Write memory ID to .memory_id file for helper scripts."""
+        if self._is_local:
+            # Helper scripts work with AgentCore memory ids only
+            return
         try:
             # Write to project root only (where manage_memories.py expects it)
-            project_root = Path(__file__).parent.parent.parent
-            memory_id_file = project_root / ".memory_id"
-
-            memory_id_file.write_text(self.memory_id)
-            logger.info(f"Wrote memory ID {self.memory_id} to {memory_id_file}")
+            MEMORY_ID_FILE.write_text(self.memory_id)
+            logger.info(f"Wrote memory ID {self.memory_id} to {MEMORY_ID_FILE}")
 
         except Exception as e:
             logger.warning(f"Failed to write memory ID to file: {e}")
+
+
+def _is_memory_not_found(error: Exception) -> bool:
+    """Whether a get_memory error means the memory does not exist."""
+    # botocore ClientError from AgentCore
+    code = getattr(error, "response", {}).get("Error", {}).get("Code")
+    if code == "ResourceNotFoundException":
+        return True
+    # The local backend raises ValueError
+    return isinstance(error, ValueError) and "not found" in str(error).lower()
+
+
+def _chunk_written(
+    on_written: Callable[[int, bool], Any], indexes: List[int]
+) -> Callable[[bool], None]:
+    """Write callback of a chunk of save_events, reporting each event's index."""
+
+    def written(success: bool) -> None:
+        for index in indexes:
+            on_written(index, success)
+
+    return written
+
+
+# Memory clients shared across the process, keyed by (memory_name, region)
+_memory_clients: Dict[Tuple[str, str], SREMemoryClient] = {}
+_memory_clients_lock = threading.Lock()
+
+
+def get_memory_client(
+    memory_name: str = "sre_agent_memory",
+    region: str = "us-east-1",
+    force_delete: bool = False,
+) -> SREMemoryClient:
+    """Get the process-wide memory client for a memory name and region.
+
+    The client is created, and its memory looked up or created, on the first
+    call only; the supervisor, agents and tools then share it. force_delete
+    only applies when the client is created.
+    """
+    key = (memory_name, region)
+    client = _memory_clients.get(key)
+    if client is None:
+        with _memory_clients_lock:
+            client = _memory_clients.get(key)
+            if client is None:
+                logger.info(
+                    f"Creating shared memory client for {memory_name} in {region}"
+                )
+                client = SREMemoryClient(
+                    memory_name=memory_name, region=region, force_delete=force_delete
+                )
+                _memory_clients[key] = client
+    return client
@@ -1,4 +1,7 @@
 import logging
+import os
+from pathlib import Path
+from typing import Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -22,6 +25,21 @@ class MemoryConfig(BaseModel):
     region: str = Field(
         default="us-east-1", description="AWS region for memory storage"
     )
+    memory_id: Optional[str] = Field(
+        default_factory=lambda: os.getenv("MEMORY_ID") or None,
+        description="Known memory ID; skips looking the memory up by name on startup",
+    )
+    backend: Literal["agentcore", "local"] = Field(
+        default_factory=lambda: os.getenv("MEMORY_BACKEND", "agentcore"),
+        description="Memory backend: AgentCore Memory, or a local SQLite stand-in for offline runs and tests",
+    )
+    local_path: str = Field(
+        default_factory=lambda: os.getenv(
+            "MEMORY_LOCAL_PATH",
+            str(Path(__file__).parent.parent.parent / ".local_memory.db"),
+        ),
+        description='SQLite database of the local backend; ":memory:" keeps it in memory',
+    )
 
     # Retention settings
     preferences_retention_days: int = Field(
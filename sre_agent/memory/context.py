@@ -0,0 +1,202 @@
+import logging
+import math
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from ..constants import SREConstants
+
+# Configure logging with basicConfig
+logging.basicConfig(
+    level=logging.INFO,  # Set the log level to INFO
+    # Define log message format
+    format="%(asctime)s,p%(process)s,{%(filename)s:%(lineno)d},%(levelname)s,%(message)s",
+)
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Rough size of a token in English text and JSON, used to estimate prompt size
+_CHARS_PER_TOKEN = 4
+
+_SECTION_TITLES = {
+    "preferences": "Relevant User Preferences",
+    "infrastructure": "Relevant Infrastructure Knowledge",
+    "investigations": "Similar Past Investigations",
+}
+
+
+@dataclass
+class _Candidate:
+    section: str
+    line: str
+    terms: FrozenSet[str]
+    score: float
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.line)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate number of LLM tokens in a text."""
+    return math.ceil(len(text) / _CHARS_PER_TOKEN)
+
+
+def _terms(text: str) -> FrozenSet[str]:
+    return frozenset(term.lower() for term in _TOKEN_PATTERN.findall(text))
+
+
+def _record_text(record: Any) -> str:
+    """The text of a memory record, on a single line."""
+    if isinstance(record, dict):
+        content = record.get("content", record)
+        if isinstance(content, dict) and "text" in content:
+            content = content["text"]
+        record = content
+    return _WHITESPACE_PATTERN.sub(" ", str(record)).strip()
+
+
+def _created_at(record: Any) -> Optional[datetime]:
+    if not isinstance(record, dict):
+        return None
+    created_at = record.get("createdAt")
+    if isinstance(created_at, str):
+        try:
+            created_at = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if not isinstance(created_at, datetime):
+        return None
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at
+
+
+def _recency(created_at: Optional[datetime], now: datetime) -> float:
+    """1.0 for a record created now, halving every recency_half_life_days."""
+    if created_at is None:
+        return 0.5
+    age_days = max((now - created_at).total_seconds(), 0) / 86400
+    return 0.5 ** (age_days / SREConstants.memory.context_recency_half_life_days)
+
+
+def _relevance(query_terms: FrozenSet[str], terms: FrozenSet[str]) -> float:
+    """Fraction of the query terms that the record mentions."""
+    if not query_terms:
+        return 0.0
+    return len(query_terms & terms) / len(query_terms)
+
+
+def _is_near_duplicate(terms: FrozenSet[str], selected: List[_Candidate]) -> bool:
+    threshold = SREConstants.memory.context_duplicate_similarity
+    for candidate in selected:
+        union = terms | candidate.terms
+        if union and len(terms & candidate.terms) / len(union) >= threshold:
+            return True
+    return False
+
+
+def _candidates(
+    memory_context: Dict[str, Any], query: str, now: datetime
+) -> List[_Candidate]:
+    """Memory records from the investigation start context, scored."""
+    max_chars = SREConstants.memory.context_max_item_chars
+    relevance_weight = SREConstants.memory.context_relevance_weight
+    query_terms = _terms(query)
+
+    records = [
+        ("preferences", None, record)
+        for record in memory_context.get("user_preferences", [])
+    ]
+    for agent_id, agent_memories in memory_context.get(
+        "infrastructure_by_agent", {}
+    ).items():
+        records.extend(
+            ("infrastructure", agent_id, record) for record in agent_memories
+        )
+    records.extend(
+        ("investigations", None, record)
+        for record in memory_context.get("past_investigations", [])
+    )
+
+    candidates = []
+    for section, source, record in records:
+        text = _record_text(record)
+        if not text:
+            continue
+        if len(text) > max_chars:
+            text = text[: max_chars - 3] + "..."
+        created_at = _created_at(record)
+
+        details = [detail for detail in (source,) if detail]
+        if created_at is not None:
+            details.append(created_at.date().isoformat())
+        line = f"- [{', '.join(details)}] {text}" if details else f"- {text}"
+
+        terms = _terms(text)
+        score = relevance_weight * _relevance(query_terms, terms) + (
+            1 - relevance_weight
+        ) * _recency(created_at, now)
+        # Preferences decide escalation and notification, so they go first
+        if section == "preferences":
+            score += 1.0
+        candidates.append(_Candidate(section, line, terms, score))
+    return candidates
+
+
+def assemble_memory_context(
+    memory_context: Dict[str, Any],
+    query: str,
+    token_budget: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> str:
+    """Memory context for the planning prompt, packed into a token budget.
+
+    Records from on_investigation_start are ranked by how many query terms
+    they mention and by how recently they were created, with user
+    preferences ahead of everything else. Near-duplicates of higher ranked
+    records are dropped, and records are added in rank order while they fit
+    in token_budget (context_token_budget by default). Each record is one
+    line, grouped under a heading per memory type.
+    """
+    if token_budget is None:
+        token_budget = SREConstants.memory.context_token_budget
+    now = now or datetime.now(timezone.utc)
+
+    candidates = sorted(
+        _candidates(memory_context, query, now),
+        key=lambda candidate: candidate.score,
+        reverse=True,
+    )
+
+    # Leave room for the section headings
+    remaining = token_budget - sum(
+        estimate_tokens(f"\n{title}:\n") for title in _SECTION_TITLES.values()
+    )
+    selected: List[_Candidate] = []
+    duplicates = 0
+    for candidate in candidates:
+        if _is_near_duplicate(candidate.terms, selected):
+            duplicates += 1
+            continue
+        if candidate.tokens <= remaining:
+            selected.append(candidate)
+            remaining -= candidate.tokens
+
+    sections = []
+    for section, title in _SECTION_TITLES.items():
+        lines = [
+            candidate.line for candidate in selected if candidate.section == section
+        ]
+        if lines:
+            sections.append(f"\n{title}:\n" + "\n".join(lines) + "\n")
+    text = "".join(sections)
+
+    logger.info(
+        f"Assembled memory context: {len(selected)}/{len(candidates)} records, {duplicates} near-duplicates dropped, ~{estimate_tokens(text)}/{token_budget} tokens"
+    )
+    return text
@@ -51,6 +51,8 @@ class ConversationMemoryManager:
         """
         Store a conversation message in memory using create_event.
 
+        The message is written in the background by the client's write queue.
+
         Args:
             content: The message content
             role: USER, ASSISTANT, or TOOL
@@ -59,7 +61,7 @@ class ConversationMemoryManager:
             agent_name: Name of the agent (if applicable)
 
         Returns:
-            bool: Success status
+            bool: True when the message was queued; the write itself can still fail
         """
         try:
             if not user_id:
@@ -81,19 +83,16 @@ class ConversationMemoryManager:
             # Format message as tuple for AgentCore memory
             message_tuple = (content, role)
 
-            # Use AgentCore's create_event with user_id as actor_id
-            result = self.memory_client.client.create_event(
-                memory_id=self.memory_client.memory_id,
+            # Queue for create_event with user_id as actor_id
+            queued = self.memory_client.queue_event(
                 actor_id=user_id,  # Use user_id as actor_id as specified
                 session_id=session_id,  # Use provided session_id
                 messages=[message_tuple],  # AgentCore expects list of tuples
             )
 
-            event_id = result.get("eventId", "unknown")
-            logger.info(
-                f"Successfully stored conversation message (event_id: {event_id})"
-            )
-            return True
+            if queued:
+                logger.info("Queued conversation message for storage")
+            return queued
 
         except Exception as e:
             logger.error(f"Failed to store conversation message: {e}", exc_info=True)
@@ -109,6 +108,8 @@ class ConversationMemoryManager:
         """
         Store multiple conversation messages in a single create_event call.
 
+        The messages are written in the background by the client's write queue.
+
         Args:
             messages: List of (content, role) tuples
             user_id: User ID to use as actor_id
@@ -116,7 +117,7 @@ class ConversationMemoryManager:
             agent_name: Name of the agent (if applicable)
 
         Returns:
-            bool: Success status
+            bool: True when the batch was queued; the write itself can still fail
         """
         try:
             if not user_id:
@@ -153,19 +154,18 @@ class ConversationMemoryManager:
                 else:
                     truncated_messages.append((content, role))
 
-            # Use AgentCore's create_event with batch of messages
-            result = self.memory_client.client.create_event(
-                memory_id=self.memory_client.memory_id,
+            # Queue the batch of messages for create_event
+            queued = self.memory_client.queue_event(
                 actor_id=user_id,  # Use user_id as actor_id as specified
                 session_id=session_id,  # Use provided session_id
                 messages=truncated_messages,  # AgentCore expects list of tuples
             )
 
-            event_id = result.get("eventId", "unknown")
-            logger.info(
-                f"Successfully stored conversation batch of {len(messages)} messages (event_id: {event_id})"
-            )
-            return True
+            if queued:
+                logger.info(
+                    f"Queued conversation batch of {len(messages)} messages for storage"
+                )
+            return queued
 
         except Exception as e:
             logger.error(f"Failed to store conversation batch: {e}", exc_info=True)
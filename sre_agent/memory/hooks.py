@@ -1,8 +1,12 @@
+import hashlib
 import json
 import logging
 import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from ..constants import SREConstants
 from .client import SREMemoryClient
@@ -10,7 +14,7 @@ from .strategies import (
     InfrastructureKnowledge,
     InvestigationSummary,
     UserPreference,
-    _save_infrastructure_knowledge,
+    _save_infrastructure_knowledge_batch,
     _save_investigation_summary,
     _save_user_preference,
 )
@@ -24,12 +28,111 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Shared so a retrieval that times out does not hold up the next investigation
+_retrieval_executor = ThreadPoolExecutor(
+    max_workers=6, thread_name_prefix="memory-retrieval"
+)
+
+
+# Escalation contacts and notification channels mentioned in a response
+_PREFERENCE_PATTERN = re.compile(
+    r"(?:escalate to|contact|notify|reach out to) (?P<contact>[^\s,\.]+@[^\s,\.]+)"
+    r"|(?:send to|notify|alert|post to) (?P<channel>#[\w-]+)",
+    re.IGNORECASE,
+)
+
+
+class SeenWrites:
+    """Fingerprints of the memory writes made per user and session.
+
+    Lets the hooks skip saving a preference or knowledge item that was
+    already saved in the session, or is still being written. A write is
+    reserved when it is queued and recorded only once it succeeds; a failed
+    write is released so the item is saved again when it next comes up. Only
+    8 byte digests are kept, and the least recently used sessions are
+    forgotten past max_sessions.
+    """
+
+    def __init__(self, max_sessions: int = 1024):
+        self.max_sessions = max_sessions
+        # Digest -> whether the write succeeded (False while in flight)
+        self._sessions: "OrderedDict[Tuple[str, str], Dict[bytes, bool]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(parts: Tuple[str, ...]) -> bytes:
+        return hashlib.blake2b("\0".join(parts).encode(), digest_size=8).digest()
+
+    def seen(self, user_id: str, session_id: Optional[str], *parts: str) -> bool:
+        """Whether a write was recorded or reserved for the user and session."""
+        key = (user_id, session_id or "")
+        with self._lock:
+            digests = self._sessions.get(key)
+            return digests is not None and self._digest(parts) in digests
+
+    def reserve(self, user_id: str, session_id: Optional[str], *parts: str) -> None:
+        """Mark a write as in flight for the user and session."""
+        self._set(user_id, session_id, parts, False)
+
+    def add(self, user_id: str, session_id: Optional[str], *parts: str) -> None:
+        """Record a successful write for the user and session."""
+        self._set(user_id, session_id, parts, True)
+
+    def release(self, user_id: str, session_id: Optional[str], *parts: str) -> None:
+        """Forget a reserved write that failed."""
+        key = (user_id, session_id or "")
+        with self._lock:
+            digests = self._sessions.get(key)
+            digest = self._digest(parts)
+            if digests is not None and digests.get(digest) is False:
+                del digests[digest]
+
+    def _set(
+        self,
+        user_id: str,
+        session_id: Optional[str],
+        parts: Tuple[str, ...],
+        written: bool,
+    ) -> None:
+        key = (user_id, session_id or "")
+        with self._lock:
+            digests = self._sessions.setdefault(key, {})
+            self._sessions.move_to_end(key)
+            digest = self._digest(parts)
+            digests[digest] = written or digests.get(digest, False)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def on_written(
+        self, user_id: str, session_id: Optional[str], *parts: str
+    ) -> Callable[[bool], None]:
+        """Write callback recording a reserved write, or releasing it on failure."""
+
+        def written(success: bool) -> None:
+            if success:
+                self.add(user_id, session_id, *parts)
+            else:
+                self.release(user_id, session_id, *parts)
+
+        return written
+
+
+_seen_writes = SeenWrites()
+
 
 class MemoryHookProvider:
     """Provides hooks for automatic memory capture during SRE operations."""
 
-    def __init__(self, memory_client: SREMemoryClient):
+    def __init__(
+        self,
+        memory_client: SREMemoryClient,
+        seen_writes: Optional["SeenWrites"] = None,
+    ):
         self.memory_client = memory_client
+        # Shared by default, as agents create a hook provider per response
+        self.seen_writes = seen_writes if seen_writes is not None else _seen_writes
 
     def on_investigation_start(
         self,
@@ -41,26 +144,40 @@ class MemoryHookProvider:
     ) -> Dict[str, Any]:
         """Hook called when investigation starts."""
         try:
-            # Retrieve relevant memories to provide context
-            # Use comprehensive query to get all user preference types
-            preferences = self.memory_client.retrieve_memories(
-                memory_type="preferences",
-                actor_id=user_id,
-                query=SREConstants.memory.user_preferences_query,
-                max_results=SREConstants.memory.max_preferences_results,
-            )
-
-            # Get infrastructure knowledge for specific user only
+            # Retrieve relevant memories to provide context, all three at once
             logger.info(
-                f"Retrieving infrastructure knowledge for user '{user_id}' for query: '{query}'"
+                f"Retrieving preferences, infrastructure knowledge and investigation summaries for user '{user_id}' for query: '{query}'"
             )
-            all_knowledge = self.memory_client.retrieve_memories(
-                memory_type="infrastructure",
-                actor_id=user_id,  # Only retrieve memories for the current user
-                query=query,
-                max_results=SREConstants.memory.max_infrastructure_results,
-                session_id=None,  # Cross-session search for planning purposes
+            retrieved = self._retrieve_concurrently(
+                {
+                    # Use comprehensive query to get all user preference types
+                    "preferences": dict(
+                        memory_type="preferences",
+                        actor_id=user_id,
+                        query=SREConstants.memory.user_preferences_query,
+                        max_results=SREConstants.memory.max_preferences_results,
+                    ),
+                    # Get infrastructure knowledge for specific user only
+                    "infrastructure": dict(
+                        memory_type="infrastructure",
+                        actor_id=user_id,  # Only retrieve memories for the current user
+                        query=query,
+                        max_results=SREConstants.memory.max_infrastructure_results,
+                        session_id=None,  # Cross-session search for planning purposes
+                    ),
+                    # Get past investigation summaries for similar issues
+                    "investigations": dict(
+                        memory_type="investigations",
+                        actor_id=user_id,  # Use user_id to retrieve only user-specific investigations
+                        query=query,
+                        max_results=SREConstants.memory.max_investigation_results,
+                        session_id=None,  # Cross-session search for planning purposes
+                    ),
+                }
             )
+            preferences = retrieved["preferences"]
+            all_knowledge = retrieved["infrastructure"]
+            investigations = retrieved["investigations"]
 
             # Organize knowledge by agent for later distribution
             knowledge_by_agent = self._organize_memories_by_agent(all_knowledge)
@@ -78,18 +195,6 @@ class MemoryHookProvider:
             else:
                 logger.info(f"No infrastructure knowledge found for user '{user_id}'")
 
-            # Get past investigation summaries for similar issues (cross-session search for planning)
-            logger.info(
-                f"Retrieving investigation summaries for user '{user_id}' for query: '{query}'"
-            )
-            investigations = self.memory_client.retrieve_memories(
-                memory_type="investigations",
-                actor_id=user_id,  # Use user_id to retrieve only user-specific investigations
-                query=query,
-                max_results=SREConstants.memory.max_investigation_results,
-                session_id=None,  # Cross-session search for planning purposes
-            )
-
             if investigations:
                 logger.info(
                     f"Retrieved {len(investigations)} past investigation summaries for user '{user_id}'"
@@ -137,6 +242,40 @@ class MemoryHookProvider:
                 "past_investigations": [],
             }
 
+    def _retrieve_concurrently(
+        self, requests: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Run retrieve_memories for each named request in parallel.
+
+        Waits at most retrieval_timeout_seconds overall; a retrieval that
+        fails or has not finished by then contributes no memories, so the
+        others are still used.
+        """
+        futures = {
+            name: _retrieval_executor.submit(
+                self.memory_client.retrieve_memories, **kwargs
+            )
+            for name, kwargs in requests.items()
+        }
+        wait(futures.values(), timeout=SREConstants.memory.retrieval_timeout_seconds)
+
+        results = {}
+        for name, future in futures.items():
+            if not future.done():
+                future.cancel()
+                logger.warning(
+                    f"Timed out retrieving {name} memories after {SREConstants.memory.retrieval_timeout_seconds}s, continuing without them"
+                )
+                results[name] = []
+            elif future.exception() is not None:
+                logger.warning(
+                    f"Failed to retrieve {name} memories: {future.exception()}"
+                )
+                results[name] = []
+            else:
+                results[name] = future.result()
+        return results
+
     def on_agent_response(
         self, agent_name: str, response: Dict[str, Any], state: Dict[str, Any]
     ):
@@ -150,23 +289,11 @@ class MemoryHookProvider:
                 f"Processing {agent_name} agent response for memory capture: user_id={user_id}, response_length={response_length}"
             )
 
-            # Extract and save user preferences
-            pref_count_before = len(
-                self.memory_client.retrieve_memories(
-                    "preferences", user_id, "recent", max_results=100
-                )
+            # Extract and save user preferences; saves are written in the
+            # background, so they are not visible to retrieval right away
+            self._extract_user_preferences(
+                response_text, user_id, agent_name, state.get("session_id")
             )
-            self._extract_user_preferences(response_text, user_id, agent_name)
-            pref_count_after = len(
-                self.memory_client.retrieve_memories(
-                    "preferences", user_id, "recent", max_results=100
-                )
-            )
-
-            if pref_count_after > pref_count_before:
-                logger.info(
-                    f"Extracted {pref_count_after - pref_count_before} new user preferences from {agent_name} response"
-                )
 
             # Extract infrastructure knowledge
             # Check if this agent should extract infrastructure knowledge
@@ -238,93 +365,87 @@ class MemoryHookProvider:
             )
 
             if success:
-                logger.info(f"Saved investigation summary for incident {incident_id}")
+                logger.info(f"Queued investigation summary for incident {incident_id}")
             else:
                 logger.warning(
-                    f"Failed to save investigation summary for incident {incident_id}"
+                    f"Failed to queue investigation summary for incident {incident_id}"
                 )
 
+            # Write this investigation's queued events without waiting for them
+            self.memory_client.flush_events(wait=False)
+            logger.info(
+                f"Memory retrieval cache: {self.memory_client.retrieval_cache.stats()}"
+            )
+
         except Exception as e:
             logger.error(f"Failed to save investigation summary: {e}")
 
-    def _extract_user_preferences(self, response_text: str, user_id: str, context: str):
+    def _extract_user_preferences(
+        self,
+        response_text: str,
+        user_id: str,
+        context: str,
+        session_id: Optional[str] = None,
+    ):
         """Extract user preferences from response text."""
         logger.info(
             f"Extracting user preferences from {context} response for user {user_id}"
         )
 
-        # Extract escalation preferences
-        escalation_patterns = [
-            r"escalate to ([^\s,\.]+@[^\s,\.]+)",
-            r"contact ([^\s,\.]+@[^\s,\.]+)",
-            r"notify ([^\s,\.]+@[^\s,\.]+)",
-            r"reach out to ([^\s,\.]+@[^\s,\.]+)",
-        ]
-
         escalation_found = 0
-        for pattern in escalation_patterns:
-            matches = re.finditer(pattern, response_text, re.IGNORECASE)
-            for match in matches:
-                contact = match.group(1)
-                logger.info(
-                    f"Found escalation pattern: '{match.group(0)}' -> contact: {contact}"
-                )
+        channels_found = 0
+        duplicates = 0
+        for match in _PREFERENCE_PATTERN.finditer(response_text):
+            contact, channel = match.group("contact", "channel")
+            if contact:
+                preference_type, preference_value = "escalation", {"contact": contact}
+            else:
+                preference_type, preference_value = "notification", {"channel": channel}
+            value = contact or channel
+            logger.info(
+                f"Found {preference_type} pattern: '{match.group(0)}' -> {value}"
+            )
 
-                preference = UserPreference(
-                    user_id=user_id,
-                    preference_type="escalation",
-                    preference_value={"contact": contact},
-                    context=f"Mentioned during {context} agent response",
-                )
+            if self.seen_writes.seen(
+                user_id, session_id, preference_type, value.lower()
+            ):
+                duplicates += 1
+                continue
 
-                success = _save_user_preference(self.memory_client, user_id, preference)
+            preference = UserPreference(
+                user_id=user_id,
+                preference_type=preference_type,
+                preference_value=preference_value,
+                context=f"Mentioned during {context} agent response",
+            )
 
-                if success:
+            # Recorded as saved only once the queued write succeeds
+            fingerprint = (preference_type, value.lower())
+            self.seen_writes.reserve(user_id, session_id, *fingerprint)
+            success = _save_user_preference(
+                self.memory_client,
+                user_id,
+                preference,
+                on_written=self.seen_writes.on_written(
+                    user_id, session_id, *fingerprint
+                ),
+            )
+
+            if success:
+                if contact:
                     escalation_found += 1
-                    logger.info(f"Captured escalation preference: {contact}")
                 else:
-                    logger.warning(f"Failed to save escalation preference: {contact}")
-
-        if escalation_found == 0:
-            logger.info(f"No escalation patterns found in {context} response")
-
-        # Extract notification channel preferences
-        channel_patterns = [
-            r"send to (#[\w-]+)",
-            r"notify (#[\w-]+)",
-            r"alert (#[\w-]+)",
-            r"post to (#[\w-]+)",
-        ]
-
-        channels_found = 0
-        for pattern in channel_patterns:
-            matches = re.finditer(pattern, response_text, re.IGNORECASE)
-            for match in matches:
-                channel = match.group(1)
-                logger.info(
-                    f"Found notification pattern: '{match.group(0)}' -> channel: {channel}"
-                )
-
-                preference = UserPreference(
-                    user_id=user_id,
-                    preference_type="notification",
-                    preference_value={"channel": channel},
-                    context=f"Mentioned during {context} agent response",
-                )
-
-                success = _save_user_preference(self.memory_client, user_id, preference)
-
-                if success:
                     channels_found += 1
-                    logger.info(f"Captured notification preference: {channel}")
-                else:
-                    logger.warning(f"Failed to save notification preference: {channel}")
+                logger.info(f"Captured {preference_type} preference: {value}")
+            else:
+                self.seen_writes.release(user_id, session_id, *fingerprint)
+                logger.warning(f"Failed to queue {preference_type} preference: {value}")
 
-        if channels_found == 0:
-            logger.info(f"No notification channel patterns found in {context} response")
+        if escalation_found + channels_found + duplicates == 0:
+            logger.info(f"No preference patterns found in {context} response")
 
         logger.info(
-            f"Preference extraction complete: {escalation_found} escalations, {channels_found} channels"
+            f"Preference extraction complete: {escalation_found} escalations, {channels_found} channels, {duplicates} already saved"
         )
 
     def _extract_infrastructure_knowledge(
@@ -343,7 +464,9 @@ class MemoryHookProvider:
         )
         matches = re.finditer(json_pattern, response_text, re.IGNORECASE | re.DOTALL)
 
-        knowledge_extracted = 0
+        # Items from every block, saved together once the response is parsed
+        pending: List[Tuple[InfrastructureKnowledge, str]] = []
+        pending_fingerprints = set()
 
         for match in matches:
             json_content = match.group(1)
@@ -385,6 +508,20 @@ class MemoryHookProvider:
                             )
                             continue
 
+                        # Skip knowledge already saved in this session
+                        fingerprint = json.dumps(
+                            [service_name, knowledge_type, knowledge_data],
+                            sort_keys=True,
+                            default=str,
+                        )
+                        if fingerprint in pending_fingerprints or self.seen_writes.seen(
+                            user_id, state.get("session_id"), "knowledge", fingerprint
+                        ):
+                            logger.info(
+                                f"Skipping {knowledge_type} knowledge for {service_name}: already saved"
+                            )
+                            continue
+
                         # Add agent metadata to knowledge data
                         knowledge_data["discovered_by"] = agent_name
 
@@ -398,23 +535,8 @@ class MemoryHookProvider:
                             timestamp=datetime.utcnow(),  # Explicit timestamp when knowledge was extracted
                         )
 
-                        # Save to memory using user_id as actor_id (not service_name)
-                        success = _save_infrastructure_knowledge(
-                            self.memory_client,
-                            user_id,
-                            knowledge,
-                            state.get("session_id"),
-                        )
-
-                        if success:
-                            knowledge_extracted += 1
-                            logger.info(
-                                f"Captured {knowledge_type} knowledge for {service_name}: {knowledge_data}"
-                            )
-                        else:
-                            logger.warning(
-                                f"Failed to save {knowledge_type} knowledge for {service_name}"
-                            )
+                        pending.append((knowledge, fingerprint))
+                        pending_fingerprints.add(fingerprint)
 
                     except Exception as e:
                         logger.error(f"Error processing knowledge item: {e}")
@@ -427,10 +549,47 @@ class MemoryHookProvider:
                 logger.error(f"Error extracting infrastructure knowledge: {e}")
                 continue
 
-        if knowledge_extracted == 0:
+        if not pending:
             logger.info(
                 f"No infrastructure knowledge JSON blocks found in {agent_name} response"
             )
+            return
+
+        # Recorded as saved only once their queued writes succeed
+        session_id = state.get("session_id")
+        written = [
+            self.seen_writes.on_written(user_id, session_id, "knowledge", fingerprint)
+            for _, fingerprint in pending
+        ]
+        for _, fingerprint in pending:
+            self.seen_writes.reserve(user_id, session_id, "knowledge", fingerprint)
+
+        # Save to memory using user_id as actor_id (not service_name)
+        results = _save_infrastructure_knowledge_batch(
+            self.memory_client,
+            user_id,
+            [knowledge for knowledge, _ in pending],
+            session_id,
+            on_written=lambda index, success: written[index](success),
+        )
+
+        knowledge_extracted = 0
+        for (knowledge, fingerprint), success in zip(pending, results):
+            if success:
+                knowledge_extracted += 1
+                logger.info(
+                    f"Captured {knowledge.knowledge_type} knowledge for {knowledge.service_name}: {knowledge.knowledge_data}"
+                )
+            else:
+                self.seen_writes.release(user_id, session_id, "knowledge", fingerprint)
+                logger.warning(
+                    f"Failed to queue {knowledge.knowledge_type} knowledge for {knowledge.service_name}"
+                )
+
+        if knowledge_extracted == 0:
+            logger.warning(
+                f"Failed to queue infrastructure knowledge from {agent_name} response"
+            )
         else:
             logger.info(
                 f"Infrastructure knowledge extraction complete for {agent_name}: {knowledge_extracted} knowledge items extracted"
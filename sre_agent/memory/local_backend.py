@@ -0,0 +1,307 @@
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+# Configure logging with basicConfig
+logging.basicConfig(
+    level=logging.INFO,  # Set the log level to INFO
+    # Define log message format
+    format="%(asctime)s,p%(process)s,{%(filename)s:%(lineno)d},%(levelname)s,%(message)s",
+)
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    event_expiry_days INTEGER,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS strategies (
+    memory_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    description TEXT,
+    namespaces TEXT NOT NULL,
+    PRIMARY KEY (memory_id, name)
+);
+CREATE TABLE IF NOT EXISTS events (
+    id TEXT PRIMARY KEY,
+    memory_id TEXT NOT NULL,
+    actor_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    messages TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS records USING fts5(
+    text,
+    record_id UNINDEXED,
+    memory_id UNINDEXED,
+    namespace UNINDEXED,
+    strategy UNINDEXED,
+    created_at UNINDEXED
+);
+"""
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def _match_expression(query: str) -> Optional[str]:
+    """FTS5 query matching any term of a free text query."""
+    terms = {term.lower() for term in _TOKEN_PATTERN.findall(query)}
+    if not terms:
+        return None
+    return " OR ".join(f'"{term}"' for term in sorted(terms))
+
+
+def _resolve_namespace(template: str, actor_id: str, session_id: str) -> str:
+    return template.replace("{actorId}", actor_id).replace("{sessionId}", session_id)
+
+
+def _timestamp(epoch: float) -> datetime:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc)
+
+
+class LocalMemoryClient:
+    """Offline stand-in for the AgentCore MemoryClient, stored in SQLite.
+
+    Implements the subset of the MemoryClient API that SREMemoryClient uses,
+    with the same namespace semantics. Every strategy sees every event, as
+    in AgentCore, but instead of extracting memories with a model each
+    strategy stores each message as a record in its namespace, with the
+    actor and session filled in. retrieve_memories searches a namespace and
+    the namespaces below it, ranking records with SQLite's FTS5 BM25 score
+    and filling up to top_k with the most recent records.
+
+    Pass ":memory:" as path for a throwaway database, e.g. in tests.
+    """
+
+    def __init__(self, path: Union[str, Path] = ":memory:"):
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.executescript(_SCHEMA)
+        logger.info(f"Using local memory backend at {self.path}")
+
+    # Control plane
+
+    def create_memory(
+        self,
+        name: str,
+        description: Optional[str] = None,
+        event_expiry_days: int = 90,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """Create a memory; ids start with the name, as in AgentCore."""
+        memory_id = f"{name}-{uuid.uuid4().hex[:10]}"
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO memories VALUES (?, ?, ?, ?, ?)",
+                (memory_id, name, description, event_expiry_days, time.time()),
+            )
+        return self.get_memory(memory_id)
+
+    def get_memory(self, memory_id: str) -> Dict[str, Any]:
+        """Memory details including its strategies."""
+        with self._lock:
+            memory = self._connection.execute(
+                "SELECT * FROM memories WHERE id = ?", (memory_id,)
+            ).fetchone()
+            if memory is None:
+                raise ValueError(f"Memory not found: {memory_id}")
+            strategies = self._connection.execute(
+                "SELECT * FROM strategies WHERE memory_id = ?", (memory_id,)
+            ).fetchall()
+        return {
+            "id": memory["id"],
+            "name": memory["name"],
+            "description": memory["description"],
+            "eventExpiryDuration": memory["event_expiry_days"],
+            "status": "ACTIVE",
+            "strategies": [
+                {
+                    "name": strategy["name"],
+                    "type": strategy["type"],
+                    "description": strategy["description"],
+                    "namespaces": json.loads(strategy["namespaces"]),
+                    "status": "ACTIVE",
+                }
+                for strategy in strategies
+            ],
+        }
+
+    def list_memories(self, max_results: int = 100) -> List[Dict[str, Any]]:
+        """Summaries of the stored memories."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id FROM memories ORDER BY created_at LIMIT ?", (max_results,)
+            ).fetchall()
+        return [{"id": row["id"], "status": "ACTIVE"} for row in rows]
+
+    def delete_memory(self, memory_id: str) -> Dict[str, Any]:
+        """Delete a memory with its strategies, events and records."""
+        with self._lock, self._connection:
+            for table, column in (
+                ("records", "memory_id"),
+                ("events", "memory_id"),
+                ("strategies", "memory_id"),
+                ("memories", "id"),
+            ):
+                self._connection.execute(
+                    f"DELETE FROM {table} WHERE {column} = ?", (memory_id,)
+                )
+        return {"memoryId": memory_id, "status": "DELETING"}
+
+    def _add_strategy(
+        self,
+        strategy_type: str,
+        memory_id: str,
+        name: str,
+        description: Optional[str] = None,
+        namespaces: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO strategies VALUES (?, ?, ?, ?, ?)",
+                (
+                    memory_id,
+                    name,
+                    strategy_type,
+                    description,
+                    json.dumps(namespaces or []),
+                ),
+            )
+        return self.get_memory(memory_id)
+
+    def add_user_preference_strategy_and_wait(
+        self, memory_id: str, name: str, **kwargs
+    ) -> Dict[str, Any]:
+        """Add a user preference strategy."""
+        return self._add_strategy("USER_PREFERENCE", memory_id, name, **kwargs)
+
+    def add_semantic_strategy_and_wait(
+        self, memory_id: str, name: str, **kwargs
+    ) -> Dict[str, Any]:
+        """Add a semantic strategy."""
+        return self._add_strategy("SEMANTIC", memory_id, name, **kwargs)
+
+    def add_summary_strategy_and_wait(
+        self, memory_id: str, name: str, **kwargs
+    ) -> Dict[str, Any]:
+        """Add a summary strategy."""
+        return self._add_strategy("SUMMARIZATION", memory_id, name, **kwargs)
+
+    # Data plane
+
+    def create_event(
+        self,
+        memory_id: str,
+        actor_id: str,
+        session_id: str,
+        messages: List[Tuple[str, str]],
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """Store an event and add its messages to every strategy namespace."""
+        event_id = uuid.uuid4().hex
+        created_at = time.time()
+        with self._lock, self._connection:
+            if not self._connection.execute(
+                "SELECT 1 FROM memories WHERE id = ?", (memory_id,)
+            ).fetchone():
+                raise ValueError(f"Memory not found: {memory_id}")
+            self._connection.execute(
+                "INSERT INTO events VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    event_id,
+                    memory_id,
+                    actor_id,
+                    session_id,
+                    json.dumps(messages),
+                    created_at,
+                ),
+            )
+            strategies = self._connection.execute(
+                "SELECT name, namespaces FROM strategies WHERE memory_id = ?",
+                (memory_id,),
+            ).fetchall()
+            self._connection.executemany(
+                "INSERT INTO records VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        content,
+                        uuid.uuid4().hex,
+                        memory_id,
+                        _resolve_namespace(template, actor_id, session_id),
+                        strategy["name"],
+                        created_at,
+                    )
+                    for strategy in strategies
+                    for template in json.loads(strategy["namespaces"])
+                    for content, _role in messages
+                ],
+            )
+        return {
+            "eventId": event_id,
+            "memoryId": memory_id,
+            "actorId": actor_id,
+            "sessionId": session_id,
+            "eventTimestamp": _timestamp(created_at),
+        }
+
+    def retrieve_memories(
+        self, memory_id: str, namespace: str, query: str, top_k: int = 3, **kwargs
+    ) -> List[Dict[str, Any]]:
+        """Records in a namespace and below it, best BM25 matches first."""
+        prefix = namespace.rstrip("/") + "/"
+        scope = "memory_id = ? AND (namespace = ? OR substr(namespace, 1, ?) = ?)"
+        params = [memory_id, namespace, len(prefix), prefix]
+        expression = _match_expression(query)
+
+        with self._lock:
+            matches = []
+            if expression:
+                matches = self._connection.execute(
+                    f"SELECT *, -bm25(records) AS score FROM records"
+                    f" WHERE records MATCH ? AND {scope}"
+                    f" ORDER BY bm25(records) LIMIT ?",
+                    [expression, *params, top_k],
+                ).fetchall()
+            if len(matches) < top_k:
+                # Semantic search always returns neighbours; mimic it with recency
+                seen = [row["record_id"] for row in matches]
+                placeholders = ", ".join("?" for _ in seen) or "''"
+                matches += self._connection.execute(
+                    f"SELECT *, 0.0 AS score FROM records WHERE {scope}"
+                    f" AND record_id NOT IN ({placeholders})"
+                    f" ORDER BY created_at DESC LIMIT ?",
+                    [*params, *seen, top_k - len(matches)],
+                ).fetchall()
+
+        return [
+            {
+                "memoryRecordId": row["record_id"],
+                "content": {"text": row["text"]},
+                "memoryStrategyId": row["strategy"],
+                "namespaces": [row["namespace"]],
+                "createdAt": _timestamp(row["created_at"]),
+                "score": row["score"],
+            }
+            for row in matches
+        ]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._connection.close()
@@ -1,10 +1,14 @@
 import json
 import logging
+import re
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, TypeVar
 
 from pydantic import BaseModel, Field
 
+from ..constants import SREConstants
+from .cache import ParsedRecordCache
+
 # Configure logging with basicConfig
 logging.basicConfig(
     level=logging.INFO,  # Set the log level to INFO
@@ -14,6 +18,44 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Parsed models of retrieved records, shared across retrievals
+_parsed_records = ParsedRecordCache(
+    max_entries=SREConstants.memory.parsed_record_cache_max_entries
+)
+
+_TOPIC_NAME_PATTERN = re.compile(r'<topic name="([^"]+)">')
+_TOPIC_CONTENT_PATTERN = re.compile(r"<topic[^>]*>(.*?)</topic>", re.DOTALL)
+
+ParsedRecord = TypeVar("ParsedRecord", bound=BaseModel)
+
+
+def _parse_records(
+    kind: str,
+    memories: List[Dict[str, Any]],
+    parse: Callable[[Dict[str, Any]], Optional[ParsedRecord]],
+    scope: str = "",
+) -> List[ParsedRecord]:
+    """Parse retrieved memory records, reusing records parsed before.
+
+    Records that fail to parse are logged and skipped.
+    """
+    parsed = []
+    for i, mem in enumerate(memories):
+        try:
+            key = _parsed_records.key(kind, mem, scope)
+            item = _parsed_records.get(key) if key else None
+            if item is None:
+                item = parse(mem)
+                if item is None:
+                    continue
+                if key:
+                    _parsed_records.put(key, item)
+            parsed.append(item)
+        except Exception as e:
+            logger.warning(f"Failed to parse {kind} memory {i}: {e}")
+            logger.debug(f"Failed {kind} memory {i} content: {mem}")
+    return parsed
+
 
 def _infer_preference_type(categories: List[str]) -> str:
     """Infer preference type from categories."""
@@ -105,8 +147,17 @@ class InvestigationSummary(BaseModel):
     )
 
 
-def _save_user_preference(client, user_id: str, preference: UserPreference) -> bool:
-    """Save user preference to memory."""
+def _save_user_preference(
+    client,
+    user_id: str,
+    preference: UserPreference,
+    on_written: Optional[Callable[[bool], Any]] = None,
+) -> bool:
+    """Save user preference to memory.
+
+    Returns whether the event was queued; on_written reports whether it was
+    written (see SREMemoryClient.save_event).
+    """
     try:
         logger.info(
             f"Saving user preference: type={preference.preference_type}, user_id={user_id}"
@@ -115,14 +166,15 @@ def _save_user_preference(client, user_id: str, preference: UserPreference) -> b
             memory_type="preferences",
             actor_id=user_id,
             event_data=preference.model_dump(),
+            on_written=on_written,
         )
         if success:
             logger.info(
-                f"Saved {preference.preference_type} preference for user {user_id}"
+                f"Queued {preference.preference_type} preference for user {user_id}"
             )
         else:
             logger.warning(
-                f"Failed to save {preference.preference_type} preference for user {user_id}"
+                f"Failed to queue {preference.preference_type} preference for user {user_id}"
             )
         return success
     except Exception as e:
@@ -130,6 +182,48 @@ def _save_user_preference(client, user_id: str, preference: UserPreference) -> b
         return False
 
 
+def _parse_preference_record(
+    mem: Dict[str, Any], user_id: str
+) -> Optional[UserPreference]:
+    """Parse a retrieved preference memory record."""
+    # Extract content from memory structure
+    content = mem.get("content", {})
+
+    # Handle nested content structure where data is in "text" field
+    if isinstance(content, dict) and "text" in content:
+        # Parse the JSON string in the "text" field
+        text_data = content["text"]
+        if not isinstance(text_data, str):
+            logger.warning(f"Expected string in 'text' field but got {type(text_data)}")
+            return None
+        preference_data = json.loads(text_data)
+
+        # Transform the stored format to match UserPreference model
+        transformed_preference = {
+            "user_id": user_id,
+            "preference_type": _infer_preference_type(
+                preference_data.get("categories", [])
+            ),
+            "preference_value": {
+                "preference": preference_data.get("preference", ""),
+                "categories": preference_data.get("categories", []),
+            },
+            "context": preference_data.get("context", ""),
+            "timestamp": mem.get("createdAt", datetime.utcnow()),
+        }
+        return UserPreference(**transformed_preference)
+
+    if isinstance(content, dict):
+        # Try direct parsing (backward compatibility)
+        return UserPreference(**content)
+
+    if isinstance(content, str):
+        # Try to parse as JSON
+        return UserPreference(**json.loads(content))
+
+    return None
+
+
 def _retrieve_user_preferences(
     client, user_id: str, query: str
 ) -> List[UserPreference]:
@@ -141,53 +235,12 @@ def _retrieve_user_preferences(
         )
         logger.info(f"Retrieved {len(memories)} preference memories from storage")
 
-        # Note: Need to parse the memory content structure
-        preferences = []
-        for i, mem in enumerate(memories):
-            try:
-                # Extract content from memory structure
-                content = mem.get("content", {})
-
-                # Handle nested content structure where data is in "text" field
-                if isinstance(content, dict) and "text" in content:
-                    # Parse the JSON string in the "text" field
-                    text_data = content["text"]
-                    if isinstance(text_data, str):
-                        preference_data = json.loads(text_data)
-
-                        # Transform the stored format to match UserPreference model
-                        transformed_preference = {
-                            "user_id": user_id,
-                            "preference_type": _infer_preference_type(
-                                preference_data.get("categories", [])
-                            ),
-                            "preference_value": {
-                                "preference": preference_data.get("preference", ""),
-                                "categories": preference_data.get("categories", []),
-                            },
-                            "context": preference_data.get("context", ""),
-                            "timestamp": mem.get("createdAt", datetime.utcnow()),
-                        }
-
-                        preferences.append(UserPreference(**transformed_preference))
-                    else:
-                        logger.warning(
-                            f"Expected string in 'text' field but got {type(text_data)}"
-                        )
-
-                elif isinstance(content, dict):
-                    # Try direct parsing (backward compatibility)
-                    preferences.append(UserPreference(**content))
-
-                elif isinstance(content, str):
-                    # Try to parse as JSON
-                    data = json.loads(content)
-                    preferences.append(UserPreference(**data))
-
-            except Exception as e:
-                logger.warning(f"Failed to parse preference memory {i}: {e}")
-                logger.debug(f"Failed preference memory {i} content: {mem}")
-                continue
+        preferences = _parse_records(
+            "preference",
+            memories,
+            lambda mem: _parse_preference_record(mem, user_id),
+            scope=user_id,
+        )
 
         logger.info(
             f"Retrieved {len(preferences)} parsed user preferences for {user_id}"
@@ -214,11 +267,11 @@ def _save_infrastructure_knowledge(
         )
         if success:
             logger.info(
-                f"Saved {knowledge.knowledge_type} knowledge for service {knowledge.service_name} by actor {actor_id}"
+                f"Queued {knowledge.knowledge_type} knowledge for service {knowledge.service_name} by actor {actor_id}"
             )
         else:
             logger.warning(
-                f"Failed to save {knowledge.knowledge_type} knowledge for service {knowledge.service_name} by actor {actor_id}"
+                f"Failed to queue {knowledge.knowledge_type} knowledge for service {knowledge.service_name} by actor {actor_id}"
             )
         return success
     except Exception as e:
@@ -226,6 +279,87 @@ def _save_infrastructure_knowledge(
         return False
 
 
+def _save_infrastructure_knowledge_batch(
+    client,
+    actor_id: str,
+    knowledge_items: List[InfrastructureKnowledge],
+    session_id: str,
+    on_written: Optional[Callable[[int, bool], Any]] = None,
+) -> List[bool]:
+    """Save infrastructure knowledge items to memory together.
+
+    Returns whether each item was queued, in the order given; on_written
+    reports whether each queued item was written (see
+    SREMemoryClient.save_events).
+    """
+    if not knowledge_items:
+        return []
+    try:
+        logger.info(
+            f"Saving {len(knowledge_items)} infrastructure knowledge items for actor {actor_id}"
+        )
+        results = client.save_events(
+            memory_type="infrastructure",
+            actor_id=actor_id,
+            events=[knowledge.model_dump() for knowledge in knowledge_items],
+            session_id=session_id,
+            on_written=on_written,
+        )
+        for knowledge, success in zip(knowledge_items, results):
+            if not success:
+                logger.warning(
+                    f"Failed to queue {knowledge.knowledge_type} knowledge for service {knowledge.service_name} by actor {actor_id}"
+                )
+        return results
+    except Exception as e:
+        logger.error(f"Failed to save infrastructure knowledge: {e}", exc_info=True)
+        return [False] * len(knowledge_items)
+
+
+def _plain_text_knowledge(text: str) -> InfrastructureKnowledge:
+    """Infrastructure knowledge for a memory stored as plain text."""
+    logger.debug(
+        f"Infrastructure memory stored as plain text, converting: {text[:100]}..."
+    )
+    return InfrastructureKnowledge(
+        service_name="general",
+        knowledge_type="investigation",
+        knowledge_data={
+            "description": text,
+            "source": "memory",
+        },
+    )
+
+
+def _parse_infrastructure_record(
+    mem: Dict[str, Any],
+) -> Optional[InfrastructureKnowledge]:
+    """Parse a retrieved infrastructure memory record."""
+    content = mem.get("content", {})
+
+    # Handle nested content structure where data is in "text" field
+    if isinstance(content, dict) and "text" in content:
+        content = content["text"]
+        if not isinstance(content, str):
+            logger.warning(f"Expected string in 'text' field but got {type(content)}")
+            return None
+
+    elif isinstance(content, dict):
+        # Try direct parsing (backward compatibility)
+        return InfrastructureKnowledge(**content)
+
+    if isinstance(content, str):
+        try:
+            # First try to parse as JSON (structured format)
+            data = json.loads(content)
+        except json.JSONDecodeError:
+            # If not JSON, treat as plain text infrastructure knowledge
+            return _plain_text_knowledge(content)
+        return InfrastructureKnowledge(**data)
+
+    return None
+
+
 def _retrieve_infrastructure_knowledge(
     client, actor_id: str, query: str, session_id: str = None
 ) -> List[InfrastructureKnowledge]:
@@ -237,69 +371,9 @@ def _retrieve_infrastructure_knowledge(
             query=query,
             session_id=session_id,
         )
-        # Parse memory content structure
-        knowledge_items = []
-        for mem in memories:
-            try:
-                content = mem.get("content", {})
-
-                # Handle nested content structure where data is in "text" field
-                if isinstance(content, dict) and "text" in content:
-                    text_data = content["text"]
-                    if isinstance(text_data, str):
-                        try:
-                            # First try to parse as JSON (structured format)
-                            data = json.loads(text_data)
-                            knowledge_items.append(InfrastructureKnowledge(**data))
-                        except json.JSONDecodeError:
-                            # If not JSON, treat as plain text infrastructure knowledge
-                            logger.debug(
-                                f"Infrastructure memory stored as plain text, converting: {text_data[:100]}..."
-                            )
-                            knowledge_items.append(
-                                InfrastructureKnowledge(
-                                    service_name="general",
-                                    knowledge_type="investigation",
-                                    knowledge_data={
-                                        "description": text_data,
-                                        "source": "memory",
-                                    },
-                                )
-                            )
-                    else:
-                        logger.warning(
-                            f"Expected string in 'text' field but got {type(text_data)}"
-                        )
-
-                elif isinstance(content, dict):
-                    # Try direct parsing (backward compatibility)
-                    knowledge_items.append(InfrastructureKnowledge(**content))
-
-                elif isinstance(content, str):
-                    try:
-                        # Try to parse as JSON first
-                        data = json.loads(content)
-                        knowledge_items.append(InfrastructureKnowledge(**data))
-                    except json.JSONDecodeError:
-                        # If not JSON, treat as plain text
-                        logger.debug(
-                            f"Infrastructure memory stored as plain text string, converting: {content[:100]}..."
-                        )
-                        knowledge_items.append(
-                            InfrastructureKnowledge(
-                                service_name="general",
-                                knowledge_type="investigation",
-                                knowledge_data={
-                                    "description": content,
-                                    "source": "memory",
-                                },
-                            )
-                        )
-
-            except Exception as e:
-                logger.warning(f"Failed to parse infrastructure memory: {e}")
-                logger.debug(f"Failed infrastructure memory content: {mem}")
-                continue
+        knowledge_items = _parse_records(
+            "infrastructure", memories, _parse_infrastructure_record
+        )
         return knowledge_items
     except Exception as e:
         logger.error(f"Failed to retrieve infrastructure knowledge: {e}")
@@ -329,11 +403,11 @@ def _save_investigation_summary(
         )
         if success:
             logger.info(
-                f"Saved investigation summary for actor_id={actor_id}, incident {incident_id} with status {summary.resolution_status}"
+                f"Queued investigation summary for actor_id={actor_id}, incident {incident_id} with status {summary.resolution_status}"
             )
         else:
             logger.warning(
-                f"Failed to save investigation summary for incident {incident_id}"
+                f"Failed to queue investigation summary for incident {incident_id}"
             )
         return success
     except Exception as e:
@@ -341,6 +415,72 @@ def _save_investigation_summary(
         return False
 
 
+def _parse_investigation_record(
+    mem: Dict[str, Any], actor_id: str
+) -> Optional[InvestigationSummary]:
+    """Parse a retrieved investigation memory record."""
+    content = mem.get("content", {})
+
+    # Handle nested content structure where data is in "text" field
+    if isinstance(content, dict) and "text" in content:
+        text_data = content["text"]
+
+        # Check if it's an XML-formatted summary
+        if isinstance(text_data, str) and text_data.strip().startswith("<summary>"):
+            # Extract topic name
+            topic_match = _TOPIC_NAME_PATTERN.search(text_data)
+            topic_name = (
+                topic_match.group(1) if topic_match else "Unknown Investigation"
+            )
+
+            # Extract the main content
+            content_match = _TOPIC_CONTENT_PATTERN.search(text_data)
+            main_content = (
+                content_match.group(1).strip() if content_match else text_data
+            )
+
+            # Create a summary object from the extracted information
+            return InvestigationSummary(
+                incident_id=mem.get(
+                    "memoryRecordId", f"mem-{actor_id}-{hash(text_data)}"
+                ),
+                query=topic_name,
+                resolution_status="completed",  # Assume completed since it's in memory
+                key_findings=[
+                    (
+                        main_content[:500] + "..."
+                        if len(main_content) > 500
+                        else main_content
+                    )
+                ],
+                context=f"Retrieved from memory: {topic_name}",
+                timestamp=mem.get("createdAt", datetime.utcnow()),
+            )
+
+        if isinstance(text_data, str):
+            # Try JSON parsing
+            try:
+                data = json.loads(text_data)
+            except json.JSONDecodeError:
+                logger.warning(
+                    f"Could not parse investigation memory text as JSON: {text_data[:100]}..."
+                )
+                return None
+            return InvestigationSummary(**data)
+
+        return None
+
+    if isinstance(content, dict):
+        # Try direct parsing (backward compatibility)
+        return InvestigationSummary(**content)
+
+    if isinstance(content, str):
+        # Try to parse as JSON
+        return InvestigationSummary(**json.loads(content))
+
+    return None
+
+
 def _retrieve_investigation_summaries(
     client, actor_id: str, query: str, session_id: str = None
 ) -> List[InvestigationSummary]:
@@ -352,84 +492,11 @@ def _retrieve_investigation_summaries(
             query=query,
             session_id=session_id,
         )
-        # Parse memory content structure
-        summaries = []
-        for mem in memories:
-            try:
-                content = mem.get("content", {})
-
-                # Handle nested content structure where data is in "text" field
-                if isinstance(content, dict) and "text" in content:
-                    text_data = content["text"]
-
-                    # Check if it's an XML-formatted summary
-                    if isinstance(text_data, str) and text_data.strip().startswith(
-                        "<summary>"
-                    ):
-                        # Extract key information from XML summary
-                        import re
-
-                        # Extract topic name
-                        topic_match = re.search(r'<topic name="([^"]+)">', text_data)
-                        topic_name = (
-                            topic_match.group(1)
-                            if topic_match
-                            else "Unknown Investigation"
-                        )
-
-                        # Extract key information from the text
-                        # Note: timestamps not currently used but pattern preserved for future enhancement
-
-                        # Extract the main content
-                        content_match = re.search(
-                            r"<topic[^>]*>(.*?)</topic>", text_data, re.DOTALL
-                        )
-                        main_content = (
-                            content_match.group(1).strip()
-                            if content_match
-                            else text_data
-                        )
-
-                        # Create a summary object from the extracted information
-                        investigation_summary = InvestigationSummary(
-                            incident_id=mem.get(
-                                "memoryRecordId", f"mem-{actor_id}-{hash(text_data)}"
-                            ),
-                            query=topic_name,
-                            resolution_status="completed",  # Assume completed since it's in memory
-                            key_findings=[
-                                main_content[:500] + "..."
-                                if len(main_content) > 500
-                                else main_content
-                            ],
-                            context=f"Retrieved from memory: {topic_name}",
-                            timestamp=mem.get("createdAt", datetime.utcnow()),
-                        )
-                        summaries.append(investigation_summary)
-
-                    elif isinstance(text_data, str):
-                        # Try JSON parsing
-                        try:
-                            data = json.loads(text_data)
-                            summaries.append(InvestigationSummary(**data))
-                        except json.JSONDecodeError:
-                            logger.warning(
-                                f"Could not parse investigation memory text as JSON: {text_data[:100]}..."
-                            )
-
-                elif isinstance(content, dict):
-                    # Try direct parsing (backward compatibility)
-                    summaries.append(InvestigationSummary(**content))
-
-                elif isinstance(content, str):
-                    # Try to parse as JSON
-                    data = json.loads(content)
-                    summaries.append(InvestigationSummary(**data))
-
-            except Exception as e:
-                logger.warning(f"Failed to parse investigation memory: {e}")
-                logger.debug(f"Failed investigation memory content: {mem}")
-                continue
+        summaries = _parse_records(
+            "investigation",
+            memories,
+            lambda mem: _parse_investigation_record(mem, actor_id),
+        )
         return summaries
     except Exception as e:
         logger.error(f"Failed to retrieve investigation summaries: {e}")
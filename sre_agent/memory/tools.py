@@ -135,9 +135,9 @@ class SavePreferenceTool(BaseTool):
             )
 
             result = (
-                f"Saved user preference: {content.preference_type} for user {content.user_id}"
+                f"Queued user preference: {content.preference_type} for user {content.user_id}"
                 if success
-                else f"Failed to save user preference: {content.preference_type}"
+                else f"Failed to queue user preference: {content.preference_type}"
             )
             logger.info(f"save_preference result: {result}")
             return result
@@ -204,9 +204,9 @@ class SaveInfrastructureTool(BaseTool):
             )
 
             result = (
-                f"Saved infrastructure knowledge: {content.knowledge_type} for {content.service_name}"
+                f"Queued infrastructure knowledge: {content.knowledge_type} for {content.service_name}"
                 if success
-                else f"Failed to save infrastructure knowledge for {content.service_name}"
+                else f"Failed to queue infrastructure knowledge for {content.service_name}"
             )
             logger.info(f"save_infrastructure result: {result}")
             return result
@@ -279,9 +279,9 @@ class SaveInvestigationTool(BaseTool):
             )
 
             result = (
-                f"Saved investigation summary for incident {content.incident_id}"
+                f"Queued investigation summary for incident {content.incident_id}"
                 if success
-                else f"Failed to save investigation summary for {content.incident_id}"
+                else f"Failed to queue investigation summary for {content.incident_id}"
             )
             logger.info(f"save_investigation result: {result}")
             return result
@@ -0,0 +1,237 @@
+import asyncio
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+# Configure logging with basicConfig
+logging.basicConfig(
+    level=logging.INFO,  # Set the log level to INFO
+    # Define log message format
+    format="%(asctime)s,p%(process)s,{%(filename)s:%(lineno)d},%(levelname)s,%(message)s",
+)
+
+logger = logging.getLogger(__name__)
+
+Message = Tuple[str, str]
+WriteEvent = Callable[[str, str, List[Message]], Any]
+OnWritten = Callable[[bool], Any]
+QueuedEvent = Tuple[str, str, List[Message], Optional[OnWritten]]
+
+# Queued to end the batching wait early
+_FLUSH = object()
+
+
+def _on_event_loop() -> bool:
+    """Whether the calling thread is running an asyncio event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class MemoryWriteQueue:
+    """Background writer that keeps memory events off the request path.
+
+    Events are buffered in a bounded queue and written by a daemon thread.
+    Events queued close together for the same (actor_id, session_id) are
+    coalesced into create_event calls of up to max_batch_messages messages.
+    When the buffer is full, put() drops the event at once if it is called
+    from a running event loop, and otherwise waits up to enqueue_timeout
+    seconds first; dropped events are counted in ``dropped``. Failed writes
+    are retried with exponential backoff, and the on_written callback of a
+    queued event reports whether it was finally written. Pending events are
+    flushed at interpreter exit.
+    """
+
+    def __init__(
+        self,
+        write_event: WriteEvent,
+        max_pending: int = 1000,
+        max_batch_messages: int = 50,
+        linger_seconds: float = 0.5,
+        max_retries: int = 3,
+        retry_backoff_seconds: float = 0.5,
+        enqueue_timeout: float = 1.0,
+        shutdown_timeout: float = 10.0,
+    ):
+        self._write_event = write_event
+        self.max_batch_messages = max_batch_messages
+        self.linger_seconds = linger_seconds
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.enqueue_timeout = enqueue_timeout
+        self.shutdown_timeout = shutdown_timeout
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._pending = 0
+        self.dropped = 0
+        self._idle = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Number of events queued or being written"""
+        return self._pending
+
+    def put(
+        self,
+        actor_id: str,
+        session_id: str,
+        messages: List[Message],
+        on_written: Optional[OnWritten] = None,
+    ) -> bool:
+        """Queue messages for writing; False if the event was dropped.
+
+        on_written is called from the writer thread, once the messages of a
+        queued event have been written (True) or given up on after the
+        retries (False). It is not called for a dropped event.
+        """
+        self._ensure_worker()
+        with self._idle:
+            self._pending += 1
+        item = (actor_id, session_id, list(messages), on_written)
+        try:
+            if _on_event_loop():
+                # Waiting for room would stall every coroutine on the loop
+                self._queue.put_nowait(item)
+            else:
+                self._queue.put(item, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self._done(1)
+            with self._idle:
+                self.dropped += 1
+            logger.error(
+                f"Memory write queue is full, dropping event for {actor_id}/{session_id}"
+            )
+            return False
+        return True
+
+    def flush(self, wait: bool = True, timeout: Optional[float] = None) -> bool:
+        """Write queued events now, and optionally wait until they are written.
+
+        Returns whether every queued event has been written (or dropped).
+        """
+        if self._pending == 0:
+            return True
+        try:
+            self._queue.put_nowait(_FLUSH)
+        except queue.Full:
+            # The worker is busy draining a full queue anyway
+            pass
+        if not wait:
+            return self._pending == 0
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="memory-write-queue", daemon=True
+                )
+                self._worker.start()
+                atexit.register(self._flush_at_exit)
+
+    def _flush_at_exit(self) -> None:
+        if self._pending and not self.flush(timeout=self.shutdown_timeout):
+            logger.warning(
+                f"Exiting with {self._pending} memory events still unwritten"
+            )
+
+    def _done(self, count: int) -> None:
+        with self._idle:
+            self._pending -= count
+            self._idle.notify_all()
+
+    def _next_batch(self) -> List[QueuedEvent]:
+        """Block for an event, then gather the events queued shortly after it."""
+        batch = []
+        item = self._queue.get()
+        deadline = time.monotonic() + self.linger_seconds
+        while True:
+            if item is _FLUSH:
+                break
+            batch.append(item)
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                failed = self._write_batch(batch)
+            except Exception as e:
+                logger.error(f"Failed to write memory events: {e}", exc_info=True)
+                failed = set(range(len(batch)))
+            try:
+                self._notify(batch, failed)
+            finally:
+                self._done(len(batch))
+
+    def _write_batch(self, batch: List[QueuedEvent]) -> Set[int]:
+        """Write a batch of events; returns the positions of those not written."""
+        # Coalesce per actor and session, keeping the order messages arrived in
+        grouped: Dict[Tuple[str, str], List[Tuple[int, Message]]] = {}
+        for position, (actor_id, session_id, messages, _) in enumerate(batch):
+            grouped.setdefault((actor_id, session_id), []).extend(
+                (position, message) for message in messages
+            )
+
+        failed: Set[int] = set()
+        for (actor_id, session_id), entries in grouped.items():
+            for start in range(0, len(entries), self.max_batch_messages):
+                chunk = entries[start : start + self.max_batch_messages]
+                if not self._write_with_retry(
+                    actor_id, session_id, [message for _, message in chunk]
+                ):
+                    failed.update(position for position, _ in chunk)
+        return failed
+
+    @staticmethod
+    def _notify(batch: List[QueuedEvent], failed: Set[int]) -> None:
+        for position, (actor_id, session_id, _, on_written) in enumerate(batch):
+            if on_written is None:
+                continue
+            try:
+                on_written(position not in failed)
+            except Exception as e:
+                logger.error(
+                    f"Memory write callback for {actor_id}/{session_id} failed: {e}",
+                    exc_info=True,
+                )
+
+    def _write_with_retry(
+        self, actor_id: str, session_id: str, messages: List[Message]
+    ) -> bool:
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._write_event(actor_id, session_id, messages)
+                return True
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.error(
+                        f"Dropping {len(messages)} memory messages for {actor_id}/{session_id} after {attempt + 1} attempts: {e}"
+                    )
+                    return False
+                delay = self.retry_backoff_seconds * 2**attempt
+                logger.warning(
+                    f"Memory write for {actor_id}/{session_id} failed ({e}), retrying in {delay:.1f}s"
+                )
+                time.sleep(delay)
+        return False
@@ -460,7 +460,7 @@ async def create_multi_agent_system(
     # Add memory tools if memory system is enabled
     memory_tools = []
     try:
-        from .memory.client import SREMemoryClient
+        from .memory.client import get_memory_client
         from .memory.config import _load_memory_config
         from .memory.tools import create_memory_tools
 
@@ -469,7 +469,7 @@ async def create_multi_agent_system(
             logger.debug("Adding memory tools to agent tool list")
             # Use the region from parameter if provided, otherwise use config default
             memory_region = region_name if region_name else memory_config.region
-            memory_client = SREMemoryClient(
+            memory_client = get_memory_client(
                 memory_name=memory_config.memory_name,
                 region=memory_region,
                 force_delete=force_delete_memory,
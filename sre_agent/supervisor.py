@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import asyncio
 import json
 import logging
 import os
@@ -9,14 +10,15 @@ from typing import Any, Dict, List, Literal, Optional
 
 from langchain_core.messages import HumanMessage, SystemMessage
 from langgraph.prebuilt import create_react_agent
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 from .agent_state import AgentState
 from .constants import SREConstants
 from .llm_utils import create_llm_with_error_handling
 from .memory import create_conversation_memory_manager
-from .memory.client import SREMemoryClient
+from .memory.client import get_memory_client
 from .memory.config import _load_memory_config
+from .memory.context import assemble_memory_context
 from .memory.hooks import MemoryHookProvider
 from .memory.tools import create_memory_tools
 from .output_formatter import create_formatter
@@ -128,6 +130,73 @@ class InvestigationPlan(BaseModel):
     reasoning: str = Field(
         description="Brief explanation of the investigation approach"
     )
+    depends_on: List[List[int]] = Field(
+        default_factory=list,
+        description="For each entry of agents_sequence, the 0-based indices of the entries whose results it needs; [] for entries that can start right away",
+    )
+
+    @model_validator(mode="after")
+    def validate_dependencies(self):
+        """Check that depends_on describes a DAG over distinct agents."""
+        if not self.depends_on:
+            return self
+        if len(self.depends_on) != len(self.agents_sequence):
+            raise ValueError(
+                f"depends_on has {len(self.depends_on)} entries for {len(self.agents_sequence)} agents"
+            )
+        # Results are handed on by agent, so a repeated agent's later step
+        # would overwrite the result its dependents asked for
+        repeated = sorted(
+            {a for a in self.agents_sequence if self.agents_sequence.count(a) > 1}
+        )
+        if repeated:
+            raise ValueError(
+                f"depends_on needs each agent at most once, repeated: {', '.join(repeated)}"
+            )
+        for step, dependencies in enumerate(self.depends_on):
+            for dependency in dependencies:
+                if (
+                    not 0 <= dependency < len(self.agents_sequence)
+                    or dependency == step
+                ):
+                    raise ValueError(
+                        f"Step {step} has an invalid dependency: {dependency}"
+                    )
+        if sum(len(wave) for wave in self.waves()) < len(self.agents_sequence):
+            raise ValueError("depends_on contains a cycle")
+        return self
+
+    def dependencies(self, step: int) -> List[int]:
+        """Indices of the steps a step waits for."""
+        return self.depends_on[step] if step < len(self.depends_on) else []
+
+    def waves(self, max_parallel: Optional[int] = None) -> List[List[int]]:
+        """Steps grouped into waves that can run in parallel, in execution order.
+
+        A step joins the first wave after all of its dependencies. Steps of
+        one wave never share an agent, and a wave holds at most max_parallel
+        steps; the steps left out move to the next wave. Steps on a
+        dependency cycle are never scheduled.
+        """
+        waves: List[List[int]] = []
+        done: set = set()
+        pending = list(range(len(self.agents_sequence)))
+        while pending:
+            wave: List[int] = []
+            agents: set = set()
+            for step in pending:
+                if max_parallel and len(wave) >= max_parallel:
+                    break
+                agent = self.agents_sequence[step]
+                if agent not in agents and done.issuperset(self.dependencies(step)):
+                    wave.append(step)
+                    agents.add(agent)
+            if not wave:
+                break
+            waves.append(wave)
+            done.update(wave)
+            pending = [step for step in pending if step not in done]
+        return waves
 
 
 class RouteDecision(BaseModel):
@@ -141,6 +210,45 @@ class RouteDecision(BaseModel):
     )
 
 
+def _agent_type(agent: str) -> str:
+    """Agent type of a plan agent name, e.g. "logs" for "logs_agent"."""
+    return agent[: -len("_agent")] if agent.endswith("_agent") else agent
+
+
+def _upstream_results(
+    plan: InvestigationPlan, wave: List[int], agent_results: Dict[str, Any]
+) -> Dict[str, Dict[str, Any]]:
+    """Results of the steps each agent of a wave depends on, by agent type."""
+    upstream: Dict[str, Dict[str, Any]] = {}
+    for step in wave:
+        results = {}
+        for dependency in plan.dependencies(step):
+            agent_type = _agent_type(plan.agents_sequence[dependency])
+            agent_metadata = SREConstants.agents.agents.get(agent_type)
+            name = agent_metadata.display_name if agent_metadata else agent_type
+            if name in agent_results:
+                results[name] = agent_results[name]
+        if results:
+            upstream[_agent_type(plan.agents_sequence[step])] = results
+    return upstream
+
+
+def _wave_reasoning(plan: InvestigationPlan, wave: List[int]) -> str:
+    """Routing reasoning for dispatching a wave of plan steps."""
+    descriptions = [
+        (
+            plan.steps[step]
+            if step < len(plan.steps)
+            else f"Execute {plan.agents_sequence[step]}"
+        )
+        for step in wave
+    ]
+    if len(wave) == 1:
+        return f"Executing plan step {wave[0] + 1}: {descriptions[0]}"
+    numbers = ", ".join(str(step + 1) for step in wave)
+    return f"Executing plan steps {numbers} in parallel: " + "; ".join(descriptions)
+
+
 def _read_supervisor_prompt() -> str:
     """Read supervisor system prompt from file."""
     try:
@@ -217,7 +325,7 @@ class SupervisorAgent:
         if self.memory_config.enabled:
             # Use region from llm_kwargs if provided for bedrock
             memory_region = llm_kwargs.get("region_name", self.memory_config.region) if llm_provider == "bedrock" else self.memory_config.region
-            self.memory_client = SREMemoryClient(
+            self.memory_client = get_memory_client(
                 memory_name=self.memory_config.memory_name,
                 region=memory_region,
                 force_delete=force_delete_memory,
@@ -317,7 +425,9 @@ class SupervisorAgent:
                         "session_id is required for memory retrieval but not found in state"
                     )
 
-                memory_context = self.memory_hooks.on_investigation_start(
+                # Retrieval blocks on the network, keep it off the event loop
+                memory_context = await asyncio.to_thread(
+                    self.memory_hooks.on_investigation_start,
                     query=current_query,
                     user_id=user_id,
                     actor_id=actor_id,
@@ -347,21 +457,10 @@ class SupervisorAgent:
                 )
                 investigation_count = len(memory_context.get("past_investigations", []))
 
-                if memory_context.get("user_preferences"):
-                    memory_context_text += f"\nRelevant User Preferences:\n{json.dumps(memory_context['user_preferences'], indent=2, default=_json_serializer)}\n"
-
-                if infrastructure_by_agent:
-                    memory_context_text += (
-                        "\nRelevant Infrastructure Knowledge (organized by agent):\n"
-                    )
-                    for agent_id, agent_memories in infrastructure_by_agent.items():
-                        memory_context_text += (
-                            f"\n  From {agent_id} ({len(agent_memories)} items):\n"
-                        )
-                        memory_context_text += f"{json.dumps(agent_memories, indent=4, default=_json_serializer)}\n"
-
-                if memory_context.get("past_investigations"):
-                    memory_context_text += f"\nSimilar Past Investigations:\n{json.dumps(memory_context['past_investigations'], indent=2, default=_json_serializer)}\n"
+                # Most relevant memories first, within the planning token budget
+                memory_context_text = assemble_memory_context(
+                    memory_context, current_query
+                )
 
                 logger.info(
                     f"Retrieved memory context for planning: {pref_count} preferences, {total_knowledge} knowledge items from {len(infrastructure_by_agent)} agents, {investigation_count} past investigations"
@@ -551,13 +650,13 @@ User's query: {current_query}
                 )
 
                 if success:
-                    logger.info("Supervisor: Successfully stored planning conversation")
+                    logger.info("Supervisor: Queued planning conversation for storage")
                 else:
-                    logger.warning("Supervisor: Failed to store planning conversation")
+                    logger.warning("Supervisor: Failed to queue planning conversation")
 
             except Exception as e:
                 logger.error(
-                    f"Supervisor: Error storing planning conversation: {e}",
+                    f"Supervisor: Error queuing planning conversation: {e}",
                     exc_info=True,
                 )
 
@@ -617,17 +716,23 @@ User's query: {current_query}
                 }
             else:
                 # Simple plan - start execution
-                next_agent = (
-                    plan.agents_sequence[0] if plan.agents_sequence else "FINISH"
-                )
+                waves = plan.waves(SREConstants.agents.max_parallel_agents)
+                wave = waves[0] if waves else []
                 plan_text = self._format_plan_markdown(plan)
                 return {
-                    "next": next_agent,
+                    "next": plan.agents_sequence[wave[0]] if wave else "FINISH",
+                    "next_agents": [plan.agents_sequence[step] for step in wave],
+                    "upstream_results": {},
                     "metadata": {
                         **state.get("metadata", {}),
                         "investigation_plan": plan.model_dump(),
-                        "routing_reasoning": f"Executing plan step 1: {plan.steps[0] if plan.steps else 'Start'}",
-                        "plan_step": 0,
+                        "routing_reasoning": (
+                            _wave_reasoning(plan, wave)
+                            if wave
+                            else "Executing plan step 1: Start"
+                        ),
+                        "plan_step": wave[-1] if wave else 0,
+                        "plan_wave": 0,
                         "plan_text": plan_text,
                         "show_plan": True,
                     },
@@ -637,41 +742,42 @@ User's query: {current_query}
         else:
             # Continue executing existing plan
             plan = InvestigationPlan(**existing_plan)
-            current_step = state.get("metadata", {}).get("plan_step", 0)
+            waves = plan.waves(SREConstants.agents.max_parallel_agents)
+            current_wave = state.get("metadata", {}).get("plan_wave", 0)
 
-            # Check if plan is complete
-            if current_step >= len(plan.agents_sequence) or not agents_invoked:
-                next_step = current_step
-            else:
-                next_step = current_step + 1
+            # Move on once the agents of the current wave have responded
+            next_wave = current_wave + 1 if agents_invoked else current_wave
 
-            if next_step >= len(plan.agents_sequence):
+            if next_wave >= len(waves):
                 # Plan complete
                 return {
                     "next": "FINISH",
+                    "next_agents": [],
+                    "upstream_results": {},
                     "metadata": {
                         **state.get("metadata", {}),
                         "routing_reasoning": "Investigation plan completed. Presenting results.",
-                        "plan_step": next_step,
+                        "plan_step": len(plan.agents_sequence),
+                        "plan_wave": next_wave,
                     },
                     # Preserve memory context in state
                     "memory_context": state.get("memory_context", {}),
                 }
             else:
-                # Continue with next agent in plan
-                next_agent = plan.agents_sequence[next_step]
-                step_description = (
-                    plan.steps[next_step]
-                    if next_step < len(plan.steps)
-                    else f"Execute {next_agent}"
-                )
-
+                # Continue with the next wave of the plan, handing each agent
+                # the results of the steps it depends on
+                wave = waves[next_wave]
                 return {
-                    "next": next_agent,
+                    "next": plan.agents_sequence[wave[0]],
+                    "next_agents": [plan.agents_sequence[step] for step in wave],
+                    "upstream_results": _upstream_results(
+                        plan, wave, state.get("agent_results", {})
+                    ),
                     "metadata": {
                         **state.get("metadata", {}),
-                        "routing_reasoning": f"Executing plan step {next_step + 1}: {step_description}",
-                        "plan_step": next_step,
+                        "routing_reasoning": _wave_reasoning(plan, wave),
+                        "plan_step": wave[-1],
+                        "plan_wave": next_wave,
                     },
                     # Preserve memory context in state
                     "memory_context": state.get("memory_context", {}),
@@ -856,16 +962,16 @@ You can:
 
                 if success:
                     logger.info(
-                        "Supervisor: Successfully stored final response conversation"
+                        "Supervisor: Queued final response conversation for storage"
                     )
                 else:
                     logger.warning(
-                        "Supervisor: Failed to store final response conversation"
+                        "Supervisor: Failed to queue final response conversation"
                     )
 
             except Exception as e:
                 logger.error(
-                    f"Supervisor: Error storing final response conversation: {e}",
+                    f"Supervisor: Error queuing final response conversation: {e}",
                     exc_info=True,
                 )
 
@@ -887,7 +993,7 @@ You can:
                     state=state, final_response=final_response, actor_id=actor_id
                 )
                 logger.info(
-                    f"Saved investigation summary to memory for incident {incident_id}"
+                    f"Queued investigation summary to memory for incident {incident_id}"
                 )
             except Exception as e:
                 logger.error(
@@ -23,7 +23,7 @@ class TestMemoryIntegration:
     @pytest.fixture
     def mock_memory_client(self):
         """Mock SREMemoryClient."""
-        with patch("sre_agent.supervisor.SREMemoryClient") as mock_client_class:
+        with patch("sre_agent.supervisor.get_memory_client") as mock_client_class:
             mock_client = Mock()
             mock_client_class.return_value = mock_client
             yield mock_client
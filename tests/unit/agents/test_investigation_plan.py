@@ -0,0 +1,224 @@
+import json
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from langchain_core.messages import AIMessage
+from pydantic import ValidationError
+
+from sre_agent.agent_nodes import BaseAgentNode
+from sre_agent.constants import SREConstants
+from sre_agent.supervisor import InvestigationPlan, SupervisorAgent, _upstream_results
+
+
+def _plan(agents_sequence, depends_on=None, **fields):
+    return InvestigationPlan(
+        steps=[f"Step for {agent}" for agent in agents_sequence],
+        agents_sequence=agents_sequence,
+        complexity="simple",
+        auto_execute=True,
+        reasoning="test plan",
+        depends_on=depends_on or [],
+        **fields,
+    )
+
+
+class TestValidateDependencies:
+    """Tests for rejecting depends_on values that are not a DAG."""
+
+    def test_cycle_is_rejected(self):
+        """Test that steps waiting on each other fail validation."""
+        with pytest.raises(ValidationError, match="cycle"):
+            _plan(["metrics_agent", "logs_agent"], [[1], [0]])
+
+    @pytest.mark.parametrize("dependency", [2, -1])
+    def test_out_of_range_dependency_is_rejected(self, dependency):
+        """Test that an index outside agents_sequence fails validation."""
+        with pytest.raises(ValidationError, match="invalid dependency"):
+            _plan(["metrics_agent", "logs_agent"], [[], [dependency]])
+
+    def test_self_dependency_is_rejected(self):
+        """Test that a step cannot wait on itself."""
+        with pytest.raises(ValidationError, match="invalid dependency"):
+            _plan(["metrics_agent", "logs_agent"], [[0], []])
+
+    def test_length_mismatch_is_rejected(self):
+        """Test that depends_on needs one entry per agent."""
+        with pytest.raises(ValidationError, match="1 entries for 2 agents"):
+            _plan(["metrics_agent", "logs_agent"], [[]])
+
+    def test_repeated_agent_is_rejected(self):
+        """Test that an agent cannot appear twice in a plan with dependencies."""
+        with pytest.raises(ValidationError, match="repeated: logs_agent"):
+            _plan(["logs_agent", "metrics_agent", "logs_agent"], [[], [0], [1]])
+
+
+class TestWaves:
+    """Tests for grouping plan steps into parallel waves."""
+
+    def test_plan_without_dependencies_runs_all_steps_in_parallel(self):
+        """Test that steps with no depends_on all start in the first wave."""
+        plan = _plan(["metrics_agent", "logs_agent", "kubernetes_agent"])
+
+        assert plan.waves() == [[0, 1, 2]]
+
+    def test_steps_wait_for_their_dependencies(self):
+        """Test that a step joins the first wave after its dependencies."""
+        plan = _plan(
+            ["kubernetes_agent", "logs_agent", "metrics_agent", "runbooks_agent"],
+            [[], [0], [], [1, 2]],
+        )
+
+        assert plan.waves() == [[0, 2], [1], [3]]
+
+    def test_waves_are_split_by_max_parallel(self):
+        """Test that steps beyond max_parallel move to the next wave."""
+        plan = _plan(
+            ["kubernetes_agent", "logs_agent", "metrics_agent", "runbooks_agent"]
+        )
+
+        assert plan.waves(max_parallel=3) == [[0, 1, 2], [3]]
+        assert plan.waves(max_parallel=1) == [[0], [1], [2], [3]]
+
+    def test_repeated_agent_moves_to_the_next_wave(self):
+        """Test that one agent is never dispatched twice in a wave."""
+        plan = _plan(["logs_agent", "metrics_agent", "logs_agent"])
+
+        assert plan.waves() == [[0, 1], [2]]
+
+
+class TestUpstreamResults:
+    """Tests for handing dependency results to the next wave."""
+
+    def test_results_of_dependencies_by_display_name(self):
+        """Test that each agent gets only the results of its own dependencies."""
+        plan = _plan(
+            ["kubernetes_agent", "metrics_agent", "logs_agent", "runbooks_agent"],
+            [[], [], [0], [0, 1]],
+        )
+        agent_results = {
+            "Kubernetes Infrastructure Agent": "pod api-7f restarting",
+            "Performance Metrics Agent": "p99 latency 2s",
+        }
+
+        assert _upstream_results(plan, [2, 3], agent_results) == {
+            "logs": {"Kubernetes Infrastructure Agent": "pod api-7f restarting"},
+            "runbooks": {
+                "Kubernetes Infrastructure Agent": "pod api-7f restarting",
+                "Performance Metrics Agent": "p99 latency 2s",
+            },
+        }
+
+    def test_steps_without_dependencies_get_nothing(self):
+        """Test that independent steps get no upstream results."""
+        plan = _plan(["metrics_agent", "logs_agent"])
+
+        assert (
+            _upstream_results(plan, [0, 1], {"Performance Metrics Agent": "ok"}) == {}
+        )
+
+
+def _supervisor(planning_agent=None):
+    supervisor = SupervisorAgent.__new__(SupervisorAgent)
+    supervisor.planning_agent = planning_agent
+    supervisor.memory_tools = [Mock()]
+    supervisor.memory_client = None
+    supervisor.conversation_manager = None
+    supervisor.system_prompt = ""
+    return supervisor
+
+
+class TestSupervisorPlanning:
+    """Tests for creating and executing investigation plans."""
+
+    @pytest.mark.asyncio
+    async def test_invalid_dag_falls_back_to_default_plan(self):
+        """Test that a cyclic plan from the LLM is replaced by the default plan."""
+        plan_json = {
+            "steps": ["Check metrics", "Check logs"],
+            "agents_sequence": ["metrics_agent", "logs_agent"],
+            "complexity": "simple",
+            "auto_execute": True,
+            "reasoning": "metrics and logs",
+            "depends_on": [[1], [0]],
+        }
+        planning_agent = AsyncMock()
+        planning_agent.ainvoke.return_value = {
+            "messages": [AIMessage(content=json.dumps(plan_json))]
+        }
+
+        plan = await _supervisor(planning_agent).create_investigation_plan(
+            {"current_query": "Why is the API slow?", "user_id": "alice"}
+        )
+
+        assert plan.reasoning == "Default investigation plan due to validation error"
+        assert plan.agents_sequence == ["metrics_agent", "logs_agent"]
+        assert plan.depends_on == []
+
+    @pytest.mark.asyncio
+    async def test_route_dispatches_next_wave_with_upstream_results(self, monkeypatch):
+        """Test that route sends the next wave, capped by max_parallel_agents."""
+        monkeypatch.setattr(SREConstants.agents, "max_parallel_agents", 2)
+        plan = _plan(
+            ["kubernetes_agent", "metrics_agent", "logs_agent", "runbooks_agent"],
+            [[], [], [0], [0]],
+        )
+        state = {
+            "agents_invoked": ["Kubernetes Infrastructure Agent"],
+            "agent_results": {
+                "Kubernetes Infrastructure Agent": "pod api-7f restarting"
+            },
+            "metadata": {"investigation_plan": plan.model_dump(), "plan_wave": 0},
+        }
+
+        decision = await _supervisor().route(state)
+
+        assert decision["next_agents"] == ["logs_agent", "runbooks_agent"]
+        assert decision["upstream_results"] == {
+            "logs": {"Kubernetes Infrastructure Agent": "pod api-7f restarting"},
+            "runbooks": {"Kubernetes Infrastructure Agent": "pod api-7f restarting"},
+        }
+        assert decision["metadata"]["plan_wave"] == 1
+        assert decision["metadata"]["plan_step"] == 3
+
+
+class TestAgentPrompt:
+    """Tests for the upstream results in an agent's prompt."""
+
+    @pytest.mark.asyncio
+    async def test_upstream_results_are_added_to_the_prompt(self):
+        """Test that an agent sees the findings of the steps it depends on."""
+        prompts = []
+
+        async def astream(inputs):
+            prompts.append(inputs["messages"][-1].content)
+            yield {"agent": {"messages": [AIMessage(content="error spike at 10:02")]}}
+
+        node = BaseAgentNode.__new__(BaseAgentNode)
+        node.name = "Application Logs Agent"
+        node.description = "Handles application log analysis"
+        node.agent_type = "logs"
+        node.llm_provider = "bedrock"
+        node.llm_kwargs = {}
+        node.agent = Mock(astream=astream)
+
+        result = await node(
+            {
+                "messages": [],
+                "current_query": "Why is the API slow?",
+                "upstream_results": {
+                    "logs": {
+                        "Kubernetes Infrastructure Agent": "pod api-7f restarting"
+                    },
+                    "metrics": {"Operational Runbooks Agent": "not for logs"},
+                },
+            }
+        )
+
+        assert prompts[0] == (
+            "As the Application Logs Agent, help with: Why is the API slow?"
+            "\n\nFindings from earlier investigation steps:"
+            "\n\n[Kubernetes Infrastructure Agent]\npod api-7f restarting"
+        )
+        assert result["agent_results"] == {
+            "Application Logs Agent": "error spike at 10:02"
+        }
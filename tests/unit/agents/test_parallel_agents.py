@@ -0,0 +1,121 @@
+import pytest
+from langgraph.graph import END, StateGraph
+from langgraph.types import Send
+
+from sre_agent.agent_state import AgentState, append_unique, merge_dicts
+from sre_agent.graph_builder import _route_supervisor
+
+
+class TestReducers:
+    """Tests for the reducers merging updates from parallel agents."""
+
+    def test_merge_dicts_keeps_keys_from_both_sides(self):
+        """Test that each side's keys survive, with the update winning ties."""
+        assert merge_dicts({"a": 1, "b": 1}, {"b": 2, "c": 3}) == {
+            "a": 1,
+            "b": 2,
+            "c": 3,
+        }
+        assert merge_dicts(None, {"a": 1}) == {"a": 1}
+        assert merge_dicts({"a": 1}, None) == {"a": 1}
+
+    def test_append_unique_keeps_order_without_duplicates(self):
+        """Test that items are appended once, in first-seen order."""
+        assert append_unique(["a", "b"], ["b", "c", "c"]) == ["a", "b", "c"]
+        assert append_unique(None, ["a"]) == ["a"]
+        assert append_unique(["a"], None) == ["a"]
+
+
+class TestRouteSupervisor:
+    """Tests for dispatching the supervisor's next agents."""
+
+    def test_finish_goes_to_aggregate(self):
+        """Test that a finished investigation is aggregated."""
+        assert _route_supervisor({"next": "FINISH"}) == "aggregate"
+
+    def test_single_agent_routes_by_node_name(self):
+        """Test that one agent is routed to directly, without a Send."""
+        assert _route_supervisor({"next": "logs"}) == "logs_agent"
+        assert (
+            _route_supervisor({"next": "logs", "next_agents": ["logs_agent"]})
+            == "logs_agent"
+        )
+
+    def test_several_agents_are_sent_in_parallel(self):
+        """Test that each distinct agent gets a Send carrying the state."""
+        state = {
+            "next": "metrics",
+            "next_agents": ["metrics", "logs_agent", "metrics_agent"],
+        }
+
+        sends = _route_supervisor(state)
+
+        assert [send.node for send in sends] == ["metrics_agent", "logs_agent"]
+        assert all(isinstance(send, Send) and send.arg is state for send in sends)
+
+
+def _agent(name):
+    async def node(state):
+        return {
+            "agent_results": {name: f"{name} findings"},
+            "agents_invoked": [name],
+            "metadata": {f"{name}_trace": [name]},
+        }
+
+    return node
+
+
+def _parallel_graph():
+    async def supervisor(state):
+        return {"next": "metrics", "next_agents": ["metrics", "logs", "kubernetes"]}
+
+    workflow = StateGraph(AgentState)
+    workflow.add_node("supervisor", supervisor)
+    for node in ("metrics_agent", "logs_agent", "kubernetes_agent"):
+        workflow.add_node(node, _agent(node))
+        workflow.add_edge(node, END)
+    workflow.set_entry_point("supervisor")
+    workflow.add_conditional_edges(
+        "supervisor",
+        _route_supervisor,
+        ["metrics_agent", "logs_agent", "kubernetes_agent", "aggregate"],
+    )
+    workflow.add_node("aggregate", lambda state: {})
+    workflow.add_edge("aggregate", END)
+    return workflow.compile()
+
+
+class TestParallelFanOut:
+    """Tests for merging the state written by agents running in parallel."""
+
+    @pytest.mark.asyncio
+    async def test_parallel_agents_do_not_lose_writes(self):
+        """Test that every parallel agent's results, name and trace are kept."""
+        final = await _parallel_graph().ainvoke(
+            {
+                "messages": [],
+                "agent_results": {"runbooks_agent": "earlier findings"},
+                "agents_invoked": ["runbooks_agent"],
+                "metadata": {"plan_wave": 1},
+            }
+        )
+
+        assert final["agent_results"] == {
+            "runbooks_agent": "earlier findings",
+            "metrics_agent": "metrics_agent findings",
+            "logs_agent": "logs_agent findings",
+            "kubernetes_agent": "kubernetes_agent findings",
+        }
+        assert final["agents_invoked"][0] == "runbooks_agent"
+        assert sorted(final["agents_invoked"]) == [
+            "kubernetes_agent",
+            "logs_agent",
+            "metrics_agent",
+            "runbooks_agent",
+        ]
+        assert final["metadata"] == {
+            "plan_wave": 1,
+            "metrics_agent_trace": ["metrics_agent"],
+            "logs_agent_trace": ["logs_agent"],
+            "kubernetes_agent_trace": ["kubernetes_agent"],
+        }
@@ -0,0 +1,85 @@
+from unittest.mock import patch
+
+from sre_agent.memory.cache import ParsedRecordCache, RetrievalCache
+
+
+class TestRetrievalCache:
+    """Tests for the memory retrieval cache."""
+
+    def test_hits_and_misses(self):
+        """Test that results are keyed by namespace, query and top_k."""
+        cache = RetrievalCache()
+        cache.put("/sre/users/alice/preferences", "escalation", 10, [{"id": 1}])
+
+        assert cache.get("/sre/users/alice/preferences", "escalation", 10) == [
+            {"id": 1}
+        ]
+        assert cache.get("/sre/users/alice/preferences", "escalation", 5) is None
+        assert cache.get("/sre/users/bob/preferences", "escalation", 10) is None
+
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"]) == (1, 2)
+        assert stats["hit_rate"] == 1 / 3
+
+    def test_entries_expire(self):
+        """Test that an entry is not served past its TTL."""
+        cache = RetrievalCache(ttl_seconds=60)
+        with patch("sre_agent.memory.cache.time.monotonic", return_value=100.0):
+            cache.put("/sre/users/alice/preferences", "q", 10, [{"id": 1}])
+        with patch("sre_agent.memory.cache.time.monotonic", return_value=161.0):
+            assert cache.get("/sre/users/alice/preferences", "q", 10) is None
+        assert cache.stats()["entries"] == 0
+
+    def test_least_recently_used_is_evicted(self):
+        """Test that the oldest unused entry goes once the cache is full."""
+        cache = RetrievalCache(max_entries=2)
+        cache.put("/a", "q", 1, [])
+        cache.put("/b", "q", 1, [])
+        cache.get("/a", "q", 1)
+        cache.put("/c", "q", 1, [])
+
+        assert cache.get("/a", "q", 1) == []
+        assert cache.get("/b", "q", 1) is None
+        assert cache.stats()["evictions"] == 1
+
+    def test_invalidate_covers_sessions_below_namespace(self):
+        """Test that invalidating an actor namespace drops its session namespaces."""
+        cache = RetrievalCache()
+        cache.put("/sre/infrastructure/alice", "q", 10, [])
+        cache.put("/sre/infrastructure/alice/s1", "q", 10, [])
+        cache.put("/sre/infrastructure/alice2", "q", 10, [])
+
+        assert cache.invalidate("/sre/infrastructure/alice") == 2
+        assert cache.get("/sre/infrastructure/alice2", "q", 10) == []
+
+
+class TestParsedRecordCache:
+    """Tests for the parsed memory record cache."""
+
+    def test_key_changes_with_content(self):
+        """Test that records are keyed by id, content and scope."""
+        record = {"memoryRecordId": "r1", "content": {"text": "a"}}
+        key = ParsedRecordCache.key("preference", record, "alice")
+
+        assert key == ParsedRecordCache.key("preference", dict(record), "alice")
+        assert key != ParsedRecordCache.key("preference", record, "bob")
+        assert key != ParsedRecordCache.key(
+            "preference", {"memoryRecordId": "r1", "content": {"text": "b"}}, "alice"
+        )
+        assert ParsedRecordCache.key("preference", {"content": {"text": "a"}}) is None
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test that the oldest unused entry goes once the cache is full."""
+        cache = ParsedRecordCache(max_entries=2)
+        keys = [
+            ParsedRecordCache.key("infrastructure", {"memoryRecordId": f"r{i}"})
+            for i in range(3)
+        ]
+        cache.put(keys[0], "zero")
+        cache.put(keys[1], "one")
+        cache.get(keys[0])
+        cache.put(keys[2], "two")
+
+        assert cache.get(keys[0]) == "zero"
+        assert cache.get(keys[1]) is None
+        assert cache.stats()["entries"] == 2
@@ -0,0 +1,302 @@
+import json
+import threading
+from unittest.mock import patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+from sre_agent.constants import SREConstants
+from sre_agent.memory import client as memory_client_module
+from sre_agent.memory.client import STRATEGY_NAMES, SREMemoryClient, get_memory_client
+
+
+class TestGetMemoryClient:
+    """Tests for the process-wide memory client registry."""
+
+    @pytest.fixture
+    def mock_client_class(self):
+        """Patch SREMemoryClient and start from an empty registry."""
+        with (
+            patch.dict(memory_client_module._memory_clients, clear=True),
+            patch("sre_agent.memory.client.SREMemoryClient") as mock_class,
+        ):
+            mock_class.side_effect = lambda **kwargs: object()
+            yield mock_class
+
+    def test_client_is_shared_per_name_and_region(self, mock_client_class):
+        """Test that a client is created once per memory name and region."""
+        first = get_memory_client(region="us-east-1")
+
+        assert get_memory_client(region="us-east-1") is first
+        assert get_memory_client(region="us-west-2") is not first
+        assert get_memory_client("other_memory", "us-east-1") is not first
+        assert mock_client_class.call_count == 3
+
+    def test_concurrent_first_calls_create_one_client(self, mock_client_class):
+        """Test that threads racing on the first call share one client."""
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(get_memory_client()))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len({id(client) for client in results}) == 1
+        mock_client_class.assert_called_once_with(
+            memory_name="sre_agent_memory", region="us-east-1", force_delete=False
+        )
+
+
+class TestCachedMemoryStartup:
+    """Tests for starting from the persisted memory id."""
+
+    MEMORY_ID = "sre_agent_memory-abc123"
+
+    @pytest.fixture
+    def memory_files(self, tmp_path):
+        """Point the memory id and manifest files at a temporary directory."""
+        id_file = tmp_path / ".memory_id"
+        manifest_file = tmp_path / ".memory_manifest.json"
+        with (
+            patch("sre_agent.memory.client.MEMORY_ID_FILE", id_file),
+            patch("sre_agent.memory.client.MEMORY_MANIFEST_FILE", manifest_file),
+        ):
+            yield id_file, manifest_file
+
+    @pytest.fixture
+    def mock_memory_client(self):
+        """Patch the AgentCore memory client."""
+        with patch("sre_agent.memory.client.MemoryClient") as mock_class:
+            yield mock_class.return_value
+
+    def test_cached_memory_skips_discovery(self, memory_files, mock_memory_client):
+        """Test that a manifest for the stored id avoids listing memories."""
+        id_file, manifest_file = memory_files
+        id_file.write_text(self.MEMORY_ID)
+        manifest_file.write_text(
+            json.dumps({"memory_id": self.MEMORY_ID, "strategies": STRATEGY_NAMES})
+        )
+        strategies = [{"name": name} for name in STRATEGY_NAMES]
+
+        with patch.object(
+            SREMemoryClient, "_get_memory", return_value={"strategies": strategies}
+        ) as mock_get_memory:
+            client = SREMemoryClient()
+            client._validation_thread.join()
+
+        assert client.memory_id == self.MEMORY_ID
+        mock_get_memory.assert_called_once_with(self.MEMORY_ID)
+        mock_memory_client.list_memories.assert_not_called()
+
+    def test_configured_memory_id_skips_discovery(
+        self, memory_files, mock_memory_client, monkeypatch
+    ):
+        """Test that MEMORY_ID starts from that memory without any cached files."""
+        monkeypatch.setenv("MEMORY_ID", self.MEMORY_ID)
+        strategies = [{"name": name} for name in STRATEGY_NAMES]
+
+        with patch.object(
+            SREMemoryClient, "_get_memory", return_value={"strategies": strategies}
+        ) as mock_get_memory:
+            client = SREMemoryClient()
+            client._validation_thread.join()
+
+        assert client.memory_id == self.MEMORY_ID
+        mock_get_memory.assert_called_once_with(self.MEMORY_ID)
+        mock_memory_client.list_memories.assert_not_called()
+        assert not memory_files[0].exists()
+
+    def _start_cached(self, memory_files, get_memory):
+        id_file, manifest_file = memory_files
+        id_file.write_text(self.MEMORY_ID)
+        manifest_file.write_text(
+            json.dumps({"memory_id": self.MEMORY_ID, "strategies": STRATEGY_NAMES})
+        )
+        with patch.object(SREMemoryClient, "_get_memory", side_effect=get_memory):
+            client = SREMemoryClient()
+            client._validation_thread.join()
+        return client
+
+    def test_transient_validation_error_keeps_cached_memory(
+        self, memory_files, mock_memory_client
+    ):
+        """Test that throttling or timeouts neither rediscover nor create a memory."""
+        error = ClientError(
+            {"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}},
+            "GetMemory",
+        )
+
+        client = self._start_cached(memory_files, error)
+
+        assert client.memory_id == self.MEMORY_ID
+        mock_memory_client.list_memories.assert_not_called()
+        mock_memory_client.create_memory.assert_not_called()
+
+    def test_deleted_memory_is_rediscovered(self, memory_files, mock_memory_client):
+        """Test that a memory that no longer exists is looked up again."""
+        error = ClientError(
+            {"Error": {"Code": "ResourceNotFoundException", "Message": "Not found"}},
+            "GetMemory",
+        )
+        mock_memory_client.list_memories.return_value = []
+        mock_memory_client.create_memory.return_value = {
+            "id": "sre_agent_memory-new456"
+        }
+
+        client = self._start_cached(memory_files, error)
+
+        assert client.memory_id == "sre_agent_memory-new456"
+        mock_memory_client.list_memories.assert_called_once()
+
+    def test_missing_strategies_are_added_to_cached_memory(
+        self, memory_files, mock_memory_client
+    ):
+        """Test that only the missing strategies are added, without a lookup."""
+        memory = {
+            "strategies": [{"name": name} for name in STRATEGY_NAMES[:2]],
+        }
+
+        client = self._start_cached(memory_files, lambda memory_id: memory)
+
+        assert client.memory_id == self.MEMORY_ID
+        mock_memory_client.list_memories.assert_not_called()
+        mock_memory_client.create_memory.assert_not_called()
+        mock_memory_client.add_summary_strategy_and_wait.assert_called_once()
+        mock_memory_client.add_user_preference_strategy_and_wait.assert_not_called()
+
+    def test_missing_manifest_falls_back_to_discovery(
+        self, memory_files, mock_memory_client
+    ):
+        """Test that an id without a manifest is looked up and the manifest written."""
+        id_file, manifest_file = memory_files
+        id_file.write_text(self.MEMORY_ID)
+        mock_memory_client.list_memories.return_value = [{"id": self.MEMORY_ID}]
+        strategies = [{"name": name} for name in STRATEGY_NAMES]
+
+        with patch.object(
+            SREMemoryClient,
+            "_get_memory",
+            return_value={
+                "id": self.MEMORY_ID,
+                "name": "sre_agent_memory",
+                "strategies": strategies,
+            },
+        ):
+            client = SREMemoryClient()
+
+        assert client.memory_id == self.MEMORY_ID
+        assert client._validation_thread is None
+        mock_memory_client.list_memories.assert_called_once()
+        manifest = json.loads(manifest_file.read_text())
+        assert manifest["memory_id"] == self.MEMORY_ID
+        assert set(manifest["strategies"]) == set(STRATEGY_NAMES)
+
+
+class TestRetrievalCaching:
+    """Tests for caching retrievals in the memory client."""
+
+    @pytest.fixture
+    def client(self):
+        """A memory client with a known memory id and a mocked AgentCore client."""
+        with (
+            patch("sre_agent.memory.client.MemoryClient") as mock_class,
+            patch.object(SREMemoryClient, "_initialize_memories"),
+        ):
+            client = SREMemoryClient()
+        client.memory_id = "sre_agent_memory-abc123"
+        client.client = mock_class.return_value
+        client.client.retrieve_memories.return_value = [{"content": {"text": "x"}}]
+        client.client.create_event.return_value = {"eventId": "e1"}
+        return client
+
+    def test_repeated_retrieval_is_served_from_cache(self, client):
+        """Test that the same namespace, query and top_k is fetched once."""
+        first = client.retrieve_memories("preferences", "alice", "escalation")
+        second = client.retrieve_memories("preferences", "alice", "escalation")
+
+        assert first == second
+        client.client.retrieve_memories.assert_called_once()
+        assert client.retrieval_cache.stats()["hits"] == 1
+
+    def test_write_invalidates_actor_namespaces(self, client):
+        """Test that writing an event for an actor drops its cached retrievals."""
+        client.retrieve_memories("infrastructure", "alice", "db", session_id="s1")
+        client.retrieve_memories("preferences", "bob", "escalation")
+
+        client._create_event("alice", "s1", [("db is slow", "ASSISTANT")])
+        client.retrieve_memories("infrastructure", "alice", "db", session_id="s1")
+        client.retrieve_memories("preferences", "bob", "escalation")
+
+        assert client.client.retrieve_memories.call_count == 3
+
+
+class TestSaveEvents:
+    """Tests for saving several memory events together."""
+
+    @pytest.fixture
+    def client(self):
+        """A memory client with a known memory id and a mocked AgentCore client."""
+        with (
+            patch("sre_agent.memory.client.MemoryClient") as mock_class,
+            patch.object(SREMemoryClient, "_initialize_memories"),
+        ):
+            client = SREMemoryClient()
+        client.memory_id = "sre_agent_memory-abc123"
+        client.client = mock_class.return_value
+        client.client.create_event.return_value = {"eventId": "e1"}
+        return client
+
+    def test_events_are_written_in_bounded_chunks(self, client):
+        """Test that events become multi-message writes of at most event_batch_size."""
+        events = [{"service_name": f"svc-{i}"} for i in range(5)]
+        client.write_queue.max_batch_messages = 2
+
+        with patch.object(SREConstants.memory, "event_batch_size", 2):
+            results = client.save_events("infrastructure", "alice", events, "s1")
+        assert client.flush_events(timeout=5)
+
+        assert results == [True] * 5
+        assert [
+            len(call.kwargs["messages"])
+            for call in client.client.create_event.call_args_list
+        ] == [2, 2, 1]
+
+    def test_dropped_chunk_fails_only_its_events(self, client):
+        """Test that each event reports whether its own chunk was queued."""
+        events = [{"service_name": f"svc-{i}"} for i in range(3)]
+
+        with (
+            patch.object(SREConstants.memory, "event_batch_size", 2),
+            patch.object(client, "queue_event", side_effect=[True, False]),
+        ):
+            results = client.save_events("infrastructure", "alice", events, "s1")
+
+        assert results == [True, True, False]
+
+    def test_write_results_are_reported_per_event(self, client):
+        """Test that on_written reports each event once its chunk is written."""
+        events = [{"service_name": f"svc-{i}"} for i in range(4)]
+        client.write_queue.max_batch_messages = 2
+        client.write_queue.max_retries = 0
+        client.client.create_event.side_effect = [{"eventId": "e1"}, Exception("down")]
+        written = []
+
+        with patch.object(SREConstants.memory, "event_batch_size", 2):
+            client.save_events(
+                "infrastructure",
+                "alice",
+                events,
+                "s1",
+                on_written=lambda index, success: written.append((index, success)),
+            )
+        assert client.flush_events(timeout=5)
+
+        assert sorted(written) == [(0, True), (1, True), (2, False), (3, False)]
+
+    def test_session_is_required_for_infrastructure(self, client):
+        """Test that infrastructure events need a session id."""
+        with pytest.raises(ValueError):
+            client.save_events("infrastructure", "alice", [{"a": 1}])
@@ -42,6 +42,14 @@ class TestMemoryConfig:
         assert config.auto_capture_infrastructure is False
         assert config.auto_generate_summaries is False
 
+    def test_memory_id_is_read_from_the_environment(self, monkeypatch):
+        """Test that MEMORY_ID sets the memory id, and an empty value does not."""
+        monkeypatch.setenv("MEMORY_ID", "sre_agent_memory-abc123")
+        assert MemoryConfig().memory_id == "sre_agent_memory-abc123"
+
+        monkeypatch.setenv("MEMORY_ID", "")
+        assert MemoryConfig().memory_id is None
+
     def test_load_memory_config_success(self):
         """Test successful memory config loading."""
         config = _load_memory_config()
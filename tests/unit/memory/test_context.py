@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+
+from sre_agent.memory.context import assemble_memory_context, estimate_tokens
+
+NOW = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+def _record(text, days_old=0):
+    return {"content": {"text": text}, "createdAt": NOW - timedelta(days=days_old)}
+
+
+class TestAssembleMemoryContext:
+    """Tests for packing memory records into the planning prompt."""
+
+    def test_records_are_grouped_by_memory_type(self):
+        """Test that each memory type gets a heading and one line per record."""
+        text = assemble_memory_context(
+            {
+                "user_preferences": ['{"preference": "Escalate to ops"}'],
+                "infrastructure_by_agent": {
+                    "metrics-agent": [_record("api-gateway p99 baseline is 120ms")]
+                },
+                "past_investigations": [_record("api-gateway outage from bad deploy")],
+            },
+            "api-gateway latency",
+            now=NOW,
+        )
+
+        assert "Relevant User Preferences:\n- " in text
+        assert "- [metrics-agent, 2026-10-01] api-gateway p99 baseline" in text
+        assert "Similar Past Investigations:\n- [2026-10-01] api-gateway outage" in text
+
+    def test_budget_keeps_the_most_relevant_and_recent_records(self):
+        """Test that records outside the budget are the least useful ones."""
+        memories = [
+            _record(f"checkout service note {i} " + "detail " * 20, days_old=i)
+            for i in range(10)
+        ]
+        memories.append(_record("api-gateway latency spikes at peak", days_old=60))
+
+        text = assemble_memory_context(
+            {"infrastructure_by_agent": {"logs-agent": memories}},
+            "api-gateway latency",
+            token_budget=150,
+            now=NOW,
+        )
+
+        assert estimate_tokens(text) <= 150
+        assert "api-gateway latency spikes" in text
+        assert "checkout service note 0 " in text
+        assert "checkout service note 9 " not in text
+
+    def test_near_duplicates_are_dropped(self):
+        """Test that a record repeating a higher ranked one is left out."""
+        text = assemble_memory_context(
+            {
+                "infrastructure_by_agent": {
+                    "k8s-agent": [
+                        _record("payment pods restart due to OOMKilled"),
+                        _record("Payment pods restart due to OOMKilled.", days_old=5),
+                        _record("payment database connection pool is 50"),
+                    ]
+                }
+            },
+            "payment pods",
+            now=NOW,
+        )
+
+        assert text.count("OOMKilled") == 1
+        assert "connection pool" in text
+
+    def test_long_records_are_truncated(self):
+        """Test that one large record cannot take the whole budget."""
+        text = assemble_memory_context(
+            {"past_investigations": [_record("x" * 10000)]}, "query", now=NOW
+        )
+
+        assert "x" * 10000 not in text
+        assert text.rstrip().endswith("...")
+
+    def test_empty_context(self):
+        """Test that no memories give no prompt text."""
+        assert assemble_memory_context({}, "api latency", now=NOW) == ""
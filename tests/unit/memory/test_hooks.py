@@ -0,0 +1,198 @@
+import threading
+import time
+from unittest.mock import Mock, patch
+
+from sre_agent.constants import SREConstants
+from sre_agent.memory.hooks import MemoryHookProvider, SeenWrites
+
+
+class TestOnInvestigationStart:
+    """Tests for memory context retrieval at investigation start."""
+
+    def test_retrievals_run_concurrently(self):
+        """Test that the three retrievals overlap instead of running in turn."""
+        barrier = threading.Barrier(3, timeout=5)
+
+        def retrieve_memories(memory_type, **kwargs):
+            # Only returns once all three retrievals are in flight
+            barrier.wait()
+            return [{"content": {"text": f"{memory_type} memory"}}]
+
+        client = Mock()
+        client.retrieve_memories.side_effect = retrieve_memories
+
+        context = MemoryHookProvider(client).on_investigation_start(
+            query="api latency", user_id="alice", actor_id="alice", session_id="s1"
+        )
+
+        assert context["user_preferences"] == ["preferences memory"]
+        assert len(context["past_investigations"]) == 1
+        assert client.retrieve_memories.call_count == 3
+
+    def test_slow_retrieval_is_skipped(self):
+        """Test that a retrieval past the timeout leaves the others intact."""
+        release = threading.Event()
+
+        def retrieve_memories(memory_type, **kwargs):
+            if memory_type == "infrastructure":
+                release.wait(5)
+            return [{"content": {"text": f"{memory_type} memory"}}]
+
+        client = Mock()
+        client.retrieve_memories.side_effect = retrieve_memories
+
+        with patch.object(SREConstants.memory, "retrieval_timeout_seconds", 0.2):
+            start = time.monotonic()
+            context = MemoryHookProvider(client).on_investigation_start(
+                query="api latency", user_id="alice", actor_id="alice", session_id="s1"
+            )
+            elapsed = time.monotonic() - start
+        release.set()
+
+        assert elapsed < 2
+        assert context["user_preferences"] == ["preferences memory"]
+        assert context["infrastructure_by_agent"] == {}
+        assert len(context["past_investigations"]) == 1
+
+
+class TestPreferenceExtraction:
+    """Tests for preference and knowledge capture from agent responses."""
+
+    def _on_response(self, provider, response, session_id="s1"):
+        provider.on_agent_response(
+            agent_name=SREConstants.agents.agents["kubernetes"].display_name,
+            response={"content": response},
+            state={"user_id": "alice", "session_id": session_id},
+        )
+
+    def test_repeated_preferences_are_saved_once(self):
+        """Test that a contact or channel already saved in the session is skipped."""
+        client = Mock()
+        provider = MemoryHookProvider(client, seen_writes=SeenWrites())
+
+        with patch(
+            "sre_agent.memory.hooks._save_user_preference", return_value=True
+        ) as save:
+            self._on_response(
+                provider,
+                "Escalate to oncall@example.com and post to #incidents. "
+                "If it recurs, contact ONCALL@example.com.",
+            )
+            self._on_response(provider, "Notify #incidents and notify ops@example.com")
+
+        # Contacts stop at the first dot, as they always have
+        saved = [call.args[2].preference_value for call in save.call_args_list]
+        assert saved == [
+            {"contact": "oncall@example"},
+            {"channel": "#incidents"},
+            {"contact": "ops@example"},
+        ]
+
+    def test_other_sessions_save_again(self):
+        """Test that the seen-set is kept per session."""
+        provider = MemoryHookProvider(Mock(), seen_writes=SeenWrites())
+
+        with patch(
+            "sre_agent.memory.hooks._save_user_preference", return_value=True
+        ) as save:
+            self._on_response(provider, "Post to #incidents", session_id="s1")
+            self._on_response(provider, "Post to #incidents", session_id="s2")
+
+        assert save.call_count == 2
+
+    def test_failed_saves_are_retried(self):
+        """Test that only successful saves are remembered."""
+        provider = MemoryHookProvider(Mock(), seen_writes=SeenWrites())
+
+        with patch(
+            "sre_agent.memory.hooks._save_user_preference", side_effect=[False, True]
+        ) as save:
+            self._on_response(provider, "Post to #incidents")
+            self._on_response(provider, "Post to #incidents")
+
+        assert save.call_count == 2
+
+    def test_preferences_whose_write_fails_later_are_saved_again(self):
+        """Test that a queued preference is only remembered once it is written."""
+        provider = MemoryHookProvider(Mock(), seen_writes=SeenWrites())
+        outcomes = iter([False, True])
+
+        def save(client, user_id, preference, on_written=None):
+            on_written(next(outcomes))
+            return True
+
+        with patch(
+            "sre_agent.memory.hooks._save_user_preference", side_effect=save
+        ) as save_preference:
+            for _ in range(3):
+                self._on_response(provider, "Post to #incidents")
+
+        assert save_preference.call_count == 2
+
+    def test_knowledge_whose_write_fails_later_is_saved_again(self):
+        """Test that knowledge in flight is skipped and released if its write fails."""
+        provider = MemoryHookProvider(Mock(), seen_writes=SeenWrites())
+        response = (
+            '```json\n{"infrastructure_knowledge": [{"service_name": "api", '
+            '"knowledge_type": "baseline", "knowledge_data": {"p99_ms": 120}}]}\n```'
+        )
+        callbacks = []
+
+        def save(client, actor, items, session, on_written=None):
+            callbacks.append(on_written)
+            return [True] * len(items)
+
+        with patch(
+            "sre_agent.memory.hooks._save_infrastructure_knowledge_batch",
+            side_effect=save,
+        ) as save_knowledge:
+            self._on_response(provider, response)
+            # Still being written, so not queued again
+            self._on_response(provider, response)
+            callbacks[0](0, False)
+            self._on_response(provider, response)
+            callbacks[1](0, True)
+            self._on_response(provider, response)
+
+        assert save_knowledge.call_count == 2
+
+    def test_repeated_knowledge_is_saved_once(self):
+        """Test that identical infrastructure knowledge is saved once per session."""
+        provider = MemoryHookProvider(Mock(), seen_writes=SeenWrites())
+        response = (
+            '```json\n{"infrastructure_knowledge": [{"service_name": "api", '
+            '"knowledge_type": "baseline", "knowledge_data": {"p99_ms": 120}}]}\n```'
+        )
+
+        with patch(
+            "sre_agent.memory.hooks._save_infrastructure_knowledge_batch",
+            side_effect=lambda client, actor, items, *args, **kwargs: (
+                [True] * len(items)
+            ),
+        ) as save:
+            self._on_response(provider, response)
+            self._on_response(provider, response)
+
+        save.assert_called_once()
+
+    def test_knowledge_items_are_saved_together(self):
+        """Test that the items of a response are saved in one batch."""
+        provider = MemoryHookProvider(Mock(), seen_writes=SeenWrites())
+        items = ", ".join(
+            f'{{"service_name": "svc-{i}", "knowledge_type": "dependency", '
+            f'"knowledge_data": {{"depends_on": "db"}}}}'
+            for i in range(3)
+        )
+        response = f'```json\n{{"infrastructure_knowledge": [{items}]}}\n```'
+
+        with patch(
+            "sre_agent.memory.hooks._save_infrastructure_knowledge_batch",
+            return_value=[True, False, True],
+        ) as save:
+            self._on_response(provider, response)
+            self._on_response(provider, response)
+
+        # Only the item that failed to save is retried
+        assert save.call_count == 2
+        retried = save.call_args_list[1].args[2]
+        assert [knowledge.service_name for knowledge in retried] == ["svc-1"]
@@ -0,0 +1,74 @@
+import pytest
+
+from sre_agent.memory.client import SREMemoryClient
+from sre_agent.memory.local_backend import LocalMemoryClient
+
+
+class TestLocalMemoryClient:
+    """Tests for the SQLite memory backend."""
+
+    @pytest.fixture
+    def backend(self):
+        """A local backend with one memory and a session scoped strategy."""
+        backend = LocalMemoryClient(":memory:")
+        memory_id = backend.create_memory(name="sre_agent_memory")["id"]
+        backend.add_semantic_strategy_and_wait(
+            memory_id=memory_id,
+            name="infrastructure_knowledge",
+            namespaces=["/sre/infrastructure/{actorId}/{sessionId}"],
+        )
+        yield backend, memory_id
+        backend.close()
+
+    def test_events_land_in_strategy_namespaces(self, backend):
+        """Test that records are stored under the actor and session namespace."""
+        backend, memory_id = backend
+        backend.create_event(
+            memory_id, "alice", "s1", [("payments depends on postgres", "ASSISTANT")]
+        )
+
+        records = backend.retrieve_memories(
+            memory_id, "/sre/infrastructure/alice/s1", "postgres"
+        )
+
+        assert [r["content"]["text"] for r in records] == [
+            "payments depends on postgres"
+        ]
+        assert records[0]["namespaces"] == ["/sre/infrastructure/alice/s1"]
+
+    def test_retrieval_is_scoped_and_ranked(self, backend):
+        """Test cross-session prefix search, actor isolation and BM25 ranking."""
+        backend, memory_id = backend
+        backend.create_event(memory_id, "alice", "s1", [("redis cache", "USER")])
+        backend.create_event(
+            memory_id, "alice", "s2", [("postgres connection pool", "USER")]
+        )
+        backend.create_event(memory_id, "alice2", "s1", [("postgres", "USER")])
+
+        records = backend.retrieve_memories(
+            memory_id, "/sre/infrastructure/alice", "postgres pool", top_k=5
+        )
+
+        assert [r["content"]["text"] for r in records] == [
+            "postgres connection pool",
+            "redis cache",
+        ]
+        assert records[0]["score"] > records[1]["score"]
+
+    def test_memory_client_round_trip(self, monkeypatch):
+        """Test saving and retrieving through SREMemoryClient offline."""
+        monkeypatch.setenv("MEMORY_BACKEND", "local")
+        monkeypatch.setenv("MEMORY_LOCAL_PATH", ":memory:")
+        client = SREMemoryClient()
+
+        assert isinstance(client.client, LocalMemoryClient)
+        assert client.save_event(
+            "preferences", "alice", {"preference_type": "escalation"}
+        )
+        assert client.flush_events(timeout=5)
+
+        records = client.retrieve_memories("preferences", "alice", "escalation")
+
+        assert len(records) == 1
+        assert "escalation" in records[0]["content"]["text"]
+        assert client.retrieve_memories("preferences", "bob", "escalation") == []
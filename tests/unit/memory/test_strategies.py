@@ -1,5 +1,5 @@
 from datetime import datetime
-from unittest.mock import AsyncMock, Mock
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 
@@ -7,6 +7,7 @@ from sre_agent.memory.strategies import (
     InfrastructureKnowledge,
     InvestigationSummary,
     UserPreference,
+    _retrieve_infrastructure_knowledge,
     _retrieve_user_preferences,
     _save_user_preference,
 )
@@ -179,3 +180,46 @@ class TestStrategyFunctions:
         )
 
         assert preferences == []
+
+
+class TestParsedRecordReuse:
+    """Tests for reusing parsed records across retrievals."""
+
+    def test_repeated_retrieval_skips_parsing(self):
+        """Test that a record seen before is not parsed again."""
+        records = [
+            {
+                "memoryRecordId": "rec-1",
+                "content": {
+                    "text": '{"service_name": "api", "knowledge_type": "baseline", '
+                    '"knowledge_data": {"p99_ms": 120}}'
+                },
+            }
+        ]
+        mock_client = Mock()
+        mock_client.retrieve_memories.return_value = records
+
+        with patch(
+            "sre_agent.memory.strategies.InfrastructureKnowledge",
+            wraps=InfrastructureKnowledge,
+        ) as model:
+            first = _retrieve_infrastructure_knowledge(mock_client, "alice", "api")
+            second = _retrieve_infrastructure_knowledge(mock_client, "alice", "api")
+
+        assert model.call_count == 1
+        assert second == first
+        assert second[0].knowledge_data == {"p99_ms": 120}
+
+    def test_changed_record_is_parsed_again(self):
+        """Test that a record whose content changed is not served stale."""
+        mock_client = Mock()
+        mock_client.retrieve_memories.side_effect = [
+            [{"memoryRecordId": "rec-2", "content": {"text": "db is slow"}}],
+            [{"memoryRecordId": "rec-2", "content": {"text": "db is fast"}}],
+        ]
+
+        first = _retrieve_infrastructure_knowledge(mock_client, "alice", "db")
+        second = _retrieve_infrastructure_knowledge(mock_client, "alice", "db")
+
+        assert first[0].knowledge_data["description"] == "db is slow"
+        assert second[0].knowledge_data["description"] == "db is fast"
@@ -46,7 +46,7 @@ class TestSavePreferenceTool:
                 content=preference, context="test context", actor_id="sre-agent"
             )
 
-            assert "Saved user preference: escalation for user user123" in result
+            assert "Queued user preference: escalation for user user123" in result
             mock_save.assert_called_once()
 
     def test_save_preference_failure(self, save_preference_tool, mock_client):
@@ -64,7 +64,7 @@ class TestSavePreferenceTool:
                 content=preference, context=None, actor_id="sre-agent"
             )
 
-            assert "Failed to save user preference: escalation" in result
+            assert "Failed to queue user preference: escalation" in result
 
 
 class TestSaveInfrastructureTool:
@@ -99,7 +99,7 @@ class TestSaveInfrastructureTool:
             )
 
             assert (
-                "Saved infrastructure knowledge: dependency for web-service" in result
+                "Queued infrastructure knowledge: dependency for web-service" in result
             )
             mock_save.assert_called_once()
 
@@ -120,7 +120,7 @@ class TestSaveInfrastructureTool:
                 content=knowledge, context=None, actor_id="sre-agent"
             )
 
-            assert "Failed to save infrastructure knowledge for web-service" in result
+            assert "Failed to queue infrastructure knowledge for web-service" in result
 
 
 class TestSaveInvestigationTool:
@@ -152,7 +152,7 @@ class TestSaveInvestigationTool:
                 content=summary, context="test context", actor_id="sre-agent"
             )
 
-            assert "Saved investigation summary for incident incident_123" in result
+            assert "Queued investigation summary for incident incident_123" in result
             mock_save.assert_called_once()
 
     def test_save_investigation_failure(self, save_investigation_tool, mock_client):
@@ -170,7 +170,7 @@ class TestSaveInvestigationTool:
                 content=summary, context=None, actor_id="sre-agent"
             )
 
-            assert "Failed to save investigation summary for incident_123" in result
+            assert "Failed to queue investigation summary for incident_123" in result
 
 
 class TestRetrieveMemoryTool:
@@ -0,0 +1,139 @@
+import asyncio
+import threading
+import time
+from unittest.mock import Mock
+
+from sre_agent.memory.write_queue import MemoryWriteQueue
+
+
+class TestMemoryWriteQueue:
+    """Tests for background memory event writing."""
+
+    def test_events_are_coalesced_per_actor_and_session(self):
+        """Test that events queued together become one write per actor/session."""
+        write_event = Mock()
+        write_queue = MemoryWriteQueue(write_event, linger_seconds=10)
+
+        write_queue.put("alice", "s1", [("query", "USER")])
+        write_queue.put("bob", "s1", [("other", "USER")])
+        write_queue.put("alice", "s1", [("answer", "ASSISTANT")])
+
+        assert write_queue.flush(timeout=5)
+        write_event.assert_any_call(
+            "alice", "s1", [("query", "USER"), ("answer", "ASSISTANT")]
+        )
+        write_event.assert_any_call("bob", "s1", [("other", "USER")])
+        assert write_event.call_count == 2
+
+    def test_large_batches_are_split(self):
+        """Test that a write never holds more than max_batch_messages messages."""
+        write_event = Mock()
+        write_queue = MemoryWriteQueue(
+            write_event, max_batch_messages=2, linger_seconds=10
+        )
+
+        write_queue.put("alice", "s1", [("a", "USER"), ("b", "USER"), ("c", "USER")])
+
+        assert write_queue.flush(timeout=5)
+        assert [len(call.args[2]) for call in write_event.call_args_list] == [2, 1]
+
+    def test_failed_writes_are_retried(self):
+        """Test that a failing write is retried and then dropped."""
+        write_event = Mock(side_effect=[Exception("throttled"), None])
+        write_queue = MemoryWriteQueue(
+            write_event, linger_seconds=0, retry_backoff_seconds=0
+        )
+
+        write_queue.put("alice", "s1", [("query", "USER")])
+
+        assert write_queue.flush(timeout=5)
+        assert write_event.call_count == 2
+
+        write_event.side_effect = Exception("down")
+        write_queue.put("alice", "s1", [("query", "USER")])
+
+        assert write_queue.flush(timeout=5)
+        assert write_event.call_count == 2 + 1 + write_queue.max_retries
+
+    def test_write_results_are_reported_per_event(self):
+        """Test that on_written tells each queued event whether it was written."""
+        write_event = Mock(side_effect=[None, Exception("down")])
+        write_queue = MemoryWriteQueue(
+            write_event,
+            max_batch_messages=2,
+            linger_seconds=10,
+            max_retries=0,
+        )
+        results = {}
+
+        for name, messages in (
+            ("first", [("a", "USER")]),
+            ("split", [("b", "USER"), ("c", "USER")]),
+            ("last", [("d", "USER")]),
+        ):
+            write_queue.put(
+                "alice",
+                "s1",
+                messages,
+                on_written=lambda success, name=name: results.update({name: success}),
+            )
+
+        assert write_queue.flush(timeout=5)
+        # The first write holds a, b; the failed one holds c, d
+        assert results == {"first": True, "split": False, "last": False}
+
+    def test_full_queue_drops_events(self):
+        """Test that put gives up once the buffer stays full."""
+        writing, release = threading.Event(), threading.Event()
+
+        def blocked_write(*args):
+            writing.set()
+            release.wait(5)
+
+        write_event = Mock(side_effect=blocked_write)
+        write_queue = MemoryWriteQueue(
+            write_event, max_pending=1, linger_seconds=0, enqueue_timeout=0.05
+        )
+
+        # The first event is taken by the blocked writer, the second fills the queue
+        assert write_queue.put("alice", "s1", [("1", "USER")])
+        assert writing.wait(5)
+        assert write_queue.put("alice", "s1", [("2", "USER")])
+
+        assert not write_queue.put("alice", "s1", [("3", "USER")])
+        assert write_queue.dropped == 1
+
+        release.set()
+        assert write_queue.flush(timeout=5)
+        assert write_queue.pending == 0
+
+    def test_full_queue_does_not_block_the_event_loop(self):
+        """Test that put drops at once when called from a coroutine."""
+        writing, release = threading.Event(), threading.Event()
+
+        def blocked_write(*args):
+            writing.set()
+            release.wait(5)
+
+        write_queue = MemoryWriteQueue(
+            Mock(side_effect=blocked_write),
+            max_pending=1,
+            linger_seconds=0,
+            enqueue_timeout=5,
+        )
+        assert write_queue.put("alice", "s1", [("1", "USER")])
+        assert writing.wait(5)
+        assert write_queue.put("alice", "s1", [("2", "USER")])
+
+        async def put_from_loop():
+            start = time.monotonic()
+            queued = write_queue.put("alice", "s1", [("3", "USER")])
+            return queued, time.monotonic() - start
+
+        queued, elapsed = asyncio.run(put_from_loop())
+
+        release.set()
+        assert not queued
+        assert elapsed < 1
+        assert write_queue.dropped == 1
+        assert write_queue.flush(timeout=5)
@@ -0,0 +1 @@
+"""Tests for backend server data stores."""
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# Server modules import their siblings by bare name, as they do when the
+# servers are started from backend/servers
+sys.path.insert(0, str(Path(__file__).parents[3] / "backend" / "servers"))
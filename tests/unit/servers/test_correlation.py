@@ -0,0 +1,130 @@
+from backend.servers.correlation import (
+    correlate,
+    error_bursts,
+    k8s_signals,
+    metric_spikes,
+    service_matches,
+)
+from backend.servers.log_store import LogStore, scan_wal
+
+BASE_EPOCH = 1705328400  # 2024-01-15T14:20:00Z
+
+
+class TestSignals:
+    """Tests for per-source signal extraction."""
+
+    def test_metric_spikes_use_running_median_baseline(self):
+        """Test that only samples well above their history are spikes."""
+        samples = [(BASE_EPOCH + i * 60, v) for i, v in enumerate([100, 110, 90, 450])]
+
+        spikes = metric_spikes([("response_time", "web-service", samples)])
+
+        assert len(spikes) == 1
+        assert spikes[0]["epoch"] == BASE_EPOCH + 180
+        assert spikes[0]["baseline"] == 100
+
+    def test_error_bursts_are_bucketed_per_service(self):
+        """Test that error records in one minute form a single burst."""
+        records = [
+            (BASE_EPOCH + 5, {"level": "ERROR", "service": "api", "message": "a"}),
+            (BASE_EPOCH + 30, {"level": "CRITICAL", "service": "api", "message": "b"}),
+            (BASE_EPOCH + 40, {"level": "INFO", "service": "api", "message": "c"}),
+        ]
+
+        bursts = error_bursts(records)
+
+        assert len(bursts) == 1
+        assert bursts[0]["count"] == 2
+
+    def test_restart_events_are_flagged(self):
+        """Test that back-off events are reported as pod restarts."""
+        events = [
+            (BASE_EPOCH, {"type": "Error", "reason": "CrashLoopBackOff"}),
+            (BASE_EPOCH, {"type": "Normal", "reason": "Scheduled"}),
+        ]
+
+        assert [s["kind"] for s in k8s_signals(events)] == ["pod_restart"]
+
+    def test_service_matches_across_naming_schemes(self):
+        """Test matching metric service names to k8s object names."""
+        assert service_matches("web-service", "web-app-deployment-5c8d7f9b6d-k2n8p")
+        assert service_matches("database", "database-pod-7b9c4d8f2a-x5m1q")
+        assert not service_matches("web-service", "api-service")
+
+
+class TestCorrelate:
+    """Tests for the cross-signal window join."""
+
+    def test_multi_source_cluster_ranks_first(self):
+        """Test that co-occurring signals outrank a stronger lone signal."""
+        signals = (
+            metric_spikes(
+                [
+                    (
+                        "latency",
+                        "web-service",
+                        [(BASE_EPOCH, 100), (BASE_EPOCH + 60, 300)],
+                    )
+                ]
+            )
+            + error_bursts(
+                [(BASE_EPOCH + 70, {"level": "ERROR", "service": "web-service"})]
+            )
+            + k8s_signals(
+                [
+                    (
+                        BASE_EPOCH + 30,
+                        {
+                            "type": "Warning",
+                            "reason": "Unhealthy",
+                            "object": "pod/web-1",
+                        },
+                    ),
+                    (
+                        BASE_EPOCH + 3600,
+                        {"type": "Error", "reason": "OOMKilled", "count": 50},
+                    ),
+                ]
+            )
+        )
+
+        result = correlate(signals, window_seconds=120)
+
+        assert result["clusters_total"] == 2
+        top = result["clusters"][0]
+        assert top["sources"] == ["k8s", "logs", "metrics"]
+        assert top["leading_event"].startswith("Unhealthy")
+
+    def test_service_and_time_filters(self):
+        """Test that signals outside the service or window are dropped."""
+        signals = error_bursts(
+            [
+                (BASE_EPOCH, {"level": "ERROR", "service": "web-service"}),
+                (BASE_EPOCH, {"level": "ERROR", "service": "payments"}),
+                (BASE_EPOCH + 7200, {"level": "ERROR", "service": "web-service"}),
+            ]
+        )
+
+        result = correlate(signals, end=BASE_EPOCH + 60, service="web-service")
+
+        assert result["signals"]["logs"] == 1
+
+
+class TestScanWal:
+    """Tests for read-only WAL scans."""
+
+    def test_scan_skips_partitions_outside_window(self, tmp_path):
+        """Test that records are read without opening the store."""
+        store = LogStore(tmp_path / "wal", search_workers=0)
+        store.append_batch(
+            [
+                {"timestamp": "2024-01-15T14:20:00Z", "message": "in window"},
+                {"timestamp": "2024-01-15T16:20:00Z", "message": "later"},
+            ]
+        )
+        store.flush()
+
+        records = list(scan_wal(tmp_path / "wal", BASE_EPOCH - 60, BASE_EPOCH + 60))
+        store.close()
+
+        assert [r["message"] for _, r in records] == ["in window"]
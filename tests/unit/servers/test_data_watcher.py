@@ -0,0 +1,110 @@
+import json
+import threading
+
+from backend.servers.data_watcher import DataWatcher, JsonFileCache
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data))
+
+
+class TestDataWatcher:
+    """Tests for per-file change notifications."""
+
+    def test_polling_reports_only_changed_files(self, tmp_path):
+        """Test that a change to one file notifies its subscribers only."""
+        _write(tmp_path / "pods.json", {"pods": []})
+        _write(tmp_path / "nodes.json", {"nodes": []})
+        (tmp_path / "wal").mkdir()
+
+        watcher = DataWatcher([tmp_path], poll_interval=0.02)
+        watcher.backend = "polling"
+        changed = []
+        notified = threading.Event()
+
+        def on_change(path):
+            changed.append(path.name)
+            notified.set()
+
+        watcher.subscribe(on_change, ["pods.json", "events.json"])
+        watcher.start()
+        try:
+            (tmp_path / "wal" / "segment-1.ndjson").write_text("{}\n")
+            _write(tmp_path / "nodes.json", {"nodes": [{"name": "node-1"}]})
+            _write(tmp_path / "pods.json", {"pods": [{"name": "web"}]})
+            assert notified.wait(2)
+        finally:
+            watcher.stop()
+
+        assert changed == ["pods.json"]
+        assert not watcher.running
+
+    def test_failing_subscriber_does_not_stop_others(self, tmp_path):
+        """Test that one refresh error does not skip the remaining callbacks."""
+        watcher = DataWatcher([tmp_path])
+        seen = []
+
+        def broken(path):
+            raise RuntimeError("boom")
+
+        watcher.subscribe(broken)
+        watcher.subscribe(lambda path: seen.append(path.name))
+        watcher.dispatch(tmp_path / "pods.json")
+
+        assert seen == ["pods.json"]
+
+
+class TestJsonFileCache:
+    """Tests for the watcher-refreshed JSON cache."""
+
+    def test_without_watcher_validates_signature(self, tmp_path):
+        """Test that files are reparsed only after they change on disk."""
+        path = tmp_path / "events.json"
+        _write(path, {"events": [1]})
+        loads = []
+        cache = JsonFileCache(on_load=loads.append)
+
+        assert cache.get(path) == {"events": [1]}
+        assert cache.get(path) == {"events": [1]}
+        _write(path, {"events": [1, 2, 3]})
+
+        assert cache.get(path) == {"events": [1, 2, 3]}
+        assert len(loads) == 2
+
+    def test_refresh_swaps_in_new_document(self, tmp_path):
+        """Test that a watcher refresh replaces the cached document whole."""
+        path = tmp_path / "events.json"
+        _write(path, {"events": [1]})
+        watcher = DataWatcher([tmp_path])
+        cache = JsonFileCache(watcher)
+        first = cache.get(path)
+
+        _write(path, {"events": [2]})
+        watcher.dispatch(path)
+
+        assert first == {"events": [1]}
+        assert cache.get(path) == {"events": [2]}
+
+    def test_partial_write_keeps_last_good_version(self, tmp_path):
+        """Test that a file caught mid-write does not replace the cache entry."""
+        path = tmp_path / "events.json"
+        _write(path, {"events": [1]})
+        cache = JsonFileCache(DataWatcher([tmp_path]))
+        cache.get(path)
+
+        path.write_text('{"events": [1, 2')
+        cache.refresh(path)
+
+        assert cache._entries[path][1] == {"events": [1]}
+
+    def test_removed_file_is_dropped(self, tmp_path):
+        """Test that deleting a file evicts it from the cache."""
+        path = tmp_path / "events.json"
+        _write(path, {"events": [1]})
+        cache = JsonFileCache(DataWatcher([tmp_path]))
+        cache.get(path)
+
+        path.unlink()
+        cache.refresh(path)
+
+        assert path not in cache._entries
@@ -0,0 +1,79 @@
+import pytest
+
+from backend.servers.k8s_topology import TopologyGraph
+
+
+def _pod(name, node, namespace="production"):
+    return {"name": name, "namespace": namespace, "node": node, "status": "Running"}
+
+
+@pytest.fixture
+def topology():
+    """Build a small cluster: two web replicas across nodes, one database pod."""
+    return TopologyGraph.build(
+        nodes=[{"name": "node-1"}, {"name": "node-2"}],
+        pods=[
+            _pod("web-app-deployment-5c8d7f9b6d-k2n8p", "node-1"),
+            _pod("web-app-deployment-5c8d7f9b6d-q9w3e", "node-2"),
+            _pod("database-pod-7b9c4d8f2a-x5m1q", "node-2"),
+        ],
+        deployments=[
+            {"name": "web-app-deployment", "namespace": "production", "replicas": 2},
+            {"name": "database-deployment", "namespace": "production", "replicas": 1},
+        ],
+        services=[
+            {
+                "name": "web-app-service",
+                "namespace": "production",
+                "selector": {"app": "web-app"},
+            },
+            {
+                "name": "database-service",
+                "namespace": "production",
+                "selector": {"app": "database"},
+            },
+        ],
+    )
+
+
+def _by_name(entities):
+    return {entity["name"]: entity for entity in entities}
+
+
+class TestTopologyGraph:
+    """Tests for the k8s topology graph and blast radius traversal."""
+
+    def test_links_pods_to_deployments_and_services(self, topology):
+        """Test ownership recovered from pod names and service selectors."""
+        stats = topology.stats()
+
+        assert stats["pod"] == 3
+        # 3 node->pod, 3 pod->deployment, 3 pod->service, 2 deployment->service
+        assert stats["edges"] == 11
+
+    def test_node_failure_is_partial_for_replicated_workloads(self, topology):
+        """Test that losing one node only partially degrades the web app."""
+        result = topology.blast_radius(topology.find("node", "node-2"))
+
+        deployments = _by_name(result["impacted"]["deployments"])
+        services = _by_name(result["impacted"]["services"])
+        assert result["summary"] == {"pods": 2, "deployments": 2, "services": 2}
+        assert deployments["web-app-deployment"]["pods_lost"] == 1
+        assert not deployments["web-app-deployment"]["fully_impacted"]
+        assert services["database-service"]["fully_impacted"]
+
+    def test_deployment_failure_takes_down_its_pods(self, topology):
+        """Test that a failed deployment impacts every pod it owns."""
+        result = topology.blast_radius(
+            topology.find("deployment", "web-app-deployment")
+        )
+
+        assert len(result["impacted"]["pods"]) == 2
+        service = result["impacted"]["services"][0]
+        assert service["name"] == "web-app-service"
+        assert service["fully_impacted"]
+
+    def test_find_unknown_entity(self, topology):
+        """Test that unknown entities are not resolved."""
+        assert topology.find("pod", "missing") is None
+        assert topology.find("deployment", "web-app-deployment", "staging") is None
@@ -0,0 +1,351 @@
+import json
+import threading
+
+import pytest
+
+# By bare name, as log_store itself imports it
+from store import InvalidTimeRangeError
+
+from backend.servers.log_store import LogStore
+
+
+def _ndjson(records):
+    return ("\n".join(json.dumps(r) for r in records) + "\n").encode()
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Create a LogStore over a temporary WAL directory."""
+    log_store = LogStore(tmp_path / "wal", search_workers=0)
+    yield log_store
+    log_store.close()
+
+
+class TestLogStoreIngest:
+    """Tests for NDJSON ingest into the WAL."""
+
+    def test_ingest_reports_rejected_lines(self, store):
+        """Test that bad lines are rejected without failing the batch."""
+        payload = (
+            _ndjson([{"timestamp": "2024-01-15T14:20:00Z", "message": "ok"}])
+            + b"not json\n"
+            + b'{"level": "ERROR"}\n'
+        )
+
+        result = store.ingest_ndjson(payload)
+
+        assert result["accepted"] == 1
+        assert result["rejected"] == 2
+        assert [e["line"] for e in result["errors"]] == [2, 3]
+
+    def test_level_aliases_are_normalized(self, store):
+        """Test that WARNING is stored as WARN."""
+        store.append_batch([{"level": "warning", "message": "disk filling up"}])
+
+        assert store.search(levels=["WARN"])[0]["level"] == "WARN"
+
+    def test_wal_is_replayed_on_restart(self, tmp_path):
+        """Test that records and indexes survive a restart."""
+        first = LogStore(tmp_path / "wal", max_segment_bytes=512, search_workers=0)
+        first.append_batch(
+            [
+                {
+                    "timestamp": f"2024-01-15T14:{i:02d}:00Z",
+                    "service": "web-service",
+                    "message": f"Database connection timeout after {i}ms",
+                }
+                for i in range(20)
+            ],
+            durable=True,
+        )
+        first.close()
+
+        second = LogStore(tmp_path / "wal", search_workers=0)
+        try:
+            assert second.stats()["segments"] > 1
+            assert len(second.search(pattern="timeout", limit=None)) == 20
+            assert second.counts()["service"]["web-service"] == 20
+        finally:
+            second.close()
+
+    def test_torn_tail_is_truncated(self, tmp_path):
+        """Test that a partial trailing record is dropped during replay."""
+        wal_dir = tmp_path / "wal"
+        first = LogStore(wal_dir, search_workers=0)
+        first.append_batch([{"message": "complete"}], durable=True)
+        first.close()
+        segment = next(wal_dir.glob("segment-*.ndjson"))
+        with open(segment, "ab") as f:
+            f.write(b'{"message": "torn')
+
+        second = LogStore(wal_dir, search_workers=0)
+        try:
+            assert [r["message"] for r in second.recent()] == ["complete"]
+        finally:
+            second.close()
+
+
+class TestLogStoreSearch:
+    """Tests for index-backed search."""
+
+    @pytest.fixture
+    def populated(self, store):
+        store.append_batch(
+            [
+                {
+                    "timestamp": "2024-01-15T14:22:00Z",
+                    "level": "ERROR",
+                    "service": "web-service",
+                    "message": "Database connection timeout after 5000ms",
+                },
+                {
+                    "timestamp": "2024-01-15T14:20:00Z",
+                    "level": "INFO",
+                    "service": "api-service",
+                    "message": "Request completed",
+                },
+                {
+                    "timestamp": "2024-01-15T14:24:00Z",
+                    "level": "WARN",
+                    "service": "web-service",
+                    "message": "Reconnection attempt 3",
+                },
+            ]
+        )
+        return store
+
+    def test_pattern_matches_partial_words(self, populated):
+        """Test substring semantics across token boundaries."""
+        assert len(populated.search(pattern="nection time")) == 1
+        assert len(populated.search(pattern="connection")) == 2
+
+    def test_results_are_time_ordered(self, populated):
+        """Test that out-of-order ingest is returned in time order."""
+        timestamps = [r["timestamp"] for r in populated.search(limit=None)]
+
+        assert timestamps == sorted(timestamps)
+
+    def test_time_and_level_filters(self, populated):
+        """Test combined time range and level filtering."""
+        results = populated.search(
+            levels=["ERROR", "WARN"],
+            start_time="2024-01-15T14:21:00Z",
+            end_time="2024-01-15T14:23:00Z",
+        )
+
+        assert [r["level"] for r in results] == ["ERROR"]
+
+    def test_unparseable_time_bound_is_rejected(self, populated):
+        """Test that a bad time bound raises instead of searching everything."""
+        with pytest.raises(InvalidTimeRangeError):
+            populated.search(start_time="yesterday")
+        with pytest.raises(InvalidTimeRangeError):
+            populated.search(end_time="2024-13-45")
+
+    def test_recent_is_most_recent_first(self, populated):
+        """Test recent() ordering and service filtering."""
+        recent = populated.recent(limit=2, service="web-service")
+
+        assert [r["timestamp"] for r in recent] == [
+            "2024-01-15T14:24:00Z",
+            "2024-01-15T14:22:00Z",
+        ]
+
+
+def _hourly_batch(hour, count=10):
+    return [
+        {
+            "timestamp": f"2024-01-15T{hour:02d}:{minute:02d}:00Z",
+            "level": "ERROR" if minute % 2 else "INFO",
+            "service": "web-service",
+            "message": f"Database connection timeout after {minute}ms",
+        }
+        for minute in range(count)
+    ]
+
+
+class TestLogStorePartitions:
+    """Tests for time partitioning, maintenance and parallel search."""
+
+    def test_records_are_partitioned_by_hour(self, store):
+        """Test that each hour gets its own segment."""
+        store.append_batch(_hourly_batch(10) + _hourly_batch(11))
+
+        assert store.stats()["partitions"] == 2
+
+    def test_idle_partitions_are_sealed_and_compacted(self, tmp_path):
+        """Test that maintenance merges a partition's sealed segments."""
+        store = LogStore(
+            tmp_path / "wal",
+            max_segment_bytes=256,
+            seal_idle_seconds=0,
+            search_workers=0,
+        )
+        try:
+            store.append_batch(_hourly_batch(10))
+            assert store.stats()["segments"] > 1
+
+            summary = store.run_maintenance()
+
+            assert summary["compacted"] > 1
+            assert store.stats()["segments"] == 1
+            assert len(list((tmp_path / "wal").glob("segment-*.ndjson"))) == 1
+            assert len(store.search(pattern="timeout", limit=None)) == 10
+        finally:
+            store.close()
+
+    def test_sources_left_by_interrupted_compaction_are_not_replayed(self, tmp_path):
+        """Test that a crash before sources are deleted does not duplicate records."""
+        wal_dir = tmp_path / "wal"
+        store = LogStore(
+            wal_dir, max_segment_bytes=256, seal_idle_seconds=0, search_workers=0
+        )
+        store.append_batch(_hourly_batch(10))
+        store.flush()
+        sources = {path.name: path.read_bytes() for path in wal_dir.iterdir()}
+        store.run_maintenance()
+        store.close()
+        # Put the sources back as if the process died right after publishing
+        for name, data in sources.items():
+            (wal_dir / name).write_bytes(data)
+
+        restarted = LogStore(wal_dir, search_workers=0)
+        try:
+            assert len(restarted.search(pattern="timeout", limit=None)) == 10
+            assert len(list(wal_dir.glob("segment-*.ndjson"))) == 1
+        finally:
+            restarted.close()
+
+    def test_close_waits_for_compaction(self, tmp_path):
+        """Test that close does not run while a compaction is merging segments."""
+        store = LogStore(
+            tmp_path / "wal",
+            max_segment_bytes=256,
+            seal_idle_seconds=0,
+            search_workers=0,
+        )
+        store.append_batch(_hourly_batch(10))
+        merging = threading.Event()
+        release = threading.Event()
+        compact = store._compact
+
+        def slow_compact(sources, target):
+            merging.set()
+            release.wait(5)
+            return compact(sources, target)
+
+        store._compact = slow_compact
+        maintenance = threading.Thread(target=store.run_maintenance)
+        maintenance.start()
+        assert merging.wait(5)
+        closer = threading.Thread(target=store.close)
+        closer.start()
+        closer.join(0.2)
+        assert closer.is_alive()
+
+        release.set()
+        maintenance.join(5)
+        closer.join(5)
+
+        assert not closer.is_alive()
+        assert store.stats()["segments"] == 1
+        assert store.run_maintenance() == {"sealed": 0, "dropped": 0, "compacted": 0}
+
+    def test_retention_drops_old_partitions(self, tmp_path):
+        """Test that partitions older than the retention period are removed."""
+        store = LogStore(tmp_path / "wal", retention_seconds=3600, search_workers=0)
+        try:
+            store.append_batch(_hourly_batch(10) + _hourly_batch(12))
+
+            # Pretend it is 13:30, so only the 12:00 partition is retained
+            summary = store.run_maintenance(now=1705325400)
+
+            assert summary["dropped"] == 1
+            assert {r["timestamp"][11:13] for r in store.search(limit=None)} == {"12"}
+        finally:
+            store.close()
+
+    def test_parallel_search_matches_serial_search(self, tmp_path):
+        """Test that process pool fan-out returns the same time-ordered results."""
+        store = LogStore(tmp_path / "wal", seal_idle_seconds=0, search_workers=2)
+        try:
+            for hour in range(8):
+                store.append_batch(_hourly_batch(hour))
+            store.run_maintenance()
+            assert store.stats()["sealed_segments"] == 8
+
+            parallel = store.search(pattern="timeout", levels=["ERROR"], limit=None)
+            store.search_workers = 0
+            serial = store.search(pattern="timeout", levels=["ERROR"], limit=None)
+
+            assert parallel == serial
+            assert len(parallel) == 40
+        finally:
+            store.close()
+
+
+class TestLogStorePlanner:
+    """Tests for the cost-based filter planner."""
+
+    @pytest.fixture
+    def mixed(self, store):
+        store.append_batch(
+            [
+                {
+                    "timestamp": f"2024-01-15T14:{i % 60:02d}:00Z",
+                    "level": "ERROR" if i % 50 == 0 else "INFO",
+                    "service": f"svc-{i % 10}",
+                    "message": ("payment failed" if i % 3 else "request ok")
+                    + f" id={i}",
+                }
+                for i in range(1000)
+            ]
+        )
+        return store
+
+    def test_most_selective_predicate_drives_the_plan(self, mixed):
+        """Test that the level index drives a rare-level query."""
+        records, plan = mixed.search_with_plan(
+            pattern="payment", levels=["ERROR"], limit=None
+        )
+
+        steps = plan["segment_plans"][0]["steps"]
+        assert steps[0] == {"predicate": "level", "method": "index", "estimate": 20}
+        assert plan["records_examined"] == 20
+        assert all(r["level"] == "ERROR" for r in records)
+
+    def test_plan_results_match_brute_force(self, mixed):
+        """Test planned execution against a naive filter over all records."""
+        everything = mixed.search(limit=None)
+        queries = [
+            {"pattern": "failed", "service": "svc-3"},
+            {"pattern": "ok id=1", "levels": ["INFO"]},
+            {
+                "pattern": "payment",
+                "start_time": "2024-01-15T14:10:00Z",
+                "end_time": "2024-01-15T14:12:00Z",
+            },
+        ]
+
+        for query in queries:
+            expected = [
+                r
+                for r in everything
+                if query["pattern"] in r["message"]
+                and r["service"] == query.get("service", r["service"])
+                and r["level"] in query.get("levels", [r["level"]])
+                and query.get("start_time", "") <= r["timestamp"]
+                and r["timestamp"] <= query.get("end_time", "~")
+            ]
+            assert mixed.search(limit=None, **query) == expected
+
+    def test_time_pruned_segments_are_reported(self, store):
+        """Test that segments outside the time range are skipped."""
+        store.append_batch(_hourly_batch(10) + _hourly_batch(11))
+
+        _, plan = store.search_with_plan(
+            pattern="timeout", start_time="2024-01-15T11:00:00Z"
+        )
+
+        assert plan["segments_pruned"] == 1
+        assert plan["records_examined"] == 10
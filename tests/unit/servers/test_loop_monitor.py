@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.servers.loop_monitor import (
+    LoopLagMonitor,
+    install_loop_monitor,
+    run_blocking,
+)
+
+
+class TestLoopLagMonitor:
+    """Tests for event loop lag sampling and blocking attribution."""
+
+    def test_percentiles(self):
+        """Test that lag percentiles are reported in milliseconds."""
+        monitor = LoopLagMonitor()
+        for lag_ms in range(1, 101):
+            monitor.record(lag_ms / 1000, since=0.0)
+
+        percentiles = monitor.percentiles()
+
+        assert percentiles == {"p50": 51.0, "p90": 91.0, "p99": 100.0}
+        assert monitor.snapshot()["lag_ms"]["max"] == 100.0
+
+    def test_blocking_is_attributed_to_routes_in_flight(self):
+        """Test that a late wake up counts against the routes being served."""
+        monitor = LoopLagMonitor(threshold=0.1)
+        route = type("Route", (), {"path": "/pods/status"})()
+        monitor.request_started({"route": route})
+
+        monitor.record(0.05, since=0.0)
+        assert not monitor.blocking_routes
+
+        monitor.record(0.25, since=0.0)
+        assert monitor.blocking_routes == {"/pods/status": 1}
+
+    @pytest.mark.asyncio
+    async def test_sampler_detects_a_blocking_call(self):
+        """Test that the background sampler measures a blocked loop."""
+        monitor = LoopLagMonitor(interval=0.01, threshold=0.1)
+        monitor.start()
+        await asyncio.sleep(0.03)
+        time.sleep(0.2)
+        await asyncio.sleep(0.03)
+        await monitor.stop()
+
+        assert monitor.max_lag >= 0.15
+        assert monitor.blocking_routes == {}
+
+
+class TestRunBlocking:
+    """Tests for the cold path thread pool."""
+
+    @pytest.mark.asyncio
+    async def test_runs_off_the_event_loop_thread(self):
+        """Test that blocking work runs on a pool thread."""
+        thread = await run_blocking(lambda: threading.current_thread().name)
+
+        assert thread.startswith("cold-path")
+
+
+class TestInstall:
+    """Tests for instrumenting an app."""
+
+    def test_lag_endpoint_and_route_labels(self):
+        """Test that slow handlers are reported by their route template."""
+        app = FastAPI()
+        monitor = install_loop_monitor(app)
+        monitor.interval = 0.01
+
+        @app.get("/items/{item_id}")
+        async def get_item(item_id: str):
+            time.sleep(0.2)
+            return {"id": item_id}
+
+        with TestClient(app) as client:
+            client.get("/items/1")
+            time.sleep(0.05)
+            lag = client.get("/internal/loop_lag").json()
+
+        assert lag["samples"] > 0
+        assert lag["blocking_routes"]["/items/{item_id}"] >= 1
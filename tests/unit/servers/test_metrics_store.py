@@ -0,0 +1,187 @@
+import random
+
+import pytest
+
+from backend.servers.metrics_store import MetricsStore, QuantileSketch
+
+BASE_EPOCH = 1705328400  # 2024-01-15T14:20:00Z
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Create a MetricsStore over a temporary journal directory."""
+    metrics_store = MetricsStore(tmp_path / "ingest")
+    yield metrics_store
+    metrics_store.close()
+
+
+class TestQuantileSketch:
+    """Tests for QuantileSketch."""
+
+    def test_quantiles_within_relative_accuracy(self):
+        """Test sketch estimates against exact quantiles."""
+        rng = random.Random(42)
+        values = sorted(rng.lognormvariate(5, 1) for _ in range(5000))
+        sketch = QuantileSketch()
+        for value in values:
+            sketch.add(value)
+
+        for q in (0.5, 0.95, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            assert abs(sketch.quantile(q) - exact) / exact <= 0.02
+
+    def test_merge_matches_single_sketch(self):
+        """Test that merged sketches equal one sketch over all values."""
+        left, right, combined = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        for value in range(1, 101):
+            (left if value % 2 else right).add(value)
+            combined.add(value)
+
+        left.merge(right)
+
+        assert left.quantile(0.9) == combined.quantile(0.9)
+
+
+class TestMetricsStore:
+    """Tests for incremental metric ingest."""
+
+    def test_rejects_invalid_series(self, store):
+        """Test per-series validation errors."""
+        result = store.ingest(
+            [
+                {"metric": "cpu_usage", "samples": [[BASE_EPOCH, 50]]},
+                {"metric": "cpu_usage", "samples": [["not a time", 1]]},
+                {"samples": [[BASE_EPOCH, 1]]},
+            ]
+        )
+
+        assert result["accepted_samples"] == 1
+        assert result["rejected_series"] == 2
+
+    def test_out_of_order_samples_are_sorted(self, store):
+        """Test that late samples are inserted in time order."""
+        store.ingest(
+            [
+                {
+                    "metric": "response_time",
+                    "service": "web-service",
+                    "samples": [[BASE_EPOCH + 60, 2], [BASE_EPOCH, 1]],
+                }
+            ]
+        )
+        store.ingest(
+            [
+                {
+                    "metric": "response_time",
+                    "service": "web-service",
+                    "samples": [[BASE_EPOCH + 30, 3]],
+                }
+            ]
+        )
+
+        points = store.points("response_time", service="web-service")
+
+        assert [p["value"] for p in points] == [1, 3, 2]
+
+    def test_points_are_downsampled_per_series(self, store):
+        """Test that max_points keeps each series' peak."""
+        samples = [[BASE_EPOCH + i, 1.0] for i in range(500)]
+        samples[250][1] = 99.0
+        store.ingest([{"metric": "latency", "service": "api", "samples": samples}])
+
+        points = store.points("latency", max_points=10)
+
+        assert len(points) == 10
+        assert max(p["value"] for p in points) == 99.0
+
+    def test_rollups_stay_fresh_under_sustained_ingest(self, store):
+        """Test that every batch is reflected in rollups without a rebuild."""
+        for batch in range(50):
+            samples = [
+                [BASE_EPOCH + batch * 60 + i, float(batch * 1000 + i)]
+                for i in range(60)
+            ]
+            store.ingest(
+                [{"metric": "throughput", "service": "api", "samples": samples}]
+            )
+
+            minute = store.rollups("throughput", "1m", service="api")[-1]
+            assert minute["count"] == 60
+            assert minute["max"] == batch * 1000 + 59
+
+        hourly = store.rollups("throughput", "1h", service="api")
+        assert sum(bucket["count"] for bucket in hourly) == 3000
+
+    def test_journal_is_replayed_on_restart(self, tmp_path):
+        """Test that ingested samples survive a restart."""
+        first = MetricsStore(tmp_path / "ingest")
+        first.ingest(
+            [{"metric": "memory_usage", "samples": [[BASE_EPOCH, 512]]}],
+            durable=True,
+        )
+        first.close()
+
+        second = MetricsStore(tmp_path / "ingest")
+        try:
+            assert second.points("memory_usage")[0]["value"] == 512
+            assert second.rollups("memory_usage", "5m")[0]["count"] == 1
+        finally:
+            second.close()
+
+    def test_journal_stays_bounded_under_sustained_ingest(self, tmp_path):
+        """Test that compaction keeps the journal proportional to live data."""
+        journal = tmp_path / "ingest" / "samples.ndjson"
+        store = MetricsStore(tmp_path / "ingest", compact_bytes=4096)
+        try:
+            sizes = []
+            for i in range(2000):
+                store.ingest(
+                    [
+                        {
+                            "metric": "throughput",
+                            "service": f"service-{i % 4}",
+                            "samples": [[BASE_EPOCH + i, float(i)]],
+                        }
+                    ]
+                )
+                sizes.append(journal.stat().st_size)
+            snapshot = store.compact()["journal_bytes"]
+
+            # At most a snapshot plus the larger of a snapshot or compact_bytes
+            assert max(sizes) <= 2 * snapshot + 4096
+            assert max(sizes) < len(sizes) * 50
+        finally:
+            store.close()
+
+        restarted = MetricsStore(tmp_path / "ingest", compact_bytes=4096)
+        try:
+            points = restarted.points("throughput")
+            assert [p["value"] for p in points] == [float(i) for i in range(2000)]
+            hourly = restarted.rollups("throughput", "1h", service="service-0")
+            assert sum(bucket["count"] for bucket in hourly) == 500
+        finally:
+            restarted.close()
+
+    def test_compaction_drops_samples_past_retention(self, tmp_path):
+        """Test that retention drops whole hours of samples and their rollups."""
+        store = MetricsStore(tmp_path / "ingest", retention_seconds=3600)
+        try:
+            samples = [[BASE_EPOCH + minute * 60, 1.0] for minute in range(180)]
+            store.ingest([{"metric": "cpu_usage", "samples": samples}])
+
+            # 90 minutes after the last sample; the cutoff rounds down an hour
+            summary = store.compact(now=BASE_EPOCH + 270 * 60)
+
+            hourly = store.rollups("cpu_usage", "1h")
+            assert summary["dropped_samples"] == len(samples) - summary["samples"]
+            assert sum(bucket["count"] for bucket in hourly) == summary["samples"]
+            assert store.points("cpu_usage")[0]["timestamp"] == hourly[0]["timestamp"]
+            assert summary["samples"] < len(samples)
+        finally:
+            store.close()
+
+        restarted = MetricsStore(tmp_path / "ingest")
+        try:
+            assert len(restarted.points("cpu_usage")) == summary["samples"]
+        finally:
+            restarted.close()
@@ -0,0 +1,147 @@
+import json
+import math
+
+import pytest
+
+from backend.servers.response_shaping import (
+    InvalidCursorError,
+    collapse,
+    downsample,
+    fit_to_budget,
+    lttb,
+)
+
+
+def _record(minute, value, service="web-service"):
+    return {
+        "timestamp": f"2024-01-15T14:{minute:02d}:00Z",
+        "service": service,
+        "response_time_ms": value,
+    }
+
+
+class TestLttb:
+    """Tests for Largest-Triangle-Three-Buckets downsampling."""
+
+    def test_keeps_endpoints_and_peaks(self):
+        """Test that a single spike survives heavy downsampling."""
+        xs = list(range(1000))
+        ys = [math.sin(x / 50) for x in xs]
+        ys[517] = 25.0
+
+        indices = lttb(xs, ys, 20)
+
+        assert len(indices) == 20
+        assert indices[0] == 0 and indices[-1] == 999
+        assert 517 in indices
+        assert indices == sorted(indices)
+
+    def test_short_series_is_unchanged(self):
+        """Test that series within the budget are returned whole."""
+        assert lttb([1, 2, 3], [1, 2, 3], 10) == [0, 1, 2]
+
+    def test_rejects_threshold_below_three(self):
+        """Test that LTTB needs room for both endpoints and a bucket."""
+        with pytest.raises(ValueError):
+            lttb(list(range(10)), list(range(10)), 2)
+
+
+class TestDownsample:
+    """Tests for per-series record downsampling."""
+
+    def test_each_series_gets_its_own_budget(self):
+        """Test that series are downsampled independently."""
+        records = [_record(m, m * 10) for m in range(30)] + [
+            _record(m, 5, service="api") for m in range(4)
+        ]
+
+        result = downsample(records, 5, "response_time_ms")
+
+        services = [r["service"] for r in result]
+        assert services.count("web-service") == 5
+        assert services.count("api") == 4
+
+    def test_records_without_values_are_kept(self):
+        """Test that unparseable records pass through."""
+        records = [_record(m, m) for m in range(10)] + [{"note": "no timestamp"}]
+
+        result = downsample(records, 3, "response_time_ms")
+
+        assert len(result) == 4
+        assert result[-1] == {"note": "no timestamp"}
+
+
+def _log(minute, level, message):
+    return {
+        "timestamp": f"2024-01-15T14:{minute:02d}:00Z",
+        "level": level,
+        "service": "web-service",
+        "message": message,
+    }
+
+
+class TestFitToBudget:
+    """Tests for budget aware response shaping."""
+
+    def test_collapses_identical_lines_with_counts(self):
+        """Test that repeats merge into the first with a count and time span."""
+        logs = [_log(m, "ERROR", "db timeout") for m in (5, 1, 9)]
+        logs.append(_log(2, "ERROR", "disk full"))
+
+        collapsed = collapse(logs, ("level", "service", "message"))
+
+        assert len(collapsed) == 2
+        assert collapsed[0]["count"] == 3
+        assert collapsed[0]["first_seen"] == "2024-01-15T14:01:00Z"
+        assert collapsed[0]["last_seen"] == "2024-01-15T14:09:00Z"
+        assert "count" not in collapsed[1]
+
+    def test_existing_counts_are_summed(self):
+        """Test that items which already carry a count add them up."""
+        events = [{"reason": "BackOff", "count": 4}, {"reason": "BackOff", "count": 6}]
+
+        assert collapse(events, ("reason",))[0]["count"] == 10
+
+    def test_most_severe_first_within_budget(self):
+        """Test that the budget is spent on the most severe items."""
+        logs = [_log(m, "INFO", f"request {m}") for m in range(20)]
+        logs.append(_log(30, "CRITICAL", "out of memory"))
+        severity = {"CRITICAL": 2, "INFO": 1}
+
+        shaped, shaping = fit_to_budget(
+            logs, max_tokens=60, severity=lambda log: severity[log["level"]]
+        )
+
+        assert shaped[0]["message"] == "out of memory"
+        assert shaping["truncated"] is True
+        assert shaping["returned"] == len(shaped) < 21
+        assert sum(len(json.dumps(log)) for log in shaped) <= 60 * 4
+
+    def test_cursor_pages_through_everything(self):
+        """Test that following next_cursor returns every item exactly once."""
+        logs = [_log(m, "ERROR", f"failure {m}") for m in range(25)]
+
+        seen, cursor = [], None
+        while True:
+            shaped, shaping = fit_to_budget(logs, max_bytes=300, cursor=cursor)
+            seen.extend(shaped)
+            cursor = shaping["next_cursor"]
+            if not shaping["truncated"]:
+                break
+
+        assert cursor is None
+        assert seen == logs
+
+    def test_oversized_item_still_makes_progress(self):
+        """Test that one item is returned even when it exceeds the budget."""
+        shaped, shaping = fit_to_budget([_log(1, "ERROR", "x" * 500)], max_bytes=10)
+
+        assert len(shaped) == 1
+        assert shaping["truncated"] is False
+
+    def test_invalid_cursor(self):
+        """Test that malformed cursors are rejected."""
+        with pytest.raises(InvalidCursorError):
+            fit_to_budget([], cursor="abc")
+        with pytest.raises(InvalidCursorError):
+            fit_to_budget([], cursor="-3")
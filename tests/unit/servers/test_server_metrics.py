@@ -0,0 +1,113 @@
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from backend.servers.server_metrics import (
+    Histogram,
+    ServerMetrics,
+    install_server_metrics,
+    process_rss_bytes,
+)
+
+
+def _samples(text):
+    """Metric lines of an exposition as {name with labels: value}"""
+    return {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+        for line in text.splitlines()
+        if line and not line.startswith("#")
+    }
+
+
+class TestHistogram:
+    """Tests for the Prometheus histogram."""
+
+    def test_buckets_are_cumulative(self):
+        """Test that bucket counts include every smaller bucket."""
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 5.0):
+            histogram.observe(value)
+
+        samples = _samples("\n".join(histogram.render("latency", route="/x")))
+
+        assert samples['latency_bucket{route="/x",le="0.1"}'] == 2
+        assert samples['latency_bucket{route="/x",le="1.0"}'] == 3
+        assert samples['latency_bucket{route="/x",le="+Inf"}'] == 4
+        assert samples['latency_sum{route="/x"}'] == 5.65
+        assert samples['latency_count{route="/x"}'] == 4
+
+
+class TestServerMetrics:
+    """Tests for rendering server metrics."""
+
+    def test_cache_hit_ratio_and_reloads(self):
+        """Test that cache lookups are exported as counters and a ratio."""
+        metrics = ServerMetrics()
+        for hit in (True, True, True, False):
+            metrics.cache_lookup("k8s_datasets", hit)
+        metrics.dataset_reloaded("pods")
+
+        samples = _samples(metrics.render())
+
+        assert (
+            samples['backend_cache_lookups_total{cache="k8s_datasets",result="hit"}']
+            == 3
+        )
+        assert samples['backend_cache_hit_ratio{cache="k8s_datasets"}'] == 0.75
+        assert samples['backend_dataset_reloads_total{dataset="pods"}'] == 1
+
+    def test_gauges_are_collected_at_render_time(self):
+        """Test that labelled and plain gauges call their collectors."""
+        metrics = ServerMetrics()
+        sizes = {"tokens": 1, "records": 2}
+        metrics.gauge("backend_index_size", "Index sizes", lambda: sizes, "index")
+        metrics.gauge("backend_open_files", "Open files", lambda: 7)
+
+        sizes["tokens"] = 10
+        samples = _samples(metrics.render())
+
+        assert samples['backend_index_size{index="tokens"}'] == 10
+        assert samples["backend_open_files"] == 7
+        assert samples["process_resident_memory_bytes"] > 0
+
+    def test_label_values_are_escaped(self):
+        """Test that quotes in label values do not break the exposition."""
+        metrics = ServerMetrics()
+        metrics.dataset_reloaded('we"ird')
+
+        assert 'dataset="we\\"ird"' in metrics.render()
+
+    def test_process_rss_bytes(self):
+        """Test that the resident set size is reported in bytes."""
+        assert process_rss_bytes() > 1024 * 1024
+
+
+class TestInstall:
+    """Tests for the request metrics middleware and endpoint."""
+
+    def test_requests_are_recorded_per_route(self):
+        """Test that counts, status codes and sizes are tracked by route template."""
+        app = FastAPI()
+        install_server_metrics(app)
+
+        @app.get("/items/{item_id}")
+        async def get_item(item_id: str):
+            if item_id == "missing":
+                raise HTTPException(status_code=404, detail="not found")
+            return {"id": item_id}
+
+        with TestClient(app) as client:
+            client.get("/items/1")
+            client.get("/items/2")
+            client.get("/items/missing")
+            response = client.get("/internal/metrics")
+
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        samples = _samples(response.text)
+        route = 'route="/items/{item_id}",method="GET"'
+        assert samples[f'backend_requests_total{{{route},status="200"}}'] == 2
+        assert samples[f'backend_requests_total{{{route},status="404"}}'] == 1
+        assert samples['backend_response_size_bytes_sum{route="/items/{item_id}"}'] > 0
+        assert (
+            samples['backend_request_duration_seconds_count{route="/items/{item_id}"}']
+            == 3
+        )
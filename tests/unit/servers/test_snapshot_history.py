@@ -0,0 +1,101 @@
+import threading
+
+from backend.servers.snapshot_history import SnapshotHistory
+
+
+def _pod(name, status="Running"):
+    return {"name": name, "namespace": "production", "status": status}
+
+
+class TestSnapshotHistory:
+    """Tests for versioned snapshots and deltas."""
+
+    def test_unchanged_update_keeps_version(self):
+        """Test that reloading identical data does not bump the version."""
+        history = SnapshotHistory()
+        history.update([_pod("a"), _pod("b")])
+
+        version = history.version
+
+        assert history.update([_pod("a"), _pod("b")]) is False
+        assert history.version == version
+        assert history.delta(version) == ([], [])
+
+    def test_delta_folds_multiple_versions(self):
+        """Test the net change across several versions."""
+        history = SnapshotHistory()
+        history.update([_pod("a"), _pod("b")])
+        first = history.version
+        history.update([_pod("a", "CrashLoopBackOff"), _pod("b")])
+        history.update([_pod("a", "CrashLoopBackOff"), _pod("c")])
+
+        upserted, removed = history.delta(first)
+
+        assert history.version == first + 2
+        assert [pod["name"] for pod in upserted] == ["a", "c"]
+        assert removed == [{"namespace": "production", "name": "b"}]
+
+        upserted, removed = history.delta(first + 1)
+        assert [pod["name"] for pod in upserted] == ["c"]
+
+    def test_unknown_versions_need_full_snapshot(self):
+        """Test that expired or future versions return None."""
+        history = SnapshotHistory(max_history=2)
+        for version in range(5):
+            history.update([_pod("a", str(version))])
+
+        first = history.initial_version + 1
+
+        assert history.delta(history.version + 1) is None
+        assert history.delta(first) is None
+        assert history.delta(first + 2) is not None
+
+    def test_versions_from_another_process_need_full_snapshot(self):
+        """Test that a version issued before a restart is never taken as current."""
+        before = SnapshotHistory(epoch=1)
+        before.update([_pod("a")])
+        before.update([_pod("a"), _pod("b")])
+
+        after = SnapshotHistory(epoch=2)
+        after.update([_pod("c")])
+        after.update([_pod("c", "Pending")])
+        after.update([_pod("c", "Failed")])
+
+        assert after.delta(before.version) is None
+        assert after.delta(before.initial_version + 1) is None
+        assert after.delta(after.initial_version + 1) is not None
+
+    def test_read_returns_version_with_its_objects(self):
+        """Test that read gives a full snapshot, or a delta, for one version."""
+        history = SnapshotHistory()
+        history.update([_pod("a")])
+        version = history.version
+        history.update([_pod("a"), _pod("b")])
+
+        current, objects, delta = history.read()
+        assert current == version + 1
+        assert [pod["name"] for pod in objects] == ["a", "b"]
+        assert delta is None
+
+        _, _, delta = history.read(version)
+        assert [pod["name"] for pod in delta[0]] == ["b"]
+
+    def test_concurrent_updates_and_reads(self):
+        """Test that reads racing updates never fail or mix versions."""
+        history = SnapshotHistory(max_history=8)
+        history.update([_pod("p0")])
+        start = history.version
+        stop = threading.Event()
+
+        def writer():
+            for i in range(1, 2000):
+                history.update([_pod(f"p{j}") for j in range(i % 50 + 1)])
+            stop.set()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        while not stop.is_set():
+            version, objects, delta = history.read(start)
+            # Updates alternate sizes, so the version fixes the object count
+            assert len(objects) == (version - history.initial_version - 1) % 50 + 1
+        thread.join()
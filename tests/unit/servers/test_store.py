@@ -0,0 +1,156 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from backend.servers.store import (
+    Dataset,
+    Engine,
+    InvalidTimeRangeError,
+    JsonFileEngine,
+    MemoryEngine,
+    api_key_validator,
+    filter_by_time,
+    parse_fields,
+    project,
+    to_epoch,
+)
+
+EVENTS = [
+    {"type": "Warning", "reason": "BackOff", "timestamp": "2024-01-15T14:20:00Z"},
+    {"type": "Normal", "reason": "Pulled", "timestamp": "2024-01-15T14:25:00Z"},
+    {"type": "Warning", "reason": "OOMKilled", "timestamp": "2024-01-15T14:30:00Z"},
+]
+
+
+class TestToEpoch:
+    """Tests for timestamp parsing."""
+
+    def test_iso_and_epoch_numbers(self):
+        """Test that ISO strings, naive times and milliseconds agree."""
+        expected = 1705328400.0
+
+        assert to_epoch("2024-01-15T14:20:00Z") == expected
+        assert to_epoch("2024-01-15T14:20:00") == expected
+        assert to_epoch(expected * 1000) == expected
+        assert to_epoch("not a time") is None
+        assert to_epoch(None) is None
+
+
+class TestFilterByTime:
+    """Tests for time range filtering."""
+
+    def test_bounds_are_inclusive(self):
+        """Test that records on either bound are kept."""
+        result = filter_by_time(EVENTS, "2024-01-15T14:25:00Z", "2024-01-15T14:30:00Z")
+
+        assert [e["reason"] for e in result] == ["Pulled", "OOMKilled"]
+
+    def test_missing_and_unparseable_timestamps(self):
+        """Test that records without a timestamp are dropped, garbled ones kept."""
+        records = [{"reason": "none"}, {"reason": "bad", "timestamp": "garbled"}]
+
+        assert filter_by_time(records, "2024-01-15T14:25:00Z") == [records[1]]
+        assert filter_by_time(records) == records
+
+    def test_unparseable_bound_is_rejected(self):
+        """Test that a bad bound raises instead of returning every record."""
+        with pytest.raises(InvalidTimeRangeError):
+            filter_by_time(EVENTS, "yesterday")
+        with pytest.raises(InvalidTimeRangeError):
+            filter_by_time(EVENTS, end_time="2024-13-45")
+
+
+class TestProject:
+    """Tests for field projection."""
+
+    def test_nested_and_missing_fields(self):
+        """Test dotted paths and silently skipped fields."""
+        pod = {"name": "web-1", "resource_usage": {"cpu": "250m", "memory": "1Gi"}}
+
+        result = project([pod], parse_fields("name, resource_usage.cpu, missing"))
+
+        assert result == [{"name": "web-1", "resource_usage": {"cpu": "250m"}}]
+
+    def test_no_fields_returns_records(self):
+        """Test that an empty fields parameter is a no-op."""
+        assert parse_fields(" , ") is None
+        assert project([{"a": 1}], None) == [{"a": 1}]
+
+
+class TestDataset:
+    """Tests for querying versioned datasets."""
+
+    def test_query_filters_time_and_pagination(self):
+        """Test equality filters, None filters, time ranges and paging together."""
+        events = Dataset(
+            MemoryEngine({"events": {"events": EVENTS}}), "events", "events"
+        )
+
+        result = events.query(
+            {"type": "Warning", "namespace": None},
+            start_time="2024-01-15T14:21:00Z",
+            fields=["reason"],
+        )
+
+        assert result == [{"reason": "OOMKilled"}]
+        assert [e["reason"] for e in events.query(offset=1, limit=1)] == ["Pulled"]
+        assert len(events) == 3
+
+    def test_indexes_are_rebuilt_only_on_change(self):
+        """Test that a new source document bumps the version and drops indexes."""
+        engine = MemoryEngine({"events": {"events": EVENTS}})
+        events = Dataset(engine, "events", "events")
+
+        index = events.index("type")
+        assert events.index("type") is index
+        assert len(index["Warning"]) == 2
+        assert events.version == 1
+
+        engine.put("events", {"events": EVENTS[:1]})
+
+        assert events.query({"type": "Warning"}) == EVENTS[:1]
+        assert events.index("type") is not index
+        assert events.version == 2
+
+    def test_missing_source(self):
+        """Test that a missing source raises unless the dataset is optional."""
+        engine = MemoryEngine()
+
+        assert Dataset(engine, "trends", required=False).query() == []
+        assert Dataset(engine, "trends", required=False).document() is None
+        with pytest.raises(FileNotFoundError):
+            Dataset(engine, "trends").load()
+
+    def test_engine_requires_read(self):
+        """Test that an engine without a read implementation cannot be created."""
+        with pytest.raises(TypeError):
+            Engine()
+
+    def test_json_file_engine(self, tmp_path):
+        """Test that JSON files are served through the shared file cache."""
+        path = tmp_path / "playbooks.json"
+        path.write_text('{"playbooks": [{"id": "oom"}, {"id": "crashloop"}]}')
+        engine = JsonFileEngine()
+
+        playbooks = Dataset(engine, path, "playbooks")
+
+        assert playbooks.query({"id": "oom"}) == [{"id": "oom"}]
+        assert engine.read(tmp_path / "missing.json") is None
+
+
+class TestApiKeyValidator:
+    """Tests for the shared API key dependency."""
+
+    def test_rejects_missing_and_wrong_keys(self):
+        """Test that only the expected X-API-Key header is accepted."""
+        app = FastAPI()
+
+        @app.get("/", dependencies=[Depends(api_key_validator("secret"))])
+        async def index():
+            return {"status": "ok"}
+
+        client = TestClient(app)
+
+        assert client.get("/").status_code == 401
+        assert client.get("/", headers={"X-API-Key": "wrong"}).status_code == 401
+        assert client.get("/", headers={"X-API-Key": "secret"}).status_code == 200